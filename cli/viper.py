@@ -1,15 +1,40 @@
 #! /usr/bin/env pipenv run -- python3
+import os
+import sys
 import click
 
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.realpath(__file__))))
+
+from compiler.lexer.lexer import LexerError  # noqa: E402
+from compiler.parser.cache import ParseCache  # noqa: E402
+from compiler.parser.parser import Parser, ParserError  # noqa: E402
+
 
 @click.command()
 @click.option('--version', '-v', flag_value=True, help="Show Viper version")
+@click.option(
+    '--cache-dir',
+    default=os.path.join(os.path.expanduser("~"), ".cache", "viper"),
+    help="Directory of the parsed AST cache",
+)
+@click.option('--no-cache', flag_value=True, help="Don't use the parsed AST cache")
 @click.argument('args', nargs=-1)
-def app(version, args):
+def app(version, cache_dir, no_cache, args):
     if version:
         click.echo('Viper 0.0.1')
 
     elif args:
+        with open(args[0], encoding="utf-8") as file:
+            code = file.read()
+
+        cache = None if no_cache else ParseCache(cache_dir)
+
+        try:
+            Parser.from_code(code, cache=cache).parse_program()
+        except (LexerError, ParserError) as error:
+            click.echo(f"{args[0]}: {error}", err=True)
+            sys.exit(1)
+
         click.echo(f"I know I'm supposed to compile '{args[0]}', but I wont 😜")
         click.echo(f"arguments = [{', '.join(args)}]")
 
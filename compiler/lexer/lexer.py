@@ -4,13 +4,13 @@ An implementation of Viper's tokenizer.
 Check `compiler/lexer/lexer.grammar` for the language's lexer grammar specification.
 
 NOTE:
-    May turn lex function into a generator in the future to support generating tokens on demand.
+    `Lexer.tokenize` generates tokens on demand.
 
     As noted¹ by some, certain lexer errors may be caused by invalid syntax, but the lexer error
     shows first because it comes before the parser.
 
-    In addition to lex function becoming a generator, may also change Parser.code to an generator
-    to be gotten on demand.
+    The parser can pull tokens from `Lexer.tokenize` one top-level statement at a time (see
+    `Parser.iter_statements`).
 
     This has the benefit of not keeping everything in memory in case lexer / parser fails early
 
@@ -253,6 +253,16 @@ class Lexer:
 
     def lex(self):
         """ Breaks code string into tokens that the parser can digest """
+        return list(self.tokenize())
+
+    def tokenize(self):
+        """
+        Generates the tokens of the code on demand.
+
+        NOTE:
+            The last token is only yielded once the next one is lexed, because lexing a
+            coefficient literal like `2im` may still replace it.
+        """
         char = self.eat_char()
         tokens = []
 
@@ -808,13 +818,17 @@ class Lexer:
             # Consume the next character in code.
             char = self.eat_char()
 
+            if len(tokens) > 1:
+                yield from tokens[:-1]
+                del tokens[:-1]
+
         # Checking possible dedents at the end of code
         prev_indent = self.indentations[-1].indentation_count
         if prev_indent > 0:
             for i in range(prev_indent // self.indent_factor):
                 tokens.append(Token('', TokenKind.DEDENT, *self.get_line_info()))
 
-        return tokens
+        yield from tokens
 
     def lex_prefixed_string(self, prefix, triple_quote_delimiter, is_byte_string):
         """
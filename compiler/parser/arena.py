@@ -0,0 +1,302 @@
+"""
+A flat representation of a module's AST.
+
+All nodes of a module live in one arena as rows of parallel integer arrays instead of separate
+Python objects:
+- `kinds`: the AST class `kind` of each node.
+- `first_child` / `next_sibling`: indices describing the tree structure (-1 if absent).
+- `tokens`: the token index held by the node's `token_field` (-1 if absent).
+- `payloads`: the small integer held by the node's `payload_field` (-1 if absent).
+
+Nodes are stored in preorder with the root at index 0, so a subtree occupies a contiguous range.
+Child slots of a node keep their positions, so None and lists of nodes are stored as `NONE_KIND`
+and `LIST_KIND` nodes. Any other value stored in a child slot goes to the `values` list and is
+referenced by a `VALUE_KIND` node's payload.
+
+Views present the same attributes as the AST classes (`BinaryExprView.lhs`, `FuncExprView.body`,
+...), but read them from the arena on access.
+"""
+
+from array import array
+from .ast import AST
+
+NONE_KIND = -1
+LIST_KIND = -2
+VALUE_KIND = -3
+
+_ast_classes = {}
+
+
+def get_ast_classes():
+    """
+    Returns a dict of all AST classes keyed by their `kind`.
+    """
+    if not _ast_classes:
+        stack = [AST]
+        while stack:
+            for cls in stack.pop().__subclasses__():
+                _ast_classes.setdefault(cls.kind, cls)
+                stack.append(cls)
+
+    return _ast_classes
+
+
+def get_ast_class(kind):
+    """
+    Returns the AST class with the given `kind`.
+    """
+    return get_ast_classes()[kind]
+
+
+class ASTArena:
+    """
+    Holds the nodes of one module in parallel arrays.
+    """
+
+    def __init__(self):
+        self.kinds = array("b")
+        self.first_child = array("l")
+        self.next_sibling = array("l")
+        self.tokens = array("l")
+        self.payloads = array("l")
+        self.values = []
+
+    def __repr__(self):
+        return f"{type(self).__name__}(length={len(self)})"
+
+    def __len__(self):
+        return len(self.kinds)
+
+    @staticmethod
+    def from_ast(root):
+        """
+        Flattens the tree at `root` into a new arena.
+        """
+        arena = ASTArena()
+        kinds = arena.kinds
+        first_child = arena.first_child
+        next_sibling = arena.next_sibling
+        tokens = arena.tokens
+        payloads = arena.payloads
+        values = arena.values
+
+        # The last child allocated for each node, used to link siblings in order.
+        last_child = []
+        stack = [(root, -1)]
+
+        while stack:
+            value, parent = stack.pop()
+            index = len(kinds)
+            token = payload = -1
+
+            if value is None:
+                kind = NONE_KIND
+                children = ()
+            elif isinstance(value, list):
+                kind = LIST_KIND
+                children = value
+            elif isinstance(value, AST):
+                kind = value.kind
+                children = [getattr(value, field) for field in value.fields]
+
+                if value.token_field is not None:
+                    token = getattr(value, value.token_field)
+                    token = -1 if token is None else token
+
+                if value.payload_field is not None:
+                    payload = getattr(value, value.payload_field)
+                    payload = -1 if payload is None else int(payload)
+            else:
+                kind = VALUE_KIND
+                children = ()
+                payload = len(values)
+                values.append(value)
+
+            kinds.append(kind)
+            first_child.append(-1)
+            next_sibling.append(-1)
+            tokens.append(token)
+            payloads.append(payload)
+            last_child.append(-1)
+
+            if parent != -1:
+                previous = last_child[parent]
+                if previous == -1:
+                    first_child[parent] = index
+                else:
+                    next_sibling[previous] = index
+                last_child[parent] = index
+
+            for child in reversed(children):
+                stack.append((child, index))
+
+        return arena
+
+    def children(self, index):
+        """
+        Returns the indices of the children of node `index` in order.
+        """
+        next_sibling = self.next_sibling
+        result = []
+        child = self.first_child[index]
+
+        while child != -1:
+            result.append(child)
+            child = next_sibling[child]
+
+        return result
+
+    def view(self, index=0):
+        """
+        Returns a typed view of node `index`, a list for list nodes, or the value it holds.
+        """
+        kind = self.kinds[index]
+
+        if kind == NONE_KIND:
+            return None
+        elif kind == LIST_KIND:
+            return [self.view(child) for child in self.children(index)]
+        elif kind == VALUE_KIND:
+            return self.values[self.payloads[index]]
+
+        return get_view_class(kind)(self, index)
+
+    def to_ast(self, index=0):
+        """
+        Materializes the subtree at node `index` as AST objects.
+        """
+        kinds = self.kinds
+        tokens = self.tokens
+        payloads = self.payloads
+        results = {}
+
+        # Children are materialized before their parents.
+        stack = [(index, False)]
+
+        while stack:
+            node, is_ready = stack.pop()
+            kind = kinds[node]
+
+            if not is_ready:
+                stack.append((node, True))
+                for child in self.children(node):
+                    stack.append((child, False))
+                continue
+
+            if kind == NONE_KIND:
+                result = None
+            elif kind == LIST_KIND:
+                result = [results.pop(child) for child in self.children(node)]
+            elif kind == VALUE_KIND:
+                result = self.values[payloads[node]]
+            else:
+                cls = get_ast_class(kind)
+                result = cls.__new__(cls)
+                attributes = vars(result)
+
+                for field, child in zip(cls.fields, self.children(node)):
+                    attributes[field] = results.pop(child)
+
+                if cls.token_field is not None:
+                    token = tokens[node]
+                    attributes[cls.token_field] = None if token == -1 else token
+
+                if cls.payload_field is not None:
+                    payload = payloads[node]
+                    attributes[cls.payload_field] = None if payload == -1 else payload
+
+            results[node] = result
+
+        return results[index]
+
+
+class ArenaView:
+    """
+    A lightweight reference to node `node` of `arena`.
+    """
+
+    __slots__ = ("arena", "node")
+
+    ast_class = AST
+
+    def __init__(self, arena, node):
+        self.arena = arena
+        self.node = node
+
+    def __repr__(self):
+        return f"{type(self).__name__}(node={self.node})"
+
+    def __eq__(self, other):
+        return (
+            isinstance(other, ArenaView)
+            and self.arena is other.arena
+            and self.node == other.node
+        )
+
+    def __hash__(self):
+        return hash((id(self.arena), self.node))
+
+    @property
+    def kind(self):
+        return self.ast_class.kind
+
+    def to_ast(self):
+        return self.arena.to_ast(self.node)
+
+
+def _make_child_property(position):
+    def get_child(self):
+        arena = self.arena
+        next_sibling = arena.next_sibling
+        child = arena.first_child[self.node]
+
+        for _ in range(position):
+            child = next_sibling[child]
+
+        return arena.view(child)
+
+    return property(get_child)
+
+
+def _make_token_property():
+    def get_token(self):
+        token = self.arena.tokens[self.node]
+        return None if token == -1 else token
+
+    return property(get_token)
+
+
+def _make_payload_property():
+    def get_payload(self):
+        payload = self.arena.payloads[self.node]
+        return None if payload == -1 else payload
+
+    return property(get_payload)
+
+
+_view_classes = {}
+
+
+def get_view_class(kind):
+    """
+    Returns the view class of the AST class with the given `kind`, creating it on first use.
+    """
+    view_class = _view_classes.get(kind)
+
+    if view_class is None:
+        cls = get_ast_class(kind)
+        namespace = {"__slots__": (), "ast_class": cls}
+
+        for position, field in enumerate(cls.fields):
+            namespace[field] = _make_child_property(position)
+
+        if cls.token_field is not None:
+            namespace[cls.token_field] = _make_token_property()
+
+        if cls.payload_field is not None:
+            namespace[cls.payload_field] = _make_payload_property()
+
+        view_class = type(f"{cls.__name__}View", (ArenaView,), namespace)
+        _view_classes[kind] = view_class
+
+    return view_class
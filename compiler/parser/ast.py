@@ -34,8 +34,15 @@ class BinaryOpKind(Enum):
     IS = 21
     IS_NOT = 22
 
+    AND = 23
+    OR = 24
+
     @staticmethod
     def from_string(op, second_token=None):
+        """
+        Returns the kind of operator `op`. `second_token` is the text of the second token of
+        'not' 'in' and 'is' 'not'.
+        """
         if op == "^":
             return BinaryOpKind.POWER
         elif op == "*":
@@ -50,7 +57,7 @@ class BinaryOpKind(Enum):
             return BinaryOpKind.INTEGER_DIV
         elif op == "+":
             return BinaryOpKind.PLUS
-        elif op == "_":
+        elif op == "-":
             return BinaryOpKind.MINUS
         elif op == "<<":
             return BinaryOpKind.SHIFT_LEFT
@@ -68,9 +75,9 @@ class BinaryOpKind(Enum):
             return BinaryOpKind.GREATER_THAN
         elif op == "==":
             return BinaryOpKind.EQUAL
-        elif op == ">=":
-            return BinaryOpKind.EQUAL_LESSER_THAN
         elif op == "<=":
+            return BinaryOpKind.EQUAL_LESSER_THAN
+        elif op == ">=":
             return BinaryOpKind.EQUAL_GREATER_THAN
         elif op == "!=":
             return BinaryOpKind.NOT_EQUAL
@@ -78,10 +85,14 @@ class BinaryOpKind(Enum):
             return BinaryOpKind.IN
         elif op == "not" and second_token == "in":
             return BinaryOpKind.NOT_IN
-        elif op == "is":
-            return BinaryOpKind.IS
         elif op == "is" and second_token == "not":
             return BinaryOpKind.IS_NOT
+        elif op == "is":
+            return BinaryOpKind.IS
+        elif op == "and":
+            return BinaryOpKind.AND
+        elif op == "or":
+            return BinaryOpKind.OR
         else:
             return None
 
@@ -122,8 +133,19 @@ class AST:
         We really only need our AST classes to inherit from this one class. We don't need a
         complicated type hierarchy since the Parser already ensures a StatementExpr can't be
         passed where an ExprAST is expected, for example.
+
+    Each class describes its layout with the following class attributes:
+    - `kind`: a unique integer identifying the class.
+    - `fields`: names of the attributes holding child nodes, lists of nodes or None.
+    - `token_field`: name of the attribute holding a token index, if any.
+    - `payload_field`: name of the attribute holding a small integer value, if any.
     """
 
+    kind = 0
+    fields = ()
+    token_field = None
+    payload_field = None
+
     def __repr__(self):
         return f"{type(self).__name__}{str(vars(self))}"
 
@@ -132,73 +154,116 @@ class AST:
 
 
 class Newline(AST):
+    kind = 1
+    token_field = "index"
+
     def __init__(self, index):
         self.index = index
 
 
 class Indent(AST):
+    kind = 2
+    token_field = "index"
+
     def __init__(self, index):
         self.index = index
 
 
 class Dedent(AST):
+    kind = 3
+    token_field = "index"
+
     def __init__(self, index):
         self.index = index
 
 
 class Identifier(AST):
+    kind = 4
+    token_field = "index"
+
     def __init__(self, index):
         self.index = index
 
 
 class Integer(AST):
+    kind = 5
+    token_field = "index"
+
     def __init__(self, index):
         self.index = index
 
 
 class Float(AST):
+    kind = 6
+    token_field = "index"
+
     def __init__(self, index):
         self.index = index
 
 
 class ImagInteger(AST):
+    kind = 7
+    token_field = "index"
+
     def __init__(self, index):
         self.index = index
 
 
 class ImagFloat(AST):
+    kind = 8
+    token_field = "index"
+
     def __init__(self, index):
         self.index = index
 
 
 class String(AST):
+    kind = 9
+    token_field = "index"
+
     def __init__(self, index):
         self.index = index
 
 
 class ByteString(AST):
+    kind = 10
+    token_field = "index"
+
     def __init__(self, index):
         self.index = index
 
 
 class PrefixedString(AST):
+    kind = 11
+    token_field = "index"
+
     def __init__(self, index):
         self.index = index
 
 
 class Operator(AST):
+    kind = 12
+    token_field = "op"
+    payload_field = "second_token"
+
     def __init__(self, op, second_token=None):
         self.op = op
         self.second_token = second_token
 
 
 class UnaryExpr(AST):
+    kind = 13
+    fields = ("expr", "op")
+
     def __init__(self, expr, op):
         self.expr = expr
         self.op = op
 
 
 class BinaryExpr(AST):
+    kind = 14
+    fields = ("lhs", "op", "rhs")
+
     def __init__(self, lhs, op, rhs):
         self.lhs = lhs
         self.op = op
@@ -206,6 +271,9 @@ class BinaryExpr(AST):
 
 
 class IfExpr(AST):
+    kind = 15
+    fields = ("if_expr", "condition", "else_expr")
+
     def __init__(self, if_expr, condition, else_expr):
         self.if_expr = if_expr
         self.condition = condition
@@ -213,6 +281,9 @@ class IfExpr(AST):
 
 
 class FuncParam(AST):
+    kind = 16
+    fields = ("name", "type", "spread_type", "default_value_expr")
+
     def __init__(self, name, type, spread_type, default_value_expr):
         self.name = name
         self.type = type
@@ -221,6 +292,9 @@ class FuncParam(AST):
 
 
 class FuncParams(AST):
+    kind = 17
+    fields = ("params", "tuple_rest_param", "named_tuple_params", "named_tuple_rest_param")
+
     def __init__(
         self, params, tuple_rest_param, named_tuple_params, named_tuple_rest_param
     ):
@@ -231,6 +305,9 @@ class FuncParams(AST):
 
 
 class FuncExpr(AST):
+    kind = 18
+    fields = ("name", "params", "body")
+
     def __init__(self, name, params, body):
         self.name = name
         self.params = params
@@ -238,24 +315,37 @@ class FuncExpr(AST):
 
 
 class TupleRestExpr(AST):
+    kind = 19
+    fields = ("expr",)
+
     def __init__(self, expr):
         self.expr = expr
 
 
 class NamedTupleRestExpr(AST):
+    kind = 20
+    fields = ("expr",)
+
     def __init__(self, expr):
         self.expr = expr
 
 
 class ComprehensionFor(AST):
+    kind = 21
+    fields = ("for_lhs", "in_expr", "where_exprs")
+    payload_field = "is_async"
+
     def __init__(self, for_lhs, in_expr, where_exprs, is_async=False):
         self.for_lhs = for_lhs
         self.in_expr = in_expr
         self.where_exprs = where_exprs
-        self.is_sync = is_async
+        self.is_async = is_async
 
 
 class Comprehension(AST):
+    kind = 22
+    fields = ("type", "expr", "comprehension_fors")
+
     def __init__(self, type, expr, comprehension_fors, comprehension_wheres):
         self.type = type
         self.expr = expr
@@ -263,15 +353,42 @@ class Comprehension(AST):
 
 
 class AtomExpr(AST):
+    kind = 23
+    fields = ("expr",)
+
     def __init__(self, expr):
         self.expr = expr
 
 
 class WhileStatement(AST):
+    kind = 24
+
     def __init__(self):
         pass
 
 
 class ForStatement(AST):
+    kind = 25
+
     def __init__(self):
         pass
+
+
+class Program(AST):
+    kind = 26
+    fields = ("statements",)
+
+    def __init__(self, statements):
+        self.statements = statements
+
+
+class Constant(AST):
+    """
+    A value computed at compile time. `slot` is its position in the module's ConstantPool.
+    """
+
+    kind = 27
+    payload_field = "slot"
+
+    def __init__(self, slot):
+        self.slot = slot
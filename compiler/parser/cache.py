@@ -0,0 +1,171 @@
+"""
+A content-addressed on-disk cache of lexed and parsed source files.
+
+An entry is keyed by the hash of the source code, the compiler version and the sources of the
+lexer, parser, AST and serializer, so changing any of them invalidates existing entries without
+any bookkeeping.
+
+Entry format (little-endian):
+    magic (4 bytes) | format version (u16) | key (32 bytes) | payload length (u32) | crc32 (u32)
+    | payload
+
+The payload is the tokens and program AST in the binary format of `serialize.py`.
+"""
+
+import hashlib
+import os
+import struct
+import zlib
+from .serialize import ASTReader, serialize
+
+COMPILER_VERSION = "0.0.1"
+FORMAT_VERSION = 2
+MAGIC = b"VIPC"
+HEADER = struct.Struct("<4sH32sII")
+
+# Files whose changes can change the tokens or AST of a source file, or how they are stored.
+SOURCE_PATHS = (
+    "lexer/lexer.grammar",
+    "lexer/lexer.py",
+    "lexer/valid.py",
+    "parser/parser.grammar",
+    "parser/parser.py",
+    "parser/ast.py",
+    "parser/arena.py",
+    "parser/literals.py",
+    "parser/serialize.py",
+)
+
+_compiler_hash = None
+
+
+def get_compiler_hash():
+    """
+    Returns the hash of the compiler sources in `SOURCE_PATHS`.
+    """
+    global _compiler_hash
+
+    if _compiler_hash is None:
+        compiler_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+        digest = hashlib.sha256()
+
+        for path in SOURCE_PATHS:
+            with open(os.path.join(compiler_dir, path), "rb") as file:
+                data = file.read()
+
+            digest.update(struct.pack("<I", len(data)))
+            digest.update(data)
+
+        _compiler_hash = digest.digest()
+
+    return _compiler_hash
+
+
+class ParseCache:
+    """
+    Stores lex and parse results of source files in `directory`.
+
+    The cache holds at most `max_entries` entries. Loading an entry bumps its modification time,
+    so the least recently used entries are the ones evicted when the limit is exceeded.
+    """
+
+    def __init__(self, directory, max_entries=1024):
+        self.directory = directory
+        self.max_entries = max_entries
+
+    def __repr__(self):
+        return f"{type(self).__name__}{vars(self)}"
+
+    def get_key(self, code):
+        digest = hashlib.sha256()
+        digest.update(COMPILER_VERSION.encode())
+        digest.update(get_compiler_hash())
+        digest.update(code.encode("utf-8", "surrogatepass"))
+        return digest.digest()
+
+    def get_path(self, key):
+        return os.path.join(self.directory, key.hex())
+
+    def load(self, code):
+        """
+        Returns the cached (tokens, program) of `code` or None if there is no valid entry.
+        """
+        key = self.get_key(code)
+        path = self.get_path(key)
+
+        try:
+            with open(path, "rb") as file:
+                data = file.read()
+        except OSError:
+            return None
+
+        if len(data) < HEADER.size:
+            return None
+
+        magic, version, entry_key, length, checksum = HEADER.unpack_from(data)
+        payload = data[HEADER.size:]
+
+        if (
+            magic != MAGIC
+            or version != FORMAT_VERSION
+            or entry_key != key
+            or length != len(payload)
+            or checksum != zlib.crc32(payload)
+        ):
+            return None
+
+        reader = ASTReader(payload)
+        tokens = reader.get_tokens()
+        program = reader.load()
+
+        # Mark entry as recently used.
+        try:
+            os.utime(path)
+        except OSError:
+            pass
+
+        return tokens, program
+
+    def store(self, code, tokens, program):
+        """
+        Saves the tokens and program of `code`, evicting least recently used entries if needed.
+        """
+        key = self.get_key(code)
+        payload = serialize(tokens, program)
+        header = HEADER.pack(MAGIC, FORMAT_VERSION, key, len(payload), zlib.crc32(payload))
+
+        os.makedirs(self.directory, exist_ok=True)
+
+        # Write to a temporary file first so readers never see a partial entry.
+        path = self.get_path(key)
+        temp_path = f"{path}.{os.getpid()}.tmp"
+
+        with open(temp_path, "wb") as file:
+            file.write(header)
+            file.write(payload)
+
+        os.replace(temp_path, path)
+
+        self.evict()
+
+    def evict(self):
+        """
+        Removes the least recently used entries until there are at most `max_entries` left.
+        """
+        entries = []
+
+        with os.scandir(self.directory) as iterator:
+            for entry in iterator:
+                if entry.is_file() and not entry.name.endswith(".tmp"):
+                    entries.append((entry.stat().st_mtime_ns, entry.path))
+
+        if len(entries) <= self.max_entries:
+            return
+
+        entries.sort()
+
+        for _, path in entries[: len(entries) - self.max_entries]:
+            try:
+                os.remove(path)
+            except OSError:
+                pass
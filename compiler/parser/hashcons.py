@@ -0,0 +1,195 @@
+"""
+Hash-consing of immutable expression nodes.
+
+A `HashConsTable` makes sure structurally identical `Operator`, `UnaryExpr`, `BinaryExpr` and
+literal subtrees are represented by a single shared instance. Shared instances carry a
+precomputed hash and compare by identity, so they can be used as dict keys in O(1).
+
+NOTE:
+    Literals and operators are identified by their token kind and data, not by their token
+    index. A shared node keeps the token index of the first occurrence it was created from.
+"""
+
+from .ast import (
+    Identifier,
+    Integer,
+    Float,
+    ImagInteger,
+    ImagFloat,
+    String,
+    ByteString,
+    PrefixedString,
+    Operator,
+    UnaryExpr,
+    BinaryExpr,
+)
+
+LITERAL_CLASSES = (
+    Identifier,
+    Integer,
+    Float,
+    ImagInteger,
+    ImagFloat,
+    String,
+    ByteString,
+    PrefixedString,
+)
+
+_consed_classes = {}
+_consed_types = set()
+
+
+def _eq(self, other):
+    return self is other
+
+
+def _ne(self, other):
+    return self is not other
+
+
+def _hash(self):
+    return self.hash_value
+
+
+def _setattr(self, name, value):
+    raise AttributeError(f"hash-consed {type(self).__name__} is immutable")
+
+
+def get_consed_class(cls):
+    """
+    Returns the immutable, hash-consed variant of AST class `cls`.
+    """
+    consed_class = _consed_classes.get(cls)
+
+    if consed_class is None:
+        consed_class = type(
+            cls.__name__,
+            (cls,),
+            {
+                "__slots__": ("hash_value",),
+                "__eq__": _eq,
+                "__ne__": _ne,
+                "__hash__": _hash,
+                "__setattr__": _setattr,
+                "__delattr__": _setattr,
+            },
+        )
+        _consed_classes[cls] = consed_class
+        _consed_types.add(consed_class)
+
+    return consed_class
+
+
+def is_consed(node):
+    return type(node) in _consed_types
+
+
+class HashConsTable:
+    """
+    Creates shared instances of expression nodes for the module with the given tokens.
+    """
+
+    def __init__(self, tokens):
+        self.tokens = tokens
+        self.table = {}
+
+    def __repr__(self):
+        return f"{type(self).__name__}(length={len(self.table)})"
+
+    def make(self, cls, key, attributes):
+        """
+        Returns the shared instance for `key`, creating it with `attributes` if needed.
+        """
+        node = self.table.get(key)
+
+        if node is None:
+            consed_class = get_consed_class(cls)
+            node = consed_class.__new__(consed_class)
+            vars(node).update(attributes)
+            object.__setattr__(node, "hash_value", hash(key))
+            self.table[key] = node
+
+        return node
+
+    def literal(self, cls, index):
+        token = self.tokens[index]
+        return self.make(cls, (cls.kind, token.kind, token.data), {"index": index})
+
+    def operator(self, op, second_token=None):
+        tokens = self.tokens
+        key = (
+            Operator.kind,
+            tokens[op].data if op is not None else None,
+            tokens[second_token].data if second_token is not None else None,
+        )
+        return self.make(Operator, key, {"op": op, "second_token": second_token})
+
+    def unary_expr(self, expr, op):
+        """
+        NOTE: `expr` and `op` must be hash-consed already.
+        """
+        return self.make(UnaryExpr, (UnaryExpr.kind, expr, op), {"expr": expr, "op": op})
+
+    def binary_expr(self, lhs, op, rhs):
+        """
+        NOTE: `lhs`, `op` and `rhs` must be hash-consed already.
+        """
+        return self.make(
+            BinaryExpr,
+            (BinaryExpr.kind, lhs, op, rhs),
+            {"lhs": lhs, "op": op, "rhs": rhs},
+        )
+
+    def cons(self, root):
+        """
+        Returns `root` with its expression subtrees replaced by shared instances.
+
+        Nodes that can't be hash-consed are shallow-copied with their children replaced, so the
+        input tree is left untouched.
+        """
+        results = {}
+        stack = [(root, False)]
+
+        while stack:
+            value, is_ready = stack.pop()
+
+            if not is_ready:
+                stack.append((value, True))
+                # Children are pushed in reverse so they are consed in source order.
+                if isinstance(value, list):
+                    stack.extend((item, False) for item in reversed(value))
+                elif hasattr(value, "fields") and not is_consed(value):
+                    stack.extend((getattr(value, f), False) for f in reversed(value.fields))
+                continue
+
+            if id(value) in results:
+                continue
+
+            if isinstance(value, list):
+                result = [results[id(item)][1] for item in value]
+            elif not hasattr(value, "fields") or is_consed(value):
+                result = value
+            elif isinstance(value, LITERAL_CLASSES):
+                result = self.literal(type(value), value.index)
+            elif isinstance(value, Operator):
+                result = self.operator(value.op, value.second_token)
+            elif isinstance(value, UnaryExpr):
+                result = self.unary_expr(
+                    results[id(value.expr)][1], results[id(value.op)][1]
+                )
+            elif isinstance(value, BinaryExpr):
+                result = self.binary_expr(
+                    results[id(value.lhs)][1],
+                    results[id(value.op)][1],
+                    results[id(value.rhs)][1],
+                )
+            else:
+                result = type(value).__new__(type(value))
+                vars(result).update(vars(value))
+                for field in value.fields:
+                    vars(result)[field] = results[id(getattr(value, field))][1]
+
+            # Keep `value` alive alongside its result so its id can't be reused.
+            results[id(value)] = (value, result)
+
+        return results[id(root)][1]
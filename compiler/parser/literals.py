@@ -0,0 +1,234 @@
+"""
+Literal decoding
+
+Literal nodes only hold token indices. `LiteralTable` decodes every literal of a module once, in
+bulk per kind, and keeps the values in typed side arrays so later passes can read them without
+re-parsing token text.
+"""
+
+import codecs
+from array import array
+from .ast import (
+    Integer,
+    Float,
+    ImagInteger,
+    ImagFloat,
+    String,
+    ByteString,
+    PrefixedString,
+)
+from .visitor import Visitor
+from ..lexer.lexer import TokenKind
+
+INTEGER_BASES = {
+    TokenKind.DEC_INTEGER: 10,
+    TokenKind.HEX_INTEGER: 16,
+    TokenKind.BIN_INTEGER: 2,
+    TokenKind.OCT_INTEGER: 8,
+}
+
+INT64_MIN = -(2 ** 63)
+INT64_MAX = 2 ** 63 - 1
+
+
+def decode_string(data):
+    """
+    Returns the value of string literal text `data` with its escape sequences processed.
+    """
+    if "\\" not in data:
+        return data
+
+    # Characters outside latin-1 become \u escapes, which unicode_escape turns back into them.
+    return codecs.decode(data.encode("latin-1", "backslashreplace"), "unicode_escape")
+
+
+def decode_byte_string(data):
+    """
+    Returns the value of byte string literal text `data` with its escape sequences processed.
+    """
+    return codecs.escape_decode(data.encode("ascii"))[0]
+
+
+LITERAL_CLASSES = (
+    Integer,
+    Float,
+    ImagInteger,
+    ImagFloat,
+    String,
+    ByteString,
+    PrefixedString,
+)
+
+
+class LiteralCollector(Visitor):
+    """
+    Collects the token indices of a tree's literal nodes, grouped by node class.
+    """
+
+    def __init__(self):
+        self.groups = {cls.kind: [] for cls in LITERAL_CLASSES}
+
+    def visit_integer(self, node):
+        self.groups[Integer.kind].append(node.index)
+
+    def visit_float(self, node):
+        self.groups[Float.kind].append(node.index)
+
+    def visit_imag_integer(self, node):
+        self.groups[ImagInteger.kind].append(node.index)
+
+    def visit_imag_float(self, node):
+        self.groups[ImagFloat.kind].append(node.index)
+
+    def visit_string(self, node):
+        self.groups[String.kind].append(node.index)
+
+    def visit_byte_string(self, node):
+        self.groups[ByteString.kind].append(node.index)
+
+    def visit_prefixed_string(self, node):
+        self.groups[PrefixedString.kind].append(node.index)
+
+
+class LiteralTable:
+    """
+    Decoded values of a module's literals.
+
+    Values live in one array per node class. `slots` maps a literal's token index to its position
+    in that array and `indices` holds the token indices of each array in order:
+    - `integers`: signed 64-bit integers. Integers that don't fit are kept in `big_integers`,
+      keyed by slot.
+    - `floats` and `imag_floats`: doubles. Imaginary literals store their imaginary part.
+    - `imag_integers`: imaginary parts of imaginary integers, as Python ints.
+    - `strings` and `byte_strings`: str and bytes values.
+    - `prefixed_strings`: raw text. The lexer drops the prefix, so escapes can't be processed.
+
+    TODO: Process prefixed string escapes once the lexer keeps string prefixes.
+    """
+
+    def __init__(self, tokens):
+        self.tokens = tokens
+        self.slots = {}
+        self.indices = {cls.kind: [] for cls in LITERAL_CLASSES}
+        self.integers = array("q")
+        self.big_integers = {}
+        self.floats = array("d")
+        self.imag_integers = []
+        self.imag_floats = array("d")
+        self.strings = []
+        self.byte_strings = []
+        self.prefixed_strings = []
+
+    def __repr__(self):
+        return f"{type(self).__name__}(length={len(self.slots)})"
+
+    @staticmethod
+    def from_ast(root, tokens):
+        """
+        Decodes all literals in the tree at `root`.
+        """
+        collector = LiteralCollector()
+        collector.walk(root)
+
+        table = LiteralTable(tokens)
+        table.add(collector.groups)
+
+        return table
+
+    def add(self, groups):
+        """
+        Decodes literal token indices grouped by node class `kind`.
+        """
+        tokens = self.tokens
+        slots = self.slots
+
+        for kind, indices in groups.items():
+            # Literals can be shared by hash-consed trees, so each token is decoded once.
+            indices = [index for index in dict.fromkeys(indices) if index not in slots]
+
+            if not indices:
+                continue
+
+            texts = [tokens[index].data for index in indices]
+
+            if kind == Integer.kind:
+                values = [
+                    int(text, INTEGER_BASES[tokens[index].kind])
+                    for index, text in zip(indices, texts)
+                ]
+            elif kind == Float.kind or kind == ImagFloat.kind:
+                values = list(map(float, texts))
+            elif kind == ImagInteger.kind:
+                values = list(map(int, texts))
+            elif kind == String.kind:
+                values = list(map(decode_string, texts))
+            elif kind == ByteString.kind:
+                values = list(map(decode_byte_string, texts))
+            else:
+                values = texts
+
+            self.extend(kind, indices, values)
+
+    def extend(self, kind, indices, values):
+        """
+        Stores decoded `values` of the literals of class `kind` at token `indices`.
+
+        Imaginary literals take their imaginary part.
+        """
+        if kind == Integer.kind:
+            start = len(self.integers)
+            values = list(values)
+            for position, value in enumerate(values):
+                if not INT64_MIN <= value <= INT64_MAX:
+                    self.big_integers[start + position] = value
+                    values[position] = 0
+            self.integers.extend(values)
+        else:
+            values_array = self.get_values(kind)
+            start = len(values_array)
+            values_array.extend(values)
+
+        self.indices[kind].extend(indices)
+        self.slots.update(zip(indices, range(start, start + len(indices))))
+
+    def get_values(self, kind):
+        """
+        Returns the array holding the values of literals of class `kind`.
+        """
+        if kind == Integer.kind:
+            return self.integers
+        elif kind == Float.kind:
+            return self.floats
+        elif kind == ImagInteger.kind:
+            return self.imag_integers
+        elif kind == ImagFloat.kind:
+            return self.imag_floats
+        elif kind == String.kind:
+            return self.strings
+        elif kind == ByteString.kind:
+            return self.byte_strings
+
+        return self.prefixed_strings
+
+    def get(self, node):
+        """
+        Returns the decoded value of literal `node`.
+        """
+        slot = self.slots[node.index]
+        kind = node.kind
+
+        if kind == Integer.kind:
+            value = self.integers[slot]
+            return self.big_integers.get(slot, value) if value == 0 else value
+        elif kind == Float.kind:
+            return self.floats[slot]
+        elif kind == ImagInteger.kind:
+            return complex(0, self.imag_integers[slot])
+        elif kind == ImagFloat.kind:
+            return complex(0, self.imag_floats[slot])
+        elif kind == String.kind:
+            return self.strings[slot]
+        elif kind == ByteString.kind:
+            return self.byte_strings[slot]
+
+        return self.prefixed_strings[slot]
@@ -3,6 +3,7 @@ A packrat parser for parsing Viper's syntax.
 
 Check `compiler/parser/parser.grammar` for the language's parser grammar specification.
 """
+from concurrent.futures import ProcessPoolExecutor
 from ..lexer.lexer import TokenKind
 from .ast import (
     Newline,
@@ -26,6 +27,7 @@ from .ast import (
     TupleRestExpr,
     NamedTupleRestExpr,
     ComprehensionFor,
+    Program,
 )
 
 
@@ -45,6 +47,78 @@ class ParserError(Exception):
         )
 
 
+# Binding levels of the operator expression rules, from the loosest to the tightest.
+OR_TEST = 1
+AND_TEST = 2
+NOT_TEST = 3
+COMPARISON_EXPR = 4
+OR_EXPR = 5
+XOR_EXPR = 6
+AND_EXPR = 7
+SHIFT_EXPR = 8
+SUM_EXPR = 9
+MUL_EXPR = 10
+UNARY_EXPR = 11
+POWER_EXPR = 12
+ATOM = 13
+
+BINARY_OPERATOR_LEVELS = {
+    "or": OR_TEST,
+    "and": AND_TEST,
+    "<": COMPARISON_EXPR,
+    ">": COMPARISON_EXPR,
+    "==": COMPARISON_EXPR,
+    ">=": COMPARISON_EXPR,
+    "<=": COMPARISON_EXPR,
+    "!=": COMPARISON_EXPR,
+    "in": COMPARISON_EXPR,
+    "is": COMPARISON_EXPR,
+    "|": OR_EXPR,
+    "||": XOR_EXPR,
+    "&": AND_EXPR,
+    "<<": SHIFT_EXPR,
+    ">>": SHIFT_EXPR,
+    "+": SUM_EXPR,
+    "-": SUM_EXPR,
+    "*": MUL_EXPR,
+    "@": MUL_EXPR,
+    "/": MUL_EXPR,
+    "%": MUL_EXPR,
+    "//": MUL_EXPR,
+}
+
+# Expectations recorded by the operator expression engine, which stand for a set of tokens.
+EXPECTED_EXPRESSION = "an expression"
+EXPECTED_OPERATOR = "an operator"
+EXPECTATION_DESCRIPTIONS = frozenset((EXPECTED_EXPRESSION, EXPECTED_OPERATOR))
+
+# Comparison operators made of two tokens: 'not' 'in' and 'is' 'not'.
+SECOND_OPERATOR_TOKENS = {"not": "in", "is": "not"}
+
+UNARY_OPERATORS = frozenset(("+", "-", "~"))
+
+INTEGER_KINDS = frozenset(
+    (
+        TokenKind.DEC_INTEGER,
+        TokenKind.HEX_INTEGER,
+        TokenKind.BIN_INTEGER,
+        TokenKind.OCT_INTEGER,
+    )
+)
+
+# States and stack frame tags of `Parser.parse_operator_expr`.
+_OPERAND = 0
+_POWER_TAIL = 1
+_BINARY_LOOP = 2
+_DELIVER = 3
+
+_EXPR = 0
+_RHS = 1
+_PREFIX = 2
+_POWER = 3
+_GROUP = 4
+
+
 class Parser:
     """
     A recursive descent parser with memoizing feature basically making it a packrat parser.
@@ -54,31 +128,226 @@ class Parser:
     - A parser function result should not hold values, but references to token elements.
     """
 
-    def __init__(self, tokens):
+    def __init__(self, tokens, start=0, end=None):
         self.tokens = tokens
-        self.tokens_length = len(tokens)
-        self.cursor = -1
+        self.tokens_length = len(tokens) if end is None else end
+        self.cursor = start - 1
         self.row = 0
         self.column = -1
         self.cache = {}
+        self.code = None
+        self.parse_cache = None
+        self.token_stream = None
+        # The farthest token index a rule failed at and what was expected there.
+        self.farthest = -1
+        self.expected = {}
 
     def __repr__(self):
         return f"{type(self).__name__}{vars(self)}"
 
     @staticmethod
-    def from_code(code):
+    def from_code(code, cache=None, lazy=False):
         """
         Creates a parser from code.
+
+        If a `ParseCache` is given and it has an entry for the code, lexing is skipped and
+        `parse_program` returns the cached program. Otherwise the program is saved to the cache
+        once it is parsed.
+
+        If `lazy` is True, tokens are only lexed as `iter_statements` needs them.
         """
         from ..lexer.lexer import Lexer
 
+        if cache is not None:
+            entry = cache.load(code)
+
+            if entry is not None:
+                tokens, program = entry
+                parser = Parser(tokens)
+                parser.cache[-1] = {"parse_program": (program, len(tokens) - 1)}
+                return parser
+
+        if lazy:
+            parser = Parser([])
+            parser.token_stream = Lexer(code).tokenize()
+            return parser
+
         tokens = Lexer(code).lex()
+        parser = Parser(tokens)
+
+        if cache is not None:
+            parser.code = code
+            parser.parse_cache = cache
 
-        return Parser(tokens)
+        return parser
 
     def get_line_info(self):
         return self.row, self.column
 
+    def pull_token(self):
+        """
+        Appends the next token of `token_stream` to the tokens. Returns False if there is none.
+        """
+        if self.token_stream is None:
+            return False
+
+        token = next(self.token_stream, None)
+
+        if token is None:
+            self.token_stream = None
+            return False
+
+        self.tokens.append(token)
+        self.tokens_length += 1
+
+        return True
+
+    def scan_statement(self, start):
+        """
+        Finds the end of the top-level statement starting at token `start`.
+
+        Returns the (end, next_start) indices, or None if there are no tokens left. The statement
+        is empty when `end` equals `start` (a blank line).
+
+        NOTE:
+            The lexer doesn't emit NEWLINE tokens inside brackets, so a statement ends at a
+            NEWLINE seen at indentation depth zero or at the DEDENT that brings the depth back
+            to zero.
+        """
+        tokens = self.tokens
+        depth = 0
+        index = start
+
+        while True:
+            if index >= self.tokens_length and not self.pull_token():
+                return (index, index) if index > start else None
+
+            kind = tokens[index].kind
+
+            if kind == TokenKind.INDENT:
+                depth += 1
+            elif kind == TokenKind.DEDENT:
+                depth -= 1
+                if depth == 0:
+                    return index + 1, index + 1
+            elif kind == TokenKind.NEWLINE and depth == 0:
+                return index, index + 1
+
+            index += 1
+
+    def split_statements(self):
+        """
+        Returns the (start, end) token ranges of the top-level statements that follow the cursor.
+        Empty ranges (blank lines) are skipped.
+        """
+        ranges = []
+        start = self.cursor + 1
+
+        while True:
+            bounds = self.scan_statement(start)
+
+            if bounds is None:
+                return ranges
+
+            end, next_start = bounds
+
+            if end > start:
+                ranges.append((start, end))
+
+            start = next_start
+
+    def iter_statements(self):
+        """
+        Yields each top-level statement as soon as it is parsed.
+
+        Each statement is parsed with its own memo table, which is dropped before the next
+        statement starts. If the parser was created with `lazy=True`, tokens are lexed one
+        statement at a time as well. The tokens themselves are kept since the yielded ASTs
+        reference them by index.
+        """
+        memo = self.cache.get(self.cursor)
+
+        if memo is not None and "parse_program" in memo:
+            yield from memo["parse_program"][0].statements
+            return
+
+        start = self.cursor + 1
+
+        while True:
+            bounds = self.scan_statement(start)
+
+            if bounds is None:
+                return
+
+            end, next_start = bounds
+
+            if end > start:
+                result = parse_statement_range(self.tokens, start, end)
+
+                if type(result) == tuple:
+                    raise ParserError(*result)
+
+                self.cursor = end - 1
+                yield result
+
+            start = next_start
+
+    def expect(self, index, expected):
+        """
+        Records that `expected` (a TokenKind, a token string or an expectation description) was
+        expected at token `index`. Only the expectations at the farthest index are kept.
+        """
+        if index > self.farthest:
+            self.farthest = index
+            self.expected = {expected: None}
+        elif index == self.farthest:
+            self.expected[expected] = None
+
+    def unexpected_token_error(self, index, expected=()):
+        """
+        Creates a ParserError for the token at `index`, listing what was `expected` there.
+        """
+        if index < self.tokens_length:
+            token = self.tokens[index]
+            found = repr(token.data) if token.data else token.kind.name
+            message = f"Unexpected token {found}"
+            row, column = token.row, token.column
+        else:
+            message = "Unexpected end of code"
+            row, column = self.get_line_info()
+
+            if self.tokens_length:
+                token = self.tokens[self.tokens_length - 1]
+                row, column = token.row, token.column
+
+        if expected:
+            names = [
+                item.name
+                if isinstance(item, TokenKind)
+                else item
+                if item in EXPECTATION_DESCRIPTIONS
+                else repr(item)
+                for item in expected
+            ]
+            if len(names) > 1:
+                names[-2:] = [f"{names[-2]} or {names[-1]}"]
+            message += f", expected {', '.join(names)}"
+
+        return ParserError(message, row, column)
+
+    def farthest_error(self):
+        """
+        Creates a ParserError for the farthest point the parser got to.
+
+        Failing rules record what they expected as they go, so this needs no extra pass.
+        """
+        index = self.cursor + 1
+
+        if self.farthest >= index:
+            return self.unexpected_token_error(self.farthest, self.expected)
+
+        return self.unexpected_token_error(index)
+
     def eat_token(self):
         """
         Returns the next token and its index then advances the cursor position
@@ -99,15 +368,20 @@ class Parser:
         """
         Consumes and checks if next token holds the same date as `string`.
         """
-        if self.cursor + 1 < self.tokens_length:
-            token = self.tokens[self.cursor + 1]
+        index = self.cursor + 1
+
+        if index < self.tokens_length:
+            token = self.tokens[index]
 
             if token.data == string:
-                self.cursor += 1
+                self.cursor = index
                 self.column = token.column
                 self.row = token.row
 
-                return self.cursor
+                return index
+
+        if index >= self.farthest:
+            self.expect(index, string)
 
         return None
 
@@ -139,7 +413,7 @@ class Parser:
         It also reuses cache if available before running the parser.
         """
 
-        def wrapper(self, *args):
+        def wrapper(self, *args, **kwargs):
             # Get info about parser function.
             cursor = self.cursor
             parser_name = parser.__name__
@@ -156,7 +430,7 @@ class Parser:
                     pass
 
             # Otherwise go ahead and parse, then cache result
-            parser_result = parser(self, *args)
+            parser_result = parser(self, *args, **kwargs)
             skip = self.cursor
 
             if not cursor_key:
@@ -175,13 +449,58 @@ class Parser:
         """
         Checks and consumes the next token if it is of the TokenKinds passed to the function
         """
+        index = self.cursor + 1
         payload = self.eat_token()
 
         if payload and payload[1].kind in args:
             return result_type(payload[0])
 
+        if index >= self.farthest:
+            for kind in args:
+                self.expect(index, kind)
+
         return None
 
+    @memoize
+    def parse_program(self, workers=1):
+        """
+        rule = (newline | statement)+
+
+        Top-level statements don't share parser state, so each one is parsed by its own parser
+        with an independent memo table. With `workers` > 1, the statements are parsed
+        concurrently in a process pool and the results are put back in source order.
+        """
+        ranges = self.split_statements()
+
+        if workers > 1 and len(ranges) > 1:
+            with ProcessPoolExecutor(
+                max_workers=workers,
+                initializer=_set_worker_tokens,
+                initargs=(self.tokens,),
+            ) as executor:
+                chunksize = max(1, len(ranges) // (workers * 4))
+                results = list(
+                    executor.map(_parse_worker_statement, ranges, chunksize=chunksize)
+                )
+        else:
+            results = [parse_statement_range(self.tokens, *r) for r in ranges]
+
+        statements = []
+        for result in results:
+            # Errors are returned as `ParserError` arguments since the exception itself can't
+            # be unpickled. The first one in source order is raised, as in a sequential parse.
+            if type(result) == tuple:
+                raise ParserError(*result)
+            statements.append(result)
+
+        self.cursor = self.tokens_length - 1
+        program = Program(statements)
+
+        if self.parse_cache is not None:
+            self.parse_cache.store(self.code, self.tokens, program)
+
+        return program
+
     @backtrackable
     @memoize
     def parse_newline(self):
@@ -276,101 +595,195 @@ class Parser:
         """
         return self.consume(TokenKind.PREFIXED_STRING, result_type=PrefixedString)
 
-    @backtrackable
-    @memoize
-    def parse_power_expr(self):
-        """
-        rule = '√'? atom_expr ('^' unary_expr | '²')? [right associative]
+    def parse_operator_expr(self, level, has_binary_operators=True):
         """
+        Parses an operator expression rule. `level` is the binding level of the rule (one of
+        `OR_TEST` to `POWER_EXPR`) and `has_binary_operators` is False for the unary_expr and
+        power_expr rules.
 
-        root = self.consume_string("√")
-        result = self.parse_integer()  # TODO
+        NOTE:
+            The operator expression rules don't call one another. Instead, every rule waiting on
+            an operand is a frame on an explicit stack, so nesting depth is limited by memory
+            rather than the recursion limit.
+
+            Frames are:
+            - (_EXPR, level, start): waiting for the first operand of a rule at `level`.
+            - (_RHS, level, lhs, op, start): waiting for the right operand of `op`.
+            - (_PREFIX, op, start): waiting for the operand of a prefix operator.
+            - (_POWER, atom, op, start): waiting for the exponent of `atom`.
+            - (_GROUP, start): waiting for the expression in parentheses.
+
+            As with the PEG rules, an operator whose operand fails is given back and ends the
+            repetition it is in, and a rule whose operand fails reverts to `start`.
+        """
+        tokens = self.tokens
+        length = self.tokens_length
+        cursor = self.cursor
+        stack = []
+        result = None
+        mode = _OPERAND
 
-        if result is None:
-            return None
+        if has_binary_operators:
+            stack.append((_EXPR, level, cursor))
 
-        power = self.consume_string("^")
-        integer2 = self.parse_integer()  # TODO
+        while True:
+            if mode == _OPERAND:
+                # Prefix operators, then an atom. `level` is the loosest rule the operand may be.
+                if cursor + 1 >= length:
+                    self.expect(cursor + 1, EXPECTED_EXPRESSION)
+                    result = None
+                    mode = _DELIVER
+                    continue
+
+                token = tokens[cursor + 1]
+                data = token.data
+
+                if data == "not" and level <= NOT_TEST:
+                    stack.append((_PREFIX, Operator(cursor + 1), cursor))
+                    cursor += 1
+                    level = NOT_TEST
+                    stack.append((_EXPR, level, cursor))
+                elif data in UNARY_OPERATORS and level <= UNARY_EXPR:
+                    stack.append((_PREFIX, Operator(cursor + 1), cursor))
+                    cursor += 1
+                    level = UNARY_EXPR
+                elif data == "√" and level <= POWER_EXPR:
+                    stack.append((_PREFIX, Operator(cursor + 1), cursor))
+                    cursor += 1
+                    level = ATOM
+                elif token.kind in INTEGER_KINDS:  # TODO: atom_expr
+                    cursor += 1
+                    result = Integer(cursor)
+                    mode = _POWER_TAIL
+                elif data == "(":
+                    stack.append((_GROUP, cursor))
+                    cursor += 1
+                    level = OR_TEST
+                    stack.append((_EXPR, level, cursor))
+                else:
+                    self.expect(cursor + 1, EXPECTED_EXPRESSION)
+                    result = None
+                    mode = _DELIVER
+
+            elif mode == _POWER_TAIL:
+                # `result` is an atom: ('^' unary_expr | '²')?
+                data = tokens[cursor + 1].data if cursor + 1 < length else None
+
+                if data == "^":
+                    stack.append((_POWER, result, Operator(cursor + 1), cursor))
+                    cursor += 1
+                    level = UNARY_EXPR
+                    mode = _OPERAND
+                else:
+                    if data == "²":
+                        cursor += 1
+                        result = UnaryExpr(result, Operator(cursor))
+                    mode = _DELIVER
+
+            elif mode == _BINARY_LOOP:
+                # `result` is the left operand of the next operator that binds at `level` or
+                # tighter.
+                operator_level = None
+
+                if cursor + 1 < length:
+                    data = tokens[cursor + 1].data
+                    second_data = SECOND_OPERATOR_TOKENS.get(data)
+
+                    if (
+                        second_data is not None
+                        and cursor + 2 < length
+                        and tokens[cursor + 2].data == second_data
+                    ):
+                        operator_level = COMPARISON_EXPR
+                        width = 2
+                    else:
+                        operator_level = BINARY_OPERATOR_LEVELS.get(data)
+                        width = 1
+
+                if operator_level is None:
+                    if cursor + 1 >= self.farthest:
+                        self.expect(cursor + 1, EXPECTED_OPERATOR)
+                    mode = _DELIVER
+                elif operator_level < level:
+                    mode = _DELIVER
+                else:
+                    op = Operator(cursor + 1, cursor + 2 if width == 2 else None)
+                    stack.append((_RHS, level, result, op, cursor))
+                    cursor += width
+                    level = operator_level + 1
+                    stack.append((_EXPR, level, cursor))
+                    mode = _OPERAND
 
-        if power is not None or integer2 is not None:
-            result = BinaryExpr(result, Operator(power), integer2)
-        else:
-            square = self.consume_string("²")
-            if square is not None:
-                result = UnaryExpr(result, Operator(square))
+            else:
+                # Hand `result` to the frame waiting for it. None means the operand failed.
+                if not stack:
+                    break
+
+                frame = stack.pop()
+                tag = frame[0]
 
-        if root is not None:
-            result = UnaryExpr(result, Operator(root))
+                if tag == _EXPR:
+                    if result is None:
+                        cursor = frame[2]
+                    else:
+                        level = frame[1]
+                        mode = _BINARY_LOOP
+                elif tag == _RHS:
+                    _, level, lhs, op, start = frame
+                    if result is None:
+                        cursor = start
+                        result = lhs
+                    else:
+                        result = BinaryExpr(lhs, op, result)
+                        mode = _BINARY_LOOP
+                elif tag == _PREFIX:
+                    if result is None:
+                        cursor = frame[2]
+                    else:
+                        result = UnaryExpr(result, frame[1])
+                elif tag == _POWER:
+                    _, atom, op, start = frame
+                    if result is None:
+                        cursor = start
+                        result = atom
+                    else:
+                        result = BinaryExpr(atom, op, result)
+                else:  # _GROUP
+                    if (
+                        result is not None
+                        and cursor + 1 < length
+                        and tokens[cursor + 1].data == ")"
+                    ):
+                        cursor += 1
+                        mode = _POWER_TAIL
+                    else:
+                        if result is not None:
+                            self.expect(cursor + 1, ")")
+                        cursor = frame[1]
+                        result = None
 
-        print(f"\n>>>> {result}")
+        if cursor != self.cursor:
+            self.cursor = cursor
+            self.row = tokens[cursor].row
+            self.column = tokens[cursor].column
 
         return result
 
     @backtrackable
     @memoize
-    def parse_unary_expr(self):
+    def parse_power_expr(self):
         """
-        rule = ('+' | '-' | '~')* power_expr [right associative]
+        rule = '√'? atom_expr ('^' unary_expr | '²')? [right associative]
         """
-        unary_ops = []
-        while True:
-            unary_op = self.consume_string("+")
-            if unary_op is None:
-                unary_op = self.consume_string("-")
-                if unary_op is None:
-                    unary_op = self.consume_string("~")
-                    if unary_op is None:
-                        break
-            unary_ops.append(Operator(unary_op))
-
-        result = self.parse_power_expr()
-
-        if result is None:
-            return None
+        return self.parse_operator_expr(POWER_EXPR, has_binary_operators=False)
 
-        for unary_op in reversed(unary_ops):
-            result = UnaryExpr(result, unary_op)
-
-        print(f"\n>>>> {result}")
-
-        return result
-
-    def parse_binary_expr(self, operand_parser, operators):
+    @backtrackable
+    @memoize
+    def parse_unary_expr(self):
         """
-        Helper function for parsing left-associative binary expressions.
-        NOTE:
-            Not bactrackable because it is called once by backtrackable functions
+        rule = ('+' | '-' | '~')* power_expr [right associative]
         """
-        result = operand_parser()
-
-        while True:
-            operator = None
-            second_token = None
-
-            for i in operators:
-                if type(i) == tuple:
-                    operator = self.consume_string(i[0])
-                    second_token = self.consume_string(i[1])
-                    if operator is None or second_token is None:
-                        break
-                else:
-                    operator = self.consume_string(i)
-                    if operator is not None:
-                        break
-
-            if operator is None:
-                break
-
-            rhs = operand_parser()
-
-            if rhs is None:
-                break
-
-            result = BinaryExpr(result, Operator(operator, second_token), rhs)
-
-        print(f"\n>>>> {result}")
-
-        return result
+        return self.parse_operator_expr(UNARY_EXPR, has_binary_operators=False)
 
     @backtrackable
     @memoize
@@ -378,8 +791,7 @@ class Parser:
         """
         rule = unary_expr (('*' | '@' | '/' | '%' | '//') unary_expr)* [left associative]
         """
-
-        return self.parse_binary_expr(self.parse_unary_expr, ["*", "@", "/", "%", "//"])
+        return self.parse_operator_expr(MUL_EXPR)
 
     @backtrackable
     @memoize
@@ -387,8 +799,7 @@ class Parser:
         """
         rule = mul_expr (('+' | '-') mul_expr)* [left associative]
         """
-
-        return self.parse_binary_expr(self.parse_mul_expr, ["+", "-"])
+        return self.parse_operator_expr(SUM_EXPR)
 
     @backtrackable
     @memoize
@@ -396,8 +807,7 @@ class Parser:
         """
         rule = sum_expr (('<<' | '>>') sum_expr)* [left associative]
         """
-
-        return self.parse_binary_expr(self.parse_sum_expr, ["<<", ">>"])
+        return self.parse_operator_expr(SHIFT_EXPR)
 
     @backtrackable
     @memoize
@@ -405,8 +815,7 @@ class Parser:
         """
         rule = shift_expr ('&' shift_expr)* [left associative]
         """
-
-        return self.parse_binary_expr(self.parse_shift_expr, ["&"])
+        return self.parse_operator_expr(AND_EXPR)
 
     @backtrackable
     @memoize
@@ -414,8 +823,7 @@ class Parser:
         """
         rule = and_expr ('||' and_expr)* [left associative]
         """
-
-        return self.parse_binary_expr(self.parse_and_expr, ["||"])
+        return self.parse_operator_expr(XOR_EXPR)
 
     @backtrackable
     @memoize
@@ -423,8 +831,7 @@ class Parser:
         """
         rule = xor_expr ('|' xor_expr)* [left associative]
         """
-
-        return self.parse_binary_expr(self.parse_xor_expr, ["|"])
+        return self.parse_operator_expr(OR_EXPR)
 
     @backtrackable
     @memoize
@@ -435,42 +842,15 @@ class Parser:
 
         rule = or_expr (comparison_op or_expr)* [left associative]
         """
-
-        return self.parse_binary_expr(
-            self.parse_or_expr,
-            [
-                "<",
-                ">",
-                "==",
-                ">=",
-                "<=",
-                "!=",
-                "in",
-                ("not", "in"),
-                "is",
-                ("is", "not"),
-            ],
-        )
+        return self.parse_operator_expr(COMPARISON_EXPR)
 
     @backtrackable
     @memoize
     def parse_not_test(self):
         """
-        rule = 'not'* comparison_expr [left associative]
+        rule = 'not'* comparison_expr [right associative]
         """
-
-        result = self.parse_comparison_expr()
-
-        while True:
-            not_op = self.consume_string("not")
-            if not_op is None:
-                break
-
-            result = UnaryExpr(result, Operator(not_op))
-
-        print(f"\n>>>> {result}")
-
-        return result
+        return self.parse_operator_expr(NOT_TEST)
 
     @backtrackable
     @memoize
@@ -478,8 +858,7 @@ class Parser:
         """
         rule = not_test ('and' not_test)* [left associative]
         """
-
-        return self.parse_binary_expr(self.parse_not_test, ["and"])
+        return self.parse_operator_expr(AND_TEST)
 
     @backtrackable
     @memoize
@@ -487,8 +866,7 @@ class Parser:
         """
         rule = and_test ('or' and_test)* [left associative]
         """
-
-        return self.parse_binary_expr(self.parse_and_expr, ["or"])
+        return self.parse_operator_expr(OR_TEST)
 
     @backtrackable
     @memoize
@@ -499,20 +877,19 @@ class Parser:
 
         result = self.parse_or_test()
 
+        if result is None:
+            return None
+
+        cursor = self.cursor
         if_ = self.consume_string("if")
-        or_test = self.parse_or_test()  # TODO
-        else_ = self.consume_string("else")
-        or_test2 = self.parse_or_test()  # TODO
+        or_test = self.parse_or_test() if if_ is not None else None  # TODO
+        else_ = self.consume_string("else") if or_test is not None else None
+        or_test2 = self.parse_or_test() if else_ is not None else None  # TODO
 
-        if (
-            (if_ is not None)
-            and (or_test is not None)
-            and (else_ is not None)
-            and (or_test2 is not None)
-        ):
+        if or_test2 is not None:
             result = IfExpr(result, or_test, or_test2)
-
-        print(f"\n>>>> {result}")
+        else:
+            self.cursor = cursor
 
         return result
 
@@ -528,7 +905,7 @@ class Parser:
         if identifier is None:
             return None
 
-        result = FuncParam(identifier)
+        result = FuncParam(identifier, None, None, None)
 
         assignment_op = self.consume_string("=")
         test = self.parse_test()  # TODO
@@ -552,15 +929,15 @@ class Parser:
 
         # FIRST ALTERNATIVE
         open_brackets = self.consume_string("(")
-        func_params = self.parse_lambda_params()  # TODO
-        close_brackets = self.consume_string(")")
 
-        if (
-            (open_brackets is not None)
-            and (func_params is not None)
-            and (close_brackets is not None)
-        ):
-            return func_params
+        if open_brackets is not None:
+            func_params = self.parse_lambda_params()  # TODO
+            close_brackets = self.consume_string(")")
+
+            if func_params is not None and close_brackets is not None:
+                return func_params
+
+            self.cursor = open_brackets - 1
 
         # SECOND ALTERNATIVE
         param = self.parse_lambda_param()
@@ -653,11 +1030,19 @@ class Parser:
         result = None
 
         lambda_token = self.consume_string("lambda")
+
+        if lambda_token is None:
+            return None
+
         lambda_params = self.parse_lambda_params()
         colon = self.consume_string(":")
+
+        if colon is None:
+            return None
+
         test = self.parse_test()  # TODO
 
-        if lambda_token is not None and colon is not None and test is not None:
+        if test is not None:
             result = FuncExpr(None, lambda_params, [test])
 
         return result
@@ -985,6 +1370,18 @@ class Parser:
 
         return None
 
+    @backtrackable
+    @memoize
+    def parse_statement(self):
+        """
+        rule =
+            | simple_statement
+            | compound_statement
+
+        TODO: Only expression statements are supported until the statement rules are in place.
+        """
+        return self.parse_expr()
+
     @backtrackable
     @memoize
     def yield_argument():
@@ -995,3 +1392,34 @@ class Parser:
         """
 
         pass
+
+
+def parse_statement_range(tokens, start, end):
+    """
+    Parses the top-level statement in the `tokens[start:end]` range with a fresh parser.
+
+    Returns the statement or, if it fails, the arguments of the `ParserError` to raise.
+    """
+    parser = Parser(tokens, start, end)
+    statement = parser.parse_statement()
+
+    if statement is None or parser.cursor != end - 1:
+        error = parser.farthest_error()
+        return (error.message, error.row, error.column)
+
+    return statement
+
+
+_worker_tokens = None
+
+
+def _set_worker_tokens(tokens):
+    """
+    Process pool initializer. Sends the token stream to each worker once instead of per task.
+    """
+    global _worker_tokens
+    _worker_tokens = tokens
+
+
+def _parse_worker_statement(statement_range):
+    return parse_statement_range(_worker_tokens, *statement_range)
@@ -0,0 +1,529 @@
+"""
+A compact binary format for a module's tokens and AST.
+
+Layout (little-endian):
+    magic (4 bytes) | format version (u16) | tokens offset (u32) | literals offset (u32)
+    | nodes offset (u32) | end offset (u32)
+    | string table | token table | literal table | nodes
+
+All counts and values below are varints (LEB128). Signed values are zigzag-encoded first.
+- String table: count, then for each string its UTF-8 length and bytes. Strings are referred to
+  by their position in the table.
+- Token table: count, then for each token its kind, data string, row and column (signed).
+- Literal table: for each literal class with decoded values, its kind and count, then for each
+  literal its token index and value. Integers are signed varints, floats are 8-byte doubles,
+  strings are string table positions and byte strings are a length and bytes. A zero ends the
+  table.
+- Nodes, in preorder starting with the root. Each node is its kind (signed, see `arena.py` for
+  NONE_KIND and LIST_KIND) and the byte size of the rest of the node, followed by:
+  - AST nodes: the token index and payload (plus one, zero standing for None) if the class has
+    a `token_field` or `payload_field`, then its `fields` in order.
+  - List nodes: the item count, then the items.
+
+The size lets a reader step over a subtree without decoding it, so `ASTReader` can memory-map
+a file and only materialize the subtrees it is asked for.
+"""
+
+import mmap
+import struct
+from .arena import NONE_KIND, LIST_KIND, get_ast_class
+from .ast import (
+    AST,
+    Integer,
+    Float,
+    ImagInteger,
+    ImagFloat,
+    ByteString,
+)
+from .literals import LiteralTable
+from ..lexer.lexer import Token, TokenKind
+
+FORMAT_VERSION = 1
+MAGIC = b"VIPA"
+HEADER = struct.Struct("<4sHIIII")
+DOUBLE = struct.Struct("<d")
+
+FLOAT_KINDS = frozenset((Float.kind, ImagFloat.kind))
+INTEGER_KINDS = frozenset((Integer.kind, ImagInteger.kind))
+
+
+class SerializationError(Exception):
+    """ Represents the error raised when reading invalid serialized data """
+
+    def __init__(self, message):
+        super().__init__(message)
+        self.message = message
+
+    def __repr__(self):
+        return f'SerializationError(message="{self.message}")'
+
+
+def write_varint(buffer, value):
+    """
+    Appends unsigned integer `value` to `buffer` as a varint.
+    """
+    while value > 0x7F:
+        buffer.append((value & 0x7F) | 0x80)
+        value >>= 7
+
+    buffer.append(value)
+
+
+def read_varint(data, offset):
+    """
+    Returns the unsigned varint at `offset` of `data` and the offset that follows it.
+    """
+    result = 0
+    shift = 0
+
+    while True:
+        byte = data[offset]
+        offset += 1
+        result |= (byte & 0x7F) << shift
+
+        if byte < 0x80:
+            return result, offset
+
+        shift += 7
+
+
+def zigzag(value):
+    return value * 2 if value >= 0 else -value * 2 - 1
+
+
+def unzigzag(value):
+    return value >> 1 if not value & 1 else -(value >> 1) - 1
+
+
+def get_varint_size(value):
+    size = 1
+
+    while value > 0x7F:
+        value >>= 7
+        size += 1
+
+    return size
+
+
+class StringTable:
+    """
+    Assigns consecutive positions to distinct strings.
+    """
+
+    def __init__(self):
+        self.positions = {}
+
+    def get_position(self, string):
+        position = self.positions.get(string)
+
+        if position is None:
+            position = self.positions[string] = len(self.positions)
+
+        return position
+
+    def write(self, buffer):
+        write_varint(buffer, len(self.positions))
+
+        for string in self.positions:
+            encoded = string.encode("utf-8", "surrogatepass")
+            write_varint(buffer, len(encoded))
+            buffer += encoded
+
+
+def get_node_header(value):
+    """
+    Returns the (kind, token, payload, children) of a value held in a child slot.
+    """
+    if value is None:
+        return NONE_KIND, None, None, ()
+    elif isinstance(value, list):
+        return LIST_KIND, None, None, value
+    elif not isinstance(value, AST):
+        raise SerializationError(f"Can't serialize value {value!r} in the AST")
+
+    token = payload = None
+
+    if value.token_field is not None:
+        token = getattr(value, value.token_field)
+        token = 0 if token is None else token + 1
+
+    if value.payload_field is not None:
+        payload = getattr(value, value.payload_field)
+        payload = 0 if payload is None else int(payload) + 1
+
+    return value.kind, token, payload, [getattr(value, field) for field in value.fields]
+
+
+def serialize(tokens, root, literals=None):
+    """
+    Returns the binary encoding of `tokens`, the tree at `root` and the decoded `literals`, a
+    `LiteralTable` of the tree if given.
+    """
+    strings = StringTable()
+
+    # TOKENS
+    token_buffer = bytearray()
+    write_varint(token_buffer, len(tokens))
+
+    for token in tokens:
+        write_varint(token_buffer, token.kind.value)
+        write_varint(token_buffer, strings.get_position(token.data))
+        write_varint(token_buffer, zigzag(token.row))
+        write_varint(token_buffer, zigzag(token.column))
+
+    # LITERALS
+    literal_buffer = bytearray()
+
+    if literals is not None:
+        for kind, indices in literals.indices.items():
+            if not indices:
+                continue
+
+            values = literals.get_values(kind)
+            write_varint(literal_buffer, kind)
+            write_varint(literal_buffer, len(indices))
+
+            for slot, index in enumerate(indices):
+                value = values[slot]
+                if kind == Integer.kind:
+                    value = literals.big_integers.get(slot, value)
+
+                write_varint(literal_buffer, index)
+
+                if kind in INTEGER_KINDS:
+                    write_varint(literal_buffer, zigzag(value))
+                elif kind in FLOAT_KINDS:
+                    literal_buffer += DOUBLE.pack(value)
+                elif kind == ByteString.kind:
+                    write_varint(literal_buffer, len(value))
+                    literal_buffer += value
+                else:
+                    write_varint(literal_buffer, strings.get_position(value))
+
+    write_varint(literal_buffer, 0)
+
+    # NODES
+    # Sizes are computed bottom-up first, so nodes can then be written in preorder.
+    headers = {}
+    body_sizes = {}
+    sizes = {}
+    stack = [(root, False)]
+
+    while stack:
+        value, is_ready = stack.pop()
+
+        if not is_ready:
+            header = headers[id(value)] = get_node_header(value)
+            stack.append((value, True))
+            stack.extend((child, False) for child in header[3])
+            continue
+
+        kind, token, payload, children = headers[id(value)]
+        body_size = sum(sizes[id(child)] for child in children)
+
+        if kind == LIST_KIND:
+            body_size += get_varint_size(len(children))
+        if token is not None:
+            body_size += get_varint_size(token)
+        if payload is not None:
+            body_size += get_varint_size(payload)
+
+        body_sizes[id(value)] = body_size
+        sizes[id(value)] = (
+            get_varint_size(zigzag(kind)) + get_varint_size(body_size) + body_size
+        )
+
+    node_buffer = bytearray()
+    stack = [root]
+
+    while stack:
+        value = stack.pop()
+        kind, token, payload, children = headers[id(value)]
+
+        write_varint(node_buffer, zigzag(kind))
+        write_varint(node_buffer, body_sizes[id(value)])
+
+        if kind == LIST_KIND:
+            write_varint(node_buffer, len(children))
+        if token is not None:
+            write_varint(node_buffer, token)
+        if payload is not None:
+            write_varint(node_buffer, payload)
+
+        stack.extend(reversed(children))
+
+    # The string table is written last since tokens and literals add to it.
+    string_buffer = bytearray()
+    strings.write(string_buffer)
+
+    tokens_offset = HEADER.size + len(string_buffer)
+    literals_offset = tokens_offset + len(token_buffer)
+    nodes_offset = literals_offset + len(literal_buffer)
+    end_offset = nodes_offset + len(node_buffer)
+
+    return b"".join(
+        (
+            HEADER.pack(
+                MAGIC, FORMAT_VERSION, tokens_offset, literals_offset, nodes_offset, end_offset
+            ),
+            string_buffer,
+            token_buffer,
+            literal_buffer,
+            node_buffer,
+        )
+    )
+
+
+class LazySubtree:
+    """
+    A subtree of an `ASTReader` that isn't materialized yet.
+    """
+
+    __slots__ = ("reader", "offset")
+
+    def __init__(self, reader, offset):
+        self.reader = reader
+        self.offset = offset
+
+    def __repr__(self):
+        return f"{type(self).__name__}(offset={self.offset})"
+
+    def load(self):
+        return self.reader.load(self.offset)
+
+
+class ASTReader:
+    """
+    Reads data produced by `serialize`.
+
+    Tables are decoded the first time they are asked for, and nodes are only decoded when a
+    subtree containing them is loaded.
+    """
+
+    def __init__(self, data):
+        if len(data) < HEADER.size:
+            raise SerializationError("Data is too short for a header")
+
+        magic, version, *offsets = HEADER.unpack_from(data)
+
+        if magic != MAGIC:
+            raise SerializationError("Data doesn't start with the AST magic bytes")
+        elif version != FORMAT_VERSION:
+            raise SerializationError(f"Unsupported format version {version}")
+        elif offsets[3] > len(data):
+            raise SerializationError("Data is truncated")
+
+        self.data = data
+        self.tokens_offset, self.literals_offset, self.nodes_offset, self.end_offset = offsets
+        self.file = None
+        self.strings = None
+        self.tokens = None
+        self.literals = None
+
+    def __repr__(self):
+        return f"{type(self).__name__}(length={self.end_offset})"
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+    @staticmethod
+    def open(path):
+        """
+        Memory-maps the file at `path` and returns a reader over it.
+        """
+        file = open(path, "rb")
+
+        try:
+            data = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+            reader = ASTReader(data)
+        except (ValueError, SerializationError):
+            file.close()
+            raise
+
+        reader.file = file
+        return reader
+
+    def close(self):
+        if self.file is not None:
+            self.data.close()
+            self.file.close()
+            self.file = None
+
+    def get_strings(self):
+        if self.strings is None:
+            data = self.data
+            count, offset = read_varint(data, HEADER.size)
+            strings = []
+
+            for _ in range(count):
+                length, offset = read_varint(data, offset)
+                strings.append(
+                    bytes(data[offset : offset + length]).decode("utf-8", "surrogatepass")
+                )
+                offset += length
+
+            self.strings = strings
+
+        return self.strings
+
+    def get_tokens(self):
+        if self.tokens is None:
+            data = self.data
+            strings = self.get_strings()
+            count, offset = read_varint(data, self.tokens_offset)
+            tokens = []
+
+            for _ in range(count):
+                kind, offset = read_varint(data, offset)
+                string, offset = read_varint(data, offset)
+                row, offset = read_varint(data, offset)
+                column, offset = read_varint(data, offset)
+                tokens.append(
+                    Token(strings[string], TokenKind(kind), unzigzag(row), unzigzag(column))
+                )
+
+            self.tokens = tokens
+
+        return self.tokens
+
+    def get_literals(self):
+        """
+        Returns the stored `LiteralTable`, which is empty if none was serialized.
+        """
+        if self.literals is None:
+            data = self.data
+            strings = self.get_strings()
+            literals = LiteralTable(self.get_tokens())
+            kind, offset = read_varint(data, self.literals_offset)
+
+            while kind:
+                count, offset = read_varint(data, offset)
+                indices = []
+                values = []
+
+                for _ in range(count):
+                    index, offset = read_varint(data, offset)
+                    indices.append(index)
+
+                    if kind in INTEGER_KINDS:
+                        value, offset = read_varint(data, offset)
+                        values.append(unzigzag(value))
+                    elif kind in FLOAT_KINDS:
+                        values.append(DOUBLE.unpack_from(data, offset)[0])
+                        offset += DOUBLE.size
+                    elif kind == ByteString.kind:
+                        length, offset = read_varint(data, offset)
+                        values.append(bytes(data[offset : offset + length]))
+                        offset += length
+                    else:
+                        value, offset = read_varint(data, offset)
+                        values.append(strings[value])
+
+                literals.extend(kind, indices, values)
+                kind, offset = read_varint(data, offset)
+
+            self.literals = literals
+
+        return self.literals
+
+    def read_node(self, offset):
+        """
+        Returns the (kind, token, payload, children offset, end offset) of the node at `offset`.
+        List nodes return their item count as `payload`.
+        """
+        data = self.data
+        kind, offset = read_varint(data, offset)
+        kind = unzigzag(kind)
+        size, offset = read_varint(data, offset)
+        end = offset + size
+        token = payload = None
+
+        if kind == LIST_KIND:
+            payload, offset = read_varint(data, offset)
+        elif kind != NONE_KIND:
+            cls = get_ast_class(kind)
+            if cls.token_field is not None:
+                token, offset = read_varint(data, offset)
+                token = None if token == 0 else token - 1
+            if cls.payload_field is not None:
+                payload, offset = read_varint(data, offset)
+                payload = None if payload == 0 else payload - 1
+
+        return kind, token, payload, offset, end
+
+    def get_kind(self, offset=None):
+        kind, _ = read_varint(self.data, self.nodes_offset if offset is None else offset)
+        return unzigzag(kind)
+
+    def get_children(self, offset=None):
+        """
+        Returns the offsets of the children of the node at `offset`, skipping over their subtrees.
+        """
+        data = self.data
+        _, _, _, child, end = self.read_node(self.nodes_offset if offset is None else offset)
+        children = []
+
+        while child < end:
+            children.append(child)
+            _, child = read_varint(data, child)
+            size, child = read_varint(data, child)
+            child += size
+
+        return children
+
+    def load(self, offset=None, lazy_fields=()):
+        """
+        Materializes the subtree at `offset` (the root by default) as AST objects.
+
+        Children held in one of `lazy_fields` (e.g. `("body",)`) are left as `LazySubtree`
+        objects to be loaded on demand.
+        """
+        offset = self.nodes_offset if offset is None else offset
+        results = {}
+        stack = [(offset, False)]
+
+        while stack:
+            node, is_ready = stack.pop()
+
+            if not is_ready:
+                stack.append((node, True))
+                kind = self.get_kind(node)
+
+                if kind == NONE_KIND:
+                    continue
+
+                cls = None if kind == LIST_KIND else get_ast_class(kind)
+
+                for position, child in enumerate(self.get_children(node)):
+                    if cls is not None and cls.fields[position] in lazy_fields:
+                        results[child] = LazySubtree(self, child)
+                    else:
+                        stack.append((child, False))
+                continue
+
+            kind, token, payload, _, _ = self.read_node(node)
+
+            if kind == NONE_KIND:
+                result = None
+            elif kind == LIST_KIND:
+                result = [results.pop(child) for child in self.get_children(node)]
+            else:
+                cls = get_ast_class(kind)
+                result = cls.__new__(cls)
+                attributes = vars(result)
+
+                for field, child in zip(cls.fields, self.get_children(node)):
+                    attributes[field] = results.pop(child)
+
+                if cls.token_field is not None:
+                    attributes[cls.token_field] = token
+
+                if cls.payload_field is not None:
+                    attributes[cls.payload_field] = payload
+
+            results[node] = result
+
+        return results[offset]
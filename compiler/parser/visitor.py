@@ -0,0 +1,276 @@
+"""
+Traversal of Viper's AST.
+
+Handlers are methods named after the snake_case name of an AST class (`visit_binary_expr`,
+`leave_func_expr`, `transform_integer`, ...). Instead of looking handlers up by name on every
+node, each Visitor and Transformer subclass gets a dispatch table indexed by the AST class `kind`
+when it is defined. Children are read from the class `fields`, and trees are walked with an
+explicit stack, so deep trees don't hit Python's recursion limit.
+
+NOTE:
+    Hash-consed nodes share the `kind` of their AST class, so they are dispatched the same way.
+    They are immutable and shared though, so a Transformer replaces a hash-consed node whose
+    children changed with a plain copy instead of modifying it.
+"""
+
+import re
+from .arena import get_ast_classes
+from .hashcons import is_consed
+
+# Returned by a `visit_*` handler to not descend into the node's children.
+SKIP = object()
+
+
+def get_handler_name(prefix, cls):
+    """
+    Returns the name of the handler of AST class `cls`, e.g. `visit_binary_expr`.
+    """
+    return prefix + re.sub(r"(?<!^)(?=[A-Z])", "_", cls.__name__).lower()
+
+
+def make_dispatch_table(cls, prefix):
+    """
+    Returns a list mapping each AST class `kind` to the `prefix` handler of `cls`, or None if
+    `cls` doesn't define one.
+    """
+    ast_classes = get_ast_classes()
+    table = [None] * (max(ast_classes) + 1)
+
+    for kind, ast_class in ast_classes.items():
+        table[kind] = getattr(cls, get_handler_name(prefix, ast_class), None)
+
+    return table
+
+
+def make_fields_table():
+    """
+    Returns a list mapping each AST class `kind` to its `fields` in reverse order, ready to be
+    pushed on a stack.
+    """
+    ast_classes = get_ast_classes()
+    table = [()] * (max(ast_classes) + 1)
+
+    for kind, ast_class in ast_classes.items():
+        table[kind] = tuple(reversed(ast_class.fields))
+
+    return table
+
+
+class Visitor:
+    """
+    Walks a tree in preorder, calling `visit_*` handlers before a node's children and `leave_*`
+    handlers after them.
+
+    Lists of nodes and None are accepted anywhere a node is.
+    """
+
+    visit_table = []
+    leave_table = []
+
+    def __init_subclass__(cls, **kwargs):
+        super().__init_subclass__(**kwargs)
+        cls.visit_table = make_dispatch_table(cls, "visit_")
+        cls.leave_table = make_dispatch_table(cls, "leave_")
+
+    def walk(self, root):
+        visit_table = self.visit_table
+        leave_table = self.leave_table
+        reversed_fields = _reversed_fields
+        stack = [root]
+        push = stack.append
+        pop = stack.pop
+
+        while stack:
+            node = pop()
+
+            if node is None:
+                continue
+
+            node_type = type(node)
+
+            if node_type is list:
+                stack.extend(reversed(node))
+                continue
+
+            # Nodes waiting for their `leave_*` handler are wrapped in a tuple.
+            if node_type is tuple:
+                node = node[0]
+                leave_table[node.kind](self, node)
+                continue
+
+            kind = node.kind
+            visit = visit_table[kind]
+
+            if visit is not None and visit(self, node) is SKIP:
+                continue
+
+            if leave_table[kind] is not None:
+                push((node,))
+
+            for field in reversed_fields[kind]:
+                push(getattr(node, field))
+
+
+class Transformer:
+    """
+    Rebuilds a tree bottom-up. A `transform_*` handler gets a node whose children have already
+    been transformed and returns the node that replaces it.
+
+    Children are replaced in place, so the input tree is modified. Hash-consed nodes are the
+    exception, as other parents share them.
+    """
+
+    transform_table = []
+
+    def __init_subclass__(cls, **kwargs):
+        super().__init_subclass__(**kwargs)
+        cls.transform_table = make_dispatch_table(cls, "transform_")
+
+    def transform(self, root):
+        transform_table = self.transform_table
+        reversed_fields = _reversed_fields
+        results = []
+        stack = [(root, False)]
+        push = stack.append
+        pop = stack.pop
+
+        # Transformed values are collected on `results` and popped off by their parent.
+        while stack:
+            node, is_ready = pop()
+            node_type = type(node)
+
+            if not is_ready:
+                if node is None:
+                    results.append(None)
+                    continue
+
+                push((node, True))
+
+                if node_type is list:
+                    for item in reversed(node):
+                        push((item, False))
+                else:
+                    for field in reversed_fields[node.kind]:
+                        push((getattr(node, field), False))
+                continue
+
+            if node_type is list:
+                count = len(node)
+                if count:
+                    node[:] = results[-count:]
+                    del results[-count:]
+                results.append(node)
+                continue
+
+            kind = node.kind
+            fields = node.fields
+
+            if fields:
+                values = results[-len(fields):]
+                del results[-len(fields):]
+                attributes = vars(node)
+
+                if not is_consed(node):
+                    for field, value in zip(fields, values):
+                        attributes[field] = value
+                elif any(value is not attributes[field] for field, value in zip(fields, values)):
+                    node = get_unconsed_copy(node)
+                    vars(node).update(zip(fields, values))
+
+            handler = transform_table[kind]
+            results.append(node if handler is None else handler(self, node))
+
+        return results[0]
+
+
+def get_unconsed_copy(node):
+    """
+    Returns a plain, mutable copy of hash-consed `node`.
+    """
+    # Consed classes directly subclass their AST class.
+    cls = type(node).__bases__[0]
+    copy = cls.__new__(cls)
+    vars(copy).update(vars(node))
+
+    return copy
+
+
+class FusedVisitor(Visitor):
+    """
+    Runs several visitors over a tree in a single walk.
+
+    Each node is dispatched to the visitors in the order they were given, and their `leave_*`
+    handlers run in reverse order. A visitor returning SKIP stops receiving the node's subtree,
+    while the other visitors keep walking it.
+    """
+
+    def __init__(self, *visitors):
+        self.visitors = visitors
+        ast_classes = get_ast_classes()
+        length = max(ast_classes) + 1
+
+        # Per-kind lists of (visitor position, visitor, handler).
+        self.fused_visit_table = [[] for _ in range(length)]
+        self.fused_leave_table = [[] for _ in range(length)]
+
+        for position, visitor in enumerate(visitors):
+            for kind in ast_classes:
+                visit = visitor.visit_table[kind]
+                leave = visitor.leave_table[kind]
+                if visit is not None:
+                    self.fused_visit_table[kind].append((position, visitor, visit))
+                if leave is not None:
+                    self.fused_leave_table[kind].insert(0, (position, visitor, leave))
+
+    def walk(self, root):
+        visit_table = self.fused_visit_table
+        leave_table = self.fused_leave_table
+        reversed_fields = _reversed_fields
+        # Visitors skipping a subtree are inactive until that subtree is left.
+        active = [True] * len(self.visitors)
+        active_count = len(self.visitors)
+        stack = [root]
+        push = stack.append
+        pop = stack.pop
+
+        while stack:
+            node = pop()
+
+            if node is None:
+                continue
+
+            node_type = type(node)
+
+            if node_type is list:
+                stack.extend(reversed(node))
+                continue
+
+            if node_type is tuple:
+                node, skipped = node
+                for position, visitor, leave in leave_table[node.kind]:
+                    if active[position]:
+                        leave(visitor, node)
+                for position in skipped:
+                    active[position] = True
+                active_count += len(skipped)
+                continue
+
+            kind = node.kind
+            skipped = []
+
+            for position, visitor, visit in visit_table[kind]:
+                if active[position] and visit(visitor, node) is SKIP:
+                    active[position] = False
+                    skipped.append(position)
+
+            active_count -= len(skipped)
+
+            if skipped or leave_table[kind]:
+                push((node, skipped))
+
+            if active_count:
+                for field in reversed_fields[kind]:
+                    push(getattr(node, field))
+
+
+_reversed_fields = make_fields_table()
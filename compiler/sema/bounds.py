@@ -0,0 +1,360 @@
+"""
+Bounds-check elimination
+
+NOTES.md lowers an index to a check for positive indices, one for negative indices and an
+out-of-bounds error, and wants positive indices to be as fast as if there were no checks. This
+module proves index expressions in bounds so codegen can drop those checks.
+
+Facts are difference constraints `x <= y + c` between symbols: `ZERO`, declarations and the
+lengths of declarations (see `get_length`). They come from:
+- loops over `range(start, stop)`, whose variable is in `[start, stop - 1]`,
+- comparisons guarding a region, such as the condition of an `if` for its branches,
+- lengths, which are never negative.
+
+Facts form a graph with an edge from `y` to `x` weighted `c` for each `x <= y + c`, so
+`x <= y + k` holds when the shortest path from `y` to `x` is at most `k`. This is the usual
+demand-driven approach: only indices that are actually checked cost a search.
+
+An index that can't be proven in bounds inside a loop, but moves with the loop variable, gets
+its check hoisted: checking the index at the first and last iterations before the loop covers
+every iteration in between. Hoisted checks never raise. They select a version of the loop: if
+they all pass, a copy of the loop without the hoisted accesses' checks runs, otherwise the loop
+runs as is, checks included. A loop that exits early or is empty may leave an index the hoisted
+checks reject unused, and this way only loses the fast version for it. See
+`get_fast_version_condition`.
+
+Only accesses made on every iteration are hoisted, since others would send loops to the checked
+version for indices they never use. These are the accesses in the loop's own region rather than
+in a region pushed inside it, so conditionally executed code must be analyzed in its own region
+even if its condition gives no facts.
+
+NOTE:
+    Facts are assumed to hold for the whole region they are pushed for, so lists must not be
+    resized and guarded variables not reassigned in it.
+
+TODO: Feed subscripts and `range` calls from the AST once the parser produces them.
+"""
+
+from .scope import UNRESOLVED
+from ..parser.ast import BinaryOpKind, Identifier, Integer, BinaryExpr
+
+ZERO = "0"
+
+# Verdicts of `BoundsAnalysis.check_index`.
+CHECKED = 0
+IN_BOUNDS = 1
+NEGATIVE_IN_BOUNDS = 2
+HOISTED = 3
+
+# The comparison equivalent to `not (lhs op rhs)` for each comparison giving facts.
+NEGATED_COMPARISONS = {
+    BinaryOpKind.LESSER_THAN: BinaryOpKind.EQUAL_GREATER_THAN,
+    BinaryOpKind.EQUAL_LESSER_THAN: BinaryOpKind.GREATER_THAN,
+    BinaryOpKind.GREATER_THAN: BinaryOpKind.EQUAL_LESSER_THAN,
+    BinaryOpKind.EQUAL_GREATER_THAN: BinaryOpKind.LESSER_THAN,
+    BinaryOpKind.NOT_EQUAL: BinaryOpKind.EQUAL,
+}
+
+
+def get_length(declaration):
+    """
+    Returns the symbol standing for the length of the list declared by `declaration`.
+    """
+    return ("len", declaration)
+
+
+def is_length(symbol):
+    return type(symbol) is tuple
+
+
+class Loop:
+    """
+    A loop over `range(start, stop)` binding `variable`. `start` and `stop` are (symbol,
+    offset) terms, `depth` is the number of regions entered when its body starts and
+    `always_runs` is True if the facts before the loop prove `start < stop`.
+    """
+
+    def __init__(self, id, variable, start, stop, depth, always_runs=False):
+        self.id = id
+        self.variable = variable
+        self.start = start
+        self.stop = stop
+        self.depth = depth
+        self.always_runs = always_runs
+
+    def __repr__(self):
+        return (
+            f"{type(self).__name__}(id={self.id}, variable={self.variable}"
+            f", start={self.start}, stop={self.stop})"
+        )
+
+
+class HoistedCheck:
+    """
+    A check codegen emits before `loop` to select its version: `low` and `high` are the terms
+    the index takes at the first and last iterations, and the unchecked version only runs if
+    both are valid indices of `sequence`.
+
+    An empty loop never accesses `sequence`, so unless `needs_guard` is False because the loop
+    always runs, the terms may be invalid even though the program is correct. Codegen can test
+    `loop.start < loop.stop` first to not evaluate them for nothing, as either version then
+    runs no iterations.
+    """
+
+    def __init__(self, loop, sequence, low, high):
+        self.loop = loop
+        self.sequence = sequence
+        self.low = low
+        self.high = high
+        self.needs_guard = not loop.always_runs
+
+    def __repr__(self):
+        return (
+            f"{type(self).__name__}(loop={self.loop.id}, sequence={self.sequence}"
+            f", low={self.low}, high={self.high}, needs_guard={self.needs_guard})"
+        )
+
+
+class BoundsAnalysis:
+    """
+    Proves index expressions in bounds from the facts of the regions enclosing them.
+
+    Regions are entered with `push` or `enter_loop` and left with `pop`, which drops the facts
+    added since. `verdicts` maps the id of each checked node to its verdict, and `hoisted_checks`
+    maps loop ids to the checks hoisted before them.
+    """
+
+    def __init__(self, scopes=None, literals=None):
+        self.scopes = scopes
+        self.literals = literals
+        # Edges from `y` to the (x, c) of every fact `x <= y + c`.
+        self.edges = {}
+        self.undo_log = []
+        self.marks = []
+        self.loops = []
+        self.loop_count = 0
+        self.verdicts = {}
+        self.hoisted_checks = {}
+
+    def __repr__(self):
+        return f"{type(self).__name__}(verdicts={len(self.verdicts)})"
+
+    def push(self):
+        self.marks.append((len(self.undo_log), len(self.loops)))
+
+    def pop(self):
+        log_length, loop_count = self.marks.pop()
+
+        while len(self.undo_log) > log_length:
+            self.edges[self.undo_log.pop()].pop()
+
+        del self.loops[loop_count:]
+
+    def add_fact(self, lhs, rhs, offset=0):
+        """
+        Records that `lhs <= rhs + offset`, where `lhs` and `rhs` are (symbol, offset) terms.
+        """
+        (lhs_symbol, lhs_offset), (rhs_symbol, rhs_offset) = lhs, rhs
+        self.edges.setdefault(rhs_symbol, []).append(
+            (lhs_symbol, rhs_offset + offset - lhs_offset)
+        )
+        self.undo_log.append(rhs_symbol)
+
+    def enter_loop(self, variable, start, stop):
+        """
+        Starts the region of a loop binding declaration `variable` over `range(start, stop)` and
+        returns the Loop.
+        """
+        always_runs = self.proves(start, stop, -1)
+        self.push()
+        loop = Loop(self.loop_count, variable, start, stop, len(self.marks), always_runs)
+        self.loop_count += 1
+        self.loops.append(loop)
+
+        self.add_fact(start, (variable, 0))
+        self.add_fact((variable, 0), stop, -1)
+
+        return loop
+
+    def assume(self, lhs, kind, rhs):
+        """
+        Records that comparison `lhs kind rhs` holds, where `kind` is a BinaryOpKind. Other
+        comparisons don't give facts and are ignored.
+        """
+        if kind == BinaryOpKind.LESSER_THAN:
+            self.add_fact(lhs, rhs, -1)
+        elif kind == BinaryOpKind.EQUAL_LESSER_THAN:
+            self.add_fact(lhs, rhs)
+        elif kind == BinaryOpKind.GREATER_THAN:
+            self.add_fact(rhs, lhs, -1)
+        elif kind == BinaryOpKind.EQUAL_GREATER_THAN:
+            self.add_fact(rhs, lhs)
+        elif kind == BinaryOpKind.EQUAL:
+            self.add_fact(lhs, rhs)
+            self.add_fact(rhs, lhs)
+
+    def get_distance(self, source, target):
+        """
+        Returns the length of the shortest path from `source` to `target`, None if there is
+        none, or -inf if a negative cycle makes the facts contradictory.
+        """
+        distances = {source: 0}
+        changed = [source]
+        rounds = 0
+
+        # Shortest paths have fewer edges than there are symbols, so updates after that many
+        # rounds come from a negative cycle.
+        while changed:
+            if rounds > len(distances):
+                return float("-inf")
+
+            rounds += 1
+            next_changed = []
+
+            for symbol in changed:
+                distance = distances[symbol]
+                edges = self.edges.get(symbol, [])
+
+                if is_length(symbol):
+                    # Lengths are never negative: ZERO <= len + 0.
+                    edges = edges + [(ZERO, 0)]
+
+                for target_symbol, weight in edges:
+                    new_distance = distance + weight
+
+                    if new_distance < distances.get(target_symbol, new_distance + 1):
+                        distances[target_symbol] = new_distance
+                        next_changed.append(target_symbol)
+
+            changed = next_changed
+
+        return distances.get(target)
+
+    def proves(self, lhs, rhs, offset=0):
+        """
+        Returns True if the facts imply `lhs <= rhs + offset`.
+        """
+        (lhs_symbol, lhs_offset), (rhs_symbol, rhs_offset) = lhs, rhs
+        bound = rhs_offset + offset - lhs_offset
+
+        if lhs_symbol == rhs_symbol:
+            return bound >= 0
+
+        distance = self.get_distance(rhs_symbol, lhs_symbol)
+        return distance is not None and distance <= bound
+
+    def is_valid_index(self, sequence, index):
+        """
+        Returns the verdict for `index` as an index of `sequence` from the facts alone.
+        """
+        length = (get_length(sequence), 0)
+
+        if self.proves((ZERO, 0), index) and self.proves(index, length, -1):
+            return IN_BOUNDS
+
+        # Negative indices are only proven when constant: -len <= index <= -1.
+        if index[0] == ZERO and index[1] < 0 and self.proves((ZERO, -index[1]), length):
+            return NEGATIVE_IN_BOUNDS
+
+        return CHECKED
+
+    def check_index(self, node, sequence, index):
+        """
+        Returns and records the verdict for `node`, an access to `sequence` at `index`, a
+        (symbol, offset) term.
+        """
+        verdict = self.is_valid_index(sequence, index)
+
+        if verdict == CHECKED:
+            loop = self.find_loop(index[0])
+
+            # Accesses in regions nested in the loop's may not run on every iteration.
+            if loop is not None and loop.depth == len(self.marks):
+                verdict = HOISTED
+                self.hoisted_checks.setdefault(loop.id, []).append(
+                    HoistedCheck(
+                        loop,
+                        sequence,
+                        (loop.start[0], loop.start[1] + index[1]),
+                        (loop.stop[0], loop.stop[1] - 1 + index[1]),
+                    )
+                )
+
+        self.verdicts[id(node)] = verdict
+        return verdict
+
+    def get_fast_version_condition(self, loop):
+        """
+        Returns the (lhs, kind, rhs) comparisons that must all hold for the version of `loop`
+        without its hoisted checks to run. When one fails, the loop runs with its checks, which
+        raise on the iteration that actually makes an invalid access, if any.
+        """
+        comparisons = {}
+
+        for check in self.hoisted_checks.get(loop.id, ()):
+            length = (get_length(check.sequence), 0)
+            comparisons[((ZERO, 0), BinaryOpKind.EQUAL_LESSER_THAN, check.low)] = True
+            comparisons[(check.high, BinaryOpKind.LESSER_THAN, length)] = True
+
+        return list(comparisons)
+
+    def find_loop(self, variable):
+        for loop in reversed(self.loops):
+            if loop.variable == variable:
+                return loop
+
+        return None
+
+    def get_term(self, node):
+        """
+        Returns the (symbol, offset) term of an Identifier, an Integer, or one of them plus or
+        minus an Integer, or None.
+        """
+        if isinstance(node, Integer) and self.literals is not None:
+            return (ZERO, self.literals.get(node))
+
+        if isinstance(node, Identifier) and self.scopes is not None:
+            declaration = self.scopes.get_declaration(node)
+            return None if declaration == UNRESOLVED else (declaration, 0)
+
+        if isinstance(node, BinaryExpr) and isinstance(node.rhs, Integer) and self.literals:
+            kind = self.get_operator_kind(node)
+            term = self.get_term(node.lhs)
+
+            if term is not None and kind in (BinaryOpKind.PLUS, BinaryOpKind.MINUS):
+                value = self.literals.get(node.rhs)
+                return (term[0], term[1] + (value if kind == BinaryOpKind.PLUS else -value))
+
+        return None
+
+    def get_operator_kind(self, node):
+        tokens = self.scopes.tokens
+        op = node.op
+        second_token = None if op.second_token is None else tokens[op.second_token].data
+
+        return BinaryOpKind.from_string(tokens[op.op].data, second_token)
+
+    def assume_condition(self, node, negate=False):
+        """
+        Records the facts implied by condition `node` holding, or not holding if `negate`.
+        Conjunctions give the facts of both sides when they hold.
+        """
+        if not isinstance(node, BinaryExpr):
+            return
+
+        kind = self.get_operator_kind(node)
+
+        if kind == BinaryOpKind.AND:
+            if not negate:
+                self.assume_condition(node.lhs)
+                self.assume_condition(node.rhs)
+            return
+
+        if negate:
+            kind = NEGATED_COMPARISONS.get(kind)
+
+        lhs = self.get_term(node.lhs)
+        rhs = self.get_term(node.rhs)
+
+        if kind is not None and lhs is not None and rhs is not None:
+            self.assume(lhs, kind, rhs)
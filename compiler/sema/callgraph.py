@@ -0,0 +1,399 @@
+"""
+Call graph and inference scheduling
+
+The unit of inference is a top-level function: a FuncExpr that isn't nested in another one,
+together with the functions nested in it. A top-level function depends on another if it
+references its name, which is how calls will reach their callee. Scopes resolve names against
+preceding declarations only, but a call runs after the whole module is defined, so names left
+unresolved refer to the top-level function of that name wherever it is declared.
+
+Strongly connected components are found with Tarjan's algorithm, using an explicit stack rather
+than recursion. Tarjan's algorithm emits a component after every component it depends on, so
+inferring components in that order gives each one the types of its dependencies.
+
+Components that don't depend on one another can be inferred at the same time. With `workers`
+> 1, components are queued as soon as their dependencies are done and sent to a process pool
+whenever a worker is idle, in batches so small components don't each pay for a round trip.
+Workers get the tokens, scopes and functions once, when they start, and return types, which are
+interned again when they are unpickled, so results are merged into the parent's tables as is.
+Node types are returned in the preorder of each function's nodes, since node ids don't survive
+the trip, and both paths merge results the same way, so they leave the same state behind.
+"""
+
+from concurrent.futures import ProcessPoolExecutor, wait, FIRST_COMPLETED
+from .inference import TypeInference
+from .instantiation import Instantiation, InstantiationTable
+from .scope import ScopeTree, UNRESOLVED, FUNCTION_SCOPE, COMPREHENSION_SCOPE, get_identifiers
+from .types import FunctionType
+
+
+def get_nodes(root):
+    """
+    Returns the AST nodes of the tree at `root` in preorder.
+    """
+    nodes = []
+    stack = [root]
+
+    while stack:
+        value = stack.pop()
+
+        if isinstance(value, list):
+            stack.extend(reversed(value))
+        elif value is not None:
+            nodes.append(value)
+            stack.extend(getattr(value, field) for field in reversed(value.fields))
+
+    return nodes
+
+
+def find_components(edges):
+    """
+    Returns the strongly connected components of the graph where `edges[node]` lists the nodes
+    `node` depends on. Nodes are integers, and a component comes after those it depends on.
+    """
+    count = len(edges)
+    indices = [-1] * count
+    lowlinks = [0] * count
+    is_on_stack = [False] * count
+    stack = []
+    components = []
+    next_index = 0
+
+    for start in range(count):
+        if indices[start] != -1:
+            continue
+
+        indices[start] = lowlinks[start] = next_index
+        next_index += 1
+        stack.append(start)
+        is_on_stack[start] = True
+        # Frames are (node, position of the next edge to follow).
+        frames = [(start, 0)]
+
+        while frames:
+            node, position = frames[-1]
+            node_edges = edges[node]
+
+            if position < len(node_edges):
+                frames[-1] = (node, position + 1)
+                target = node_edges[position]
+
+                if indices[target] == -1:
+                    indices[target] = lowlinks[target] = next_index
+                    next_index += 1
+                    stack.append(target)
+                    is_on_stack[target] = True
+                    frames.append((target, 0))
+                elif is_on_stack[target]:
+                    lowlinks[node] = min(lowlinks[node], indices[target])
+                continue
+
+            frames.pop()
+
+            if frames:
+                parent = frames[-1][0]
+                lowlinks[parent] = min(lowlinks[parent], lowlinks[node])
+
+            if lowlinks[node] == indices[node]:
+                component = []
+
+                while True:
+                    member = stack.pop()
+                    is_on_stack[member] = False
+                    component.append(member)
+
+                    if member == node:
+                        break
+
+                component.reverse()
+                components.append(component)
+
+    return components
+
+
+class CallGraph:
+    """
+    The top-level functions of a module and the dependencies between them.
+
+    Functions are numbered in source order. `edges[function]` lists the functions it depends
+    on. Once `infer` has run:
+    - `types` holds the type of each function,
+    - `node_types` the types of their nodes, narrowed ones included, keyed by node id,
+    - `declaration_types` the types of their declarations,
+    - `table` an Instantiation of each function for its inferred param types.
+    """
+
+    def __init__(self, tokens, scopes, functions, edges, declarations, references=None):
+        self.tokens = tokens
+        self.scopes = scopes
+        self.functions = functions
+        self.edges = edges
+        # Name declaration of each function, or None.
+        self.declarations = declarations
+        # Declarations of the unresolved names in each function, keyed by token index.
+        self.references = [{} for _ in functions] if references is None else references
+        self.components = find_components(edges)
+        self.types = [None] * len(functions)
+        self.node_types = {}
+        self.declaration_types = {}
+        self.table = InstantiationTable(tokens, scopes)
+
+        # Function ids follow function numbers, whatever order components finish in.
+        for function in functions:
+            self.table.get_function_id(function)
+
+    def __repr__(self):
+        return (
+            f"{type(self).__name__}(functions={len(self.functions)}"
+            f", components={len(self.components)})"
+        )
+
+    @staticmethod
+    def from_ast(root, tokens, scopes=None):
+        scopes = ScopeTree.from_ast(root, tokens) if scopes is None else scopes
+        functions = []
+        declarations = []
+        # Top-level function number of each function scope, and of each function name.
+        scope_functions = {}
+        name_functions = {}
+        # Top-level function number of each name, for names used before their declaration.
+        top_level_functions = {}
+
+        # Scopes are numbered in preorder, so parents come first.
+        for scope in scopes.scopes:
+            if scope.kind == COMPREHENSION_SCOPE:
+                scope_functions[scope.id] = scope_functions.get(scope.parent.id)
+            elif scope.kind == FUNCTION_SCOPE:
+                function = scope_functions.get(scope.parent.id)
+
+                if function is None:
+                    function = len(functions)
+                    functions.append(scope.node)
+                    declarations.append(None)
+
+                scope_functions[scope.id] = function
+
+                if scope.node.name is not None:
+                    declaration = scopes.declarations[scope.node.name.index]
+                    name_functions[declaration] = function
+
+                    if scope.node is functions[function]:
+                        declarations[function] = declaration
+                        top_level_functions[tokens[scope.node.name.index].data] = function
+
+        edges = []
+        references = []
+
+        for function, node in enumerate(functions):
+            targets = {}
+            function_references = {}
+
+            for identifier in get_identifiers([node.params, node.body]):
+                declaration = scopes.uses.get(identifier.index, UNRESOLVED)
+
+                if declaration == UNRESOLVED:
+                    target = top_level_functions.get(tokens[identifier.index].data)
+
+                    if target is not None:
+                        function_references[identifier.index] = declarations[target]
+                else:
+                    target = name_functions.get(declaration)
+
+                if target is not None and target != function:
+                    targets[target] = True
+
+            edges.append(list(targets))
+            references.append(function_references)
+
+        return CallGraph(tokens, scopes, functions, edges, declarations, references)
+
+    def get_dependency_types(self, component):
+        """
+        Returns the types of the named functions `component` depends on, by declaration.
+        """
+        return {
+            self.declarations[target]: self.types[target]
+            for function in component
+            for target in self.edges[function]
+            if self.types[target] is not None
+        }
+
+    def get_references(self, component):
+        """
+        Returns the declarations of the unresolved names in `component`, keyed by token index.
+        """
+        return {
+            index: declaration
+            for function in component
+            for index, declaration in self.references[function].items()
+        }
+
+    def infer(self, workers=1):
+        """
+        Infers the type of every function, component by component. Returns `types`.
+        """
+        if workers <= 1 or len(self.components) <= 1:
+            for component in self.components:
+                self.merge(
+                    infer_component(
+                        self.tokens,
+                        self.scopes,
+                        self.functions,
+                        component,
+                        self.get_dependency_types(component),
+                        self.get_references(component),
+                    )
+                )
+
+            return self.types
+
+        component_ids = {}
+        for component_id, component in enumerate(self.components):
+            for function in component:
+                component_ids[function] = component_id
+
+        # Components waiting on others, and the components waiting on each one.
+        waiting_counts = [0] * len(self.components)
+        dependents = [[] for _ in self.components]
+
+        for component_id, component in enumerate(self.components):
+            dependencies = {
+                component_ids[target]
+                for function in component
+                for target in self.edges[function]
+            }
+            dependencies.discard(component_id)
+            waiting_counts[component_id] = len(dependencies)
+
+            for dependency in dependencies:
+                dependents[dependency].append(component_id)
+
+        ready = [
+            component_id
+            for component_id, count in enumerate(waiting_counts)
+            if count == 0
+        ]
+        futures = {}
+
+        with ProcessPoolExecutor(
+            max_workers=workers,
+            initializer=_set_worker_module,
+            initargs=(self.tokens, self.scopes, self.functions),
+        ) as executor:
+            while ready or futures:
+                # Ready components wait in the queue until a worker is idle. Each batch takes an
+                # even share of them over the whole pool, so a busy pool doesn't leave them all
+                # to the one worker that frees up first.
+                batch_size = -(-len(ready) // workers)
+
+                while ready and len(futures) < workers:
+                    batch = ready[:batch_size]
+                    ready = ready[batch_size:]
+                    tasks = [
+                        (
+                            self.components[component_id],
+                            self.get_dependency_types(self.components[component_id]),
+                            self.get_references(self.components[component_id]),
+                        )
+                        for component_id in batch
+                    ]
+                    futures[executor.submit(_infer_worker_components, tasks)] = batch
+
+                done, _ = wait(futures, return_when=FIRST_COMPLETED)
+
+                for future in done:
+                    batch = futures.pop(future)
+
+                    for result in future.result():
+                        self.merge(result)
+
+                    for component_id in batch:
+                        for dependent in dependents[component_id]:
+                            waiting_counts[dependent] -= 1
+
+                            if waiting_counts[dependent] == 0:
+                                ready.append(dependent)
+
+        return self.types
+
+    def get_node_type(self, node):
+        return self.node_types.get(id(node))
+
+    def merge(self, result):
+        types, node_types, declaration_types = result
+
+        for function, type in types.items():
+            self.types[function] = type
+            node = self.functions[function]
+            function_node_types = {
+                id(child): child_type
+                for child, child_type in zip(get_nodes(node), node_types[function])
+                if child_type is not None
+            }
+            self.node_types.update(function_node_types)
+
+            if isinstance(type, FunctionType):
+                table = self.table
+                key = (table.get_function_id(node), type.params)
+                table.instantiations[key] = Instantiation(
+                    function, node, type.params, type.result, function_node_types
+                )
+
+        self.declaration_types.update(declaration_types)
+
+
+def infer_component(tokens, scopes, functions, component, dependency_types, references=None):
+    """
+    Infers the functions of `component`, given the types of the functions they depend on by
+    declaration and the declarations of their unresolved names by token index. Returns their
+    types and the types of their nodes in preorder, by function number, and the types of the
+    declarations met.
+    """
+    inference = TypeInference(tokens, scopes)
+
+    if references is not None:
+        inference.add_references(references)
+
+    for function in component:
+        inference.walk(functions[function])
+
+    engine = inference.engine
+    for declaration, type in dependency_types.items():
+        engine.bind(inference.get_declaration_var(declaration), type)
+
+    engine.solve()
+    types = {}
+    node_types = {}
+
+    for function in component:
+        node = functions[function]
+        types[function] = engine.resolve(inference.types[id(node)])
+        node_types[function] = [
+            None if child_var is None else engine.resolve(child_var)
+            for child_var in (inference.types.get(id(child)) for child in get_nodes(node))
+        ]
+
+    declaration_types = {
+        declaration: engine.resolve(var)
+        for declaration, var in inference.declaration_types.items()
+    }
+
+    return types, node_types, declaration_types
+
+
+_worker_module = None
+
+
+def _set_worker_module(tokens, scopes, functions):
+    """
+    Process pool initializer. Sends the module to each worker once instead of per task.
+    """
+    global _worker_module
+    _worker_module = (tokens, scopes, functions)
+
+
+def _infer_worker_components(tasks):
+    return [
+        infer_component(*_worker_module, component, dependency_types, references)
+        for component, dependency_types, references in tasks
+    ]
@@ -0,0 +1,166 @@
+"""
+Closure captures
+
+A closure is called as `closure(*args, ref env)`. NOTES.md says the variables a closure
+references can be moved into it when neither its parent function nor its sibling closures use
+them, and the `env` reference can then be omitted. This pass finds what each FuncExpr captures
+and decides how each captured variable gets into the closure:
+
+- MOVED: the closure is created at the variable's last use in the declaring function and no
+  sibling closure captures it, so the closure takes the object over.
+- COPIED: the variable holds a primitive value, so the closure keeps its own copy.
+- SHARED: the closure refers to the variable through its environment.
+
+Module variables are globals, as NOTES.md puts it, so they aren't captured. Captures are
+transitive: a function also captures what the functions nested in it capture from further out,
+since it has to pass those on when creating them. A variable captured that way is never moved,
+because the intermediate function may create its closures more than once.
+
+Moved and copied variables are stored in the closure itself, so only closures with shared
+captures need an environment, and it only holds the shared variables. A closure capturing
+nothing, like the `lambda x: x * x` passed to `map` in samples/function.vi, needs none.
+"""
+
+from .liveness import Liveness, FunctionCollector, get_owner
+from .scope import ScopeTree, UNRESOLVED, FUNCTION_SCOPE, COMPREHENSION_SCOPE, get_identifiers
+from .types import INT, FLOAT, COMPLEX, BOOL
+
+MOVED = 0
+COPIED = 1
+SHARED = 2
+
+COPYABLE_TYPES = {INT, FLOAT, COMPLEX, BOOL}
+
+
+class ClosureAnalysis:
+    """
+    The captures of the functions of a module.
+
+    `captures` maps the id of each FuncExpr to a dict from the declarations it captures to how
+    they are captured. `inference` is an optional TypeInference of the module, used to find
+    variables that can be copied.
+    """
+
+    def __init__(self, scopes, inference=None):
+        self.scopes = scopes
+        self.inference = inference
+        # Enclosing function or module root of each FuncExpr, and the reverse.
+        self.parents = {}
+        self.children = {}
+        self.captures = {}
+        self.livenesses = {}
+
+    def __repr__(self):
+        return f"{type(self).__name__}(closures={len(self.captures)})"
+
+    @staticmethod
+    def analyze(root, tokens, scopes=None, inference=None):
+        scopes = ScopeTree.from_ast(root, tokens) if scopes is None else scopes
+        analysis = ClosureAnalysis(scopes, inference)
+        collector = FunctionCollector()
+        collector.walk(root)
+
+        for scope in scopes.scopes:
+            if scope.kind == FUNCTION_SCOPE:
+                parent = scope.parent
+
+                while parent.kind == COMPREHENSION_SCOPE:
+                    parent = parent.parent
+
+                analysis.parents[id(scope.node)] = parent.node
+                analysis.children.setdefault(id(parent.node), []).append(scope.node)
+
+        for function in collector.functions:
+            analysis.captures[id(function)] = dict.fromkeys(analysis.get_free_variables(function))
+
+        for function in collector.functions:
+            analysis.classify(function)
+
+        return analysis
+
+    def get_captures(self, function):
+        return self.captures[id(function)]
+
+    def get_environment(self, function):
+        """
+        Returns the declarations the environment of `function` has to hold, in declaration order.
+        """
+        return sorted(
+            declaration
+            for declaration, kind in self.get_captures(function).items()
+            if kind == SHARED
+        )
+
+    def needs_environment(self, function):
+        return SHARED in self.get_captures(function).values()
+
+    def get_ancestors(self, function):
+        ancestors = []
+        parent = self.parents.get(id(function))
+
+        while parent is not None:
+            ancestors.append(parent)
+            parent = self.parents.get(id(parent))
+
+        return ancestors
+
+    def get_free_variables(self, function):
+        """
+        Returns the declarations of enclosing functions referenced in `function`, in the order
+        they are first referenced.
+        """
+        # The module root is the only ancestor without a parent.
+        ancestor_ids = {
+            id(ancestor)
+            for ancestor in self.get_ancestors(function)
+            if id(ancestor) in self.parents
+        }
+        free_variables = {}
+
+        for identifier in get_identifiers(function.body):
+            declaration = self.scopes.uses.get(identifier.index, UNRESOLVED)
+
+            if (
+                declaration != UNRESOLVED
+                and id(get_owner(self.scopes, declaration)) in ancestor_ids
+            ):
+                free_variables[declaration] = True
+
+        return list(free_variables)
+
+    def get_liveness(self, function):
+        liveness = self.livenesses.get(id(function))
+
+        if liveness is None:
+            liveness = self.livenesses[id(function)] = Liveness.analyze(function, self.scopes)
+
+        return liveness
+
+    def is_copyable(self, declaration):
+        if self.inference is None:
+            return False
+
+        return self.inference.get_declaration_type(declaration) in COPYABLE_TYPES
+
+    def classify(self, function):
+        parent = self.parents[id(function)]
+        captures = self.captures[id(function)]
+
+        for declaration in captures:
+            if get_owner(self.scopes, declaration) is parent and self.is_movable(
+                function, parent, declaration
+            ):
+                captures[declaration] = MOVED
+            elif self.is_copyable(declaration):
+                captures[declaration] = COPIED
+            else:
+                captures[declaration] = SHARED
+
+    def is_movable(self, function, parent, declaration):
+        if declaration not in self.get_liveness(parent).get_deaths(function):
+            return False
+
+        return not any(
+            sibling is not function and declaration in self.captures[id(sibling)]
+            for sibling in self.children[id(parent)]
+        )
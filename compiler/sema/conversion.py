@@ -1,6 +1,261 @@
 """
 Macro expansion
 
-TODO:
-    - Conversion of integers to their decimal versions
+Literal decoding:
+    `LiteralTable`, which decodes every literal of a module once, lives in the parser package
+    so the serializer can store it, and is re-exported here.
+
+Constant folding:
+    `ConstantFolder` evaluates operator and `if` expressions whose operands are known at compile
+    time and replaces them with `Constant` nodes, whose values are kept in a `ConstantPool` so
+    codegen can emit them as immediates. Integer arithmetic is exact, and an expression is left
+    alone when evaluating it would fail or its result wouldn't fit in an `int`, so it keeps its
+    runtime behavior.
 """
+
+import math
+from ..parser.ast import BinaryOpKind, UnaryOpKind, Constant
+from ..parser.literals import INT64_MIN, INT64_MAX, LITERAL_CLASSES, LiteralTable
+from ..parser.visitor import Transformer
+
+
+class ConstantPool:
+    """
+    The values computed at compile time, each stored once.
+
+    Values are keyed by type as well, so `1`, `1.0` and `True` get different slots, and floats
+    by their bits, so `-0.0` and NaN get slots of their own.
+    """
+
+    def __init__(self):
+        self.values = []
+        self.slots = {}
+
+    def __repr__(self):
+        return f"{type(self).__name__}(length={len(self.values)})"
+
+    def __len__(self):
+        return len(self.values)
+
+    def add(self, value):
+        """
+        Returns the slot of `value`, adding it if it isn't in the pool yet.
+        """
+        if type(value) is float:
+            key = (float, value.hex())
+        elif type(value) is complex:
+            key = (complex, value.real.hex(), value.imag.hex())
+        else:
+            key = (type(value), value)
+
+        slot = self.slots.get(key)
+
+        if slot is None:
+            slot = self.slots[key] = len(self.values)
+            self.values.append(value)
+
+        return slot
+
+    def get(self, slot):
+        return self.values[slot]
+
+
+NUMBER_TYPES = (bool, int, float, complex)
+
+# Raised by evaluations left to runtime.
+EVALUATION_ERRORS = (ArithmeticError, TypeError, ValueError)
+
+_unknown = object()
+
+
+def fits_int(value):
+    return type(value) is not int or INT64_MIN <= value <= INT64_MAX
+
+
+def fold_unary(kind, value):
+    """
+    Returns the result of unary operator `kind` on `value`, or `_unknown` if it is left to
+    runtime.
+    """
+    if kind == UnaryOpKind.NOT:
+        return not value
+
+    if not isinstance(value, NUMBER_TYPES):
+        return _unknown
+
+    if kind == UnaryOpKind.PLUS:
+        return +value
+    elif kind == UnaryOpKind.MINUS:
+        return -value
+    elif kind == UnaryOpKind.BINARY_NOT:
+        return ~value if isinstance(value, int) else _unknown
+    elif kind == UnaryOpKind.SQUARE:
+        return value * value
+    elif kind == UnaryOpKind.ROOT:
+        if isinstance(value, complex) or value < 0:
+            return _unknown
+        return math.sqrt(value)
+
+    return _unknown
+
+
+def fold_binary(kind, lhs, rhs):
+    """
+    Returns the result of binary operator `kind` on `lhs` and `rhs`, or `_unknown` if it is left
+    to runtime.
+
+    NOTE:
+        `and`, `or`, `is` and `is not` aren't handled here. The first two can be folded knowing
+        only their left operand, and the identity of values is only known at runtime.
+    """
+    are_numbers = isinstance(lhs, NUMBER_TYPES) and isinstance(rhs, NUMBER_TYPES)
+    are_integers = isinstance(lhs, int) and isinstance(rhs, int)
+
+    if kind == BinaryOpKind.EQUAL:
+        return lhs == rhs
+    elif kind == BinaryOpKind.NOT_EQUAL:
+        return lhs != rhs
+    elif kind == BinaryOpKind.LESSER_THAN:
+        return lhs < rhs
+    elif kind == BinaryOpKind.GREATER_THAN:
+        return lhs > rhs
+    elif kind == BinaryOpKind.EQUAL_LESSER_THAN:
+        return lhs <= rhs
+    elif kind == BinaryOpKind.EQUAL_GREATER_THAN:
+        return lhs >= rhs
+    elif kind == BinaryOpKind.IN:
+        return lhs in rhs if isinstance(rhs, (str, bytes)) else _unknown
+    elif kind == BinaryOpKind.NOT_IN:
+        return lhs not in rhs if isinstance(rhs, (str, bytes)) else _unknown
+    elif kind == BinaryOpKind.PLUS:
+        # Numbers add, strings and byte strings concatenate.
+        return lhs + rhs if are_numbers or type(lhs) is type(rhs) else _unknown
+
+    if not are_numbers:
+        return _unknown
+
+    if kind == BinaryOpKind.MINUS:
+        return lhs - rhs
+    elif kind == BinaryOpKind.MUL:
+        return lhs * rhs
+    elif kind == BinaryOpKind.DIV:
+        return lhs / rhs
+    elif kind == BinaryOpKind.INTEGER_DIV:
+        return lhs // rhs
+    elif kind == BinaryOpKind.MOD:
+        return lhs % rhs
+    elif kind == BinaryOpKind.POWER:
+        # Don't compute huge integers just to find out they don't fit.
+        if are_integers and rhs > 0 and abs(lhs) > 1 and rhs * (abs(lhs).bit_length() - 1) > 64:
+            return _unknown
+        return lhs ** rhs
+
+    if not are_integers:
+        return _unknown
+
+    if kind == BinaryOpKind.SHIFT_LEFT:
+        return _unknown if lhs and rhs > 64 else lhs << rhs
+    elif kind == BinaryOpKind.SHIFT_RIGHT:
+        return lhs >> rhs
+    elif kind == BinaryOpKind.BINARY_AND:
+        return lhs & rhs
+    elif kind == BinaryOpKind.BINARY_XOR:
+        return lhs ^ rhs
+    elif kind == BinaryOpKind.BINARY_OR:
+        return lhs | rhs
+
+    return _unknown
+
+
+class ConstantFolder(Transformer):
+    """
+    Folds the constant operator and `if` expressions of a tree bottom-up, so constant operands
+    are found by looking at a node's direct children only.
+
+    Literal values are read from `literals`, a LiteralTable of the module.
+    """
+
+    def __init__(self, tokens, literals, pool=None):
+        self.tokens = tokens
+        self.literals = literals
+        self.pool = ConstantPool() if pool is None else pool
+
+    def __repr__(self):
+        return f"{type(self).__name__}(pool={self.pool})"
+
+    @staticmethod
+    def fold(root, tokens, literals=None, pool=None):
+        """
+        Folds the tree at `root` in place and returns the folder, whose `root` is the new root.
+        """
+        literals = LiteralTable.from_ast(root, tokens) if literals is None else literals
+        folder = ConstantFolder(tokens, literals, pool)
+        folder.root = folder.transform(root)
+
+        return folder
+
+    def get_value(self, node):
+        """
+        Returns the compile-time value of `node`, or `_unknown`.
+        """
+        if isinstance(node, Constant):
+            return self.pool.get(node.slot)
+
+        if isinstance(node, LITERAL_CLASSES) and node.index in self.literals.slots:
+            return self.literals.get(node)
+
+        return _unknown
+
+    def make_constant(self, node, value):
+        """
+        Returns a Constant holding `value`, or `node` if `value` is left to runtime.
+        """
+        if value is _unknown or not fits_int(value):
+            return node
+
+        return Constant(self.pool.add(value))
+
+    def transform_unary_expr(self, node):
+        value = self.get_value(node.expr)
+
+        if value is _unknown:
+            return node
+
+        kind = UnaryOpKind.from_string(self.tokens[node.op.op].data)
+
+        try:
+            return self.make_constant(node, fold_unary(kind, value))
+        except EVALUATION_ERRORS:
+            return node
+
+    def transform_binary_expr(self, node):
+        op = node.op
+        second_token = None if op.second_token is None else self.tokens[op.second_token].data
+        kind = BinaryOpKind.from_string(self.tokens[op.op].data, second_token)
+        lhs = self.get_value(node.lhs)
+
+        if lhs is _unknown:
+            return node
+
+        if kind == BinaryOpKind.AND:
+            return node.rhs if lhs else node.lhs
+        elif kind == BinaryOpKind.OR:
+            return node.lhs if lhs else node.rhs
+
+        rhs = self.get_value(node.rhs)
+
+        if rhs is _unknown:
+            return node
+
+        try:
+            return self.make_constant(node, fold_binary(kind, lhs, rhs))
+        except EVALUATION_ERRORS:
+            return node
+
+    def transform_if_expr(self, node):
+        condition = self.get_value(node.condition)
+
+        if condition is _unknown:
+            return node
+
+        return node.if_expr if condition else node.else_expr
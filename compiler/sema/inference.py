@@ -1,3 +1,981 @@
 """
 Type inference
+
+Every expression and declaration gets a type variable. Type variables live in a union-find
+structure (union by rank, path compression), and the structure known about a variable, its
+shape, is kept on its representative:
+- (PRIMITIVE, name)
+- (LIST, element, join): `join` is the JOIN constraint collecting the list's element types.
+- (RECORD, fields, is_open): `fields` maps field names to variables. An open record can still
+  gain fields.
+- (FUNCTION, params, result)
+- (UNION, members)
+
+Constraints are solved with a worklist. A constraint that waits on the shape of a variable is
+registered as a watcher of that variable and only goes back on the worklist when the variable
+is bound or merged with another. Merging moves the smaller watcher list into the larger one, so
+solving stays near-linear in the size of the program.
+
+Lists are inferred from their use, as NOTES.md describes for uninitialized `[]` lists: a list's
+element type is the union of the types of the values added to it, and stays unresolved until one
+is.
+
+Arithmetic promotes numbers from int to float to complex, and `/` gives at least a float. Strings,
+byte strings and lists concatenate with `+` and repeat with `*` by an int. Operands whose types
+are still unknown once everything else is solved default to the same type.
+
+Narrowing is flow-sensitive. In the branches of an `if` guarded by a type test, such as
+`type(x) == int` or NOTES.md's `cast{Cat}(x)`, the uses of `x` get their own variable, constrained
+by a NARROW constraint to the members of `x`'s union that pass the test, or that fail it in the
+`else` branch. A use narrowed to a single member can be compiled without tag checks.
+
+TODO: Recognize type tests in the AST once the parser produces calls. Until then they are
+registered with `TypeInference.add_type_test`.
 """
+
+from collections import deque
+from .scope import ScopeTree, UNRESOLVED
+from .subtype import SubtypeChecker
+from .types import (
+    ListType,
+    RecordType,
+    FunctionType,
+    UnionType,
+    PrimitiveType,
+    TypeVariable,
+    INT,
+    FLOAT,
+    COMPLEX,
+    STR,
+    BYTES,
+    BOOL,
+    make_union,
+)
+from ..parser.ast import FuncParam, FuncExpr, Identifier, UnaryExpr, BinaryExpr
+from ..parser.visitor import Visitor
+
+# Shape tags
+PRIMITIVE = 0
+LIST = 1
+RECORD = 2
+FUNCTION = 3
+UNION = 4
+
+# Constraint tags
+EQUAL = 0
+FIELD = 1
+ELEMENT = 2
+JOIN = 3
+NARROW = 4
+OPERATION = 5
+
+PRIMITIVE_TYPES = {type.name: type for type in (INT, FLOAT, COMPLEX, STR, BYTES, BOOL)}
+
+COMPARISON_OPERATORS = frozenset(("<", ">", "==", ">=", "<=", "!=", "in", "not", "is"))
+BOOLEAN_OPERATORS = frozenset(("and", "or"))
+
+# Arithmetic promotes operands to the highest of their ranks.
+NUMBER_RANKS = {"bool": 0, "int": 0, "float": 1, "complex": 2}
+RANKED_TYPES = (INT, FLOAT, COMPLEX)
+SEQUENCE_TYPES = frozenset(("str", "bytes"))
+
+# Returned by `InferenceEngine.passes_test` when it can't tell yet.
+MAYBE = None
+
+# The shape tag a type test checks for each kind of type.
+TYPE_TAGS = {PrimitiveType: PRIMITIVE, ListType: LIST, RecordType: RECORD, FunctionType: FUNCTION}
+
+
+class InferenceError(Exception):
+    """ Represents the error type inference can raise """
+
+    def __init__(self, message):
+        super().__init__(message)
+        self.message = message
+
+    def __repr__(self):
+        return f'InferenceError(message="{self.message}")'
+
+
+class InferenceEngine:
+    """
+    Type variables and the constraints between them.
+
+    Variables are integers. Constraints are added with `equal`, `has_field`, `add_element`,
+    `join`, `narrow` and `operate`, and `solve` propagates them until nothing changes.
+    """
+
+    def __init__(self):
+        self.parent = []
+        self.rank = []
+        self.shapes = []
+        self.watchers = []
+        self.constraints = []
+        self.queued = []
+        self.worklist = deque()
+        # JOIN constraint collecting the result of each NARROW constraint, by index.
+        self.narrow_joins = {}
+        self.subtype_checker = SubtypeChecker()
+        # OPERATION constraints in creation order, and how many of them were defaulted.
+        self.operations = []
+        self.defaulted_count = 0
+
+    def __repr__(self):
+        return (
+            f"{type(self).__name__}(variables={len(self.parent)}"
+            f", constraints={len(self.constraints)})"
+        )
+
+    def fresh(self):
+        """
+        Returns a new unbound type variable.
+        """
+        var = len(self.parent)
+        self.parent.append(var)
+        self.rank.append(0)
+        self.shapes.append(None)
+        self.watchers.append([])
+
+        return var
+
+    def find(self, var):
+        parent = self.parent
+        root = var
+
+        while parent[root] != root:
+            root = parent[root]
+
+        while parent[var] != root:
+            parent[var], var = root, parent[var]
+
+        return root
+
+    # CONSTRAINTS
+
+    def add_constraint(self, constraint, watched=()):
+        index = len(self.constraints)
+        self.constraints.append(constraint)
+        self.queued.append(False)
+
+        for var in watched:
+            self.watchers[self.find(var)].append(index)
+
+        self.enqueue(index)
+
+        return index
+
+    def enqueue(self, index):
+        if not self.queued[index]:
+            self.queued[index] = True
+            self.worklist.append(index)
+
+    def notify(self, root):
+        for index in self.watchers[root]:
+            self.enqueue(index)
+
+    def equal(self, a, b):
+        self.add_constraint((EQUAL, a, b))
+
+    def has_field(self, record, name, field):
+        """
+        `record` is an object with a field `name` of type `field`.
+        """
+        self.add_constraint((FIELD, record, name, field), (record,))
+
+    def add_element(self, list_var, value):
+        """
+        `value` is added to list `list_var`.
+        """
+        self.add_constraint((ELEMENT, list_var, value), (list_var,))
+
+    def join(self, result, members):
+        """
+        `result` is the union of the types of `members`.
+        """
+        return self.add_constraint((JOIN, result, list(members)), members)
+
+    def narrow(self, result, source, type, negate=False):
+        """
+        `result` is `source` where a test for `type`, a `Type`, passed, or failed if `negate`.
+        """
+        return self.add_constraint((NARROW, result, source, type, negate), (source,))
+
+    def operate(self, result, op, lhs, rhs):
+        """
+        `result` is the result of arithmetic operator `op` applied to `lhs` and `rhs`.
+        """
+        index = self.add_constraint((OPERATION, result, op, lhs, rhs), (lhs, rhs))
+        self.operations.append(index)
+
+        return index
+
+    def new_list(self):
+        """
+        Returns a variable bound to a list whose element type is inferred from its use.
+        """
+        var = self.fresh()
+        element = self.fresh()
+        join = self.add_constraint((JOIN, element, []))
+        self.shapes[var] = (LIST, element, join)
+
+        return var
+
+    def bind(self, var, type):
+        """
+        Constrains `var` to `type`, a `Type`.
+        """
+        self.equal(var, self.from_type(type))
+
+    def from_type(self, type, variables=None):
+        """
+        Returns a new variable with the shape of `type`. Occurrences of the same TypeVariable
+        share one new variable, kept by id in `variables`.
+        """
+        variables = {} if variables is None else variables
+
+        if isinstance(type, TypeVariable):
+            var = variables.get(type.id)
+            if var is None:
+                var = variables[type.id] = self.fresh()
+            return var
+
+        var = self.fresh()
+
+        if isinstance(type, PrimitiveType):
+            self.shapes[var] = (PRIMITIVE, type.name)
+        elif isinstance(type, ListType):
+            list_var = self.new_list()
+            self.equal(var, list_var)
+            self.add_element(list_var, self.from_type(type.element, variables))
+        elif isinstance(type, RecordType):
+            fields = {name: self.from_type(field, variables) for name, field in type.fields}
+            self.shapes[var] = (RECORD, fields, type.is_open)
+        elif isinstance(type, FunctionType):
+            params = tuple(self.from_type(param, variables) for param in type.params)
+            self.shapes[var] = (FUNCTION, params, self.from_type(type.result, variables))
+        elif isinstance(type, UnionType):
+            self.join(var, [self.from_type(member, variables) for member in type.members])
+
+        return var
+
+    # SOLVING
+
+    def solve(self):
+        self.solve_worklist()
+
+        # Operations on operands that are still unknown default to operands of the same type,
+        # one at a time since each can give the others their operand types.
+        while self.default_operation():
+            self.solve_worklist()
+
+    def solve_worklist(self):
+        constraints = self.constraints
+        worklist = self.worklist
+
+        while worklist:
+            index = worklist.popleft()
+            self.queued[index] = False
+            constraint = constraints[index]
+
+            if constraint is None:
+                continue
+
+            tag = constraint[0]
+
+            if tag == EQUAL:
+                constraints[index] = None
+                self.unify(constraint[1], constraint[2])
+            elif tag == FIELD:
+                self.solve_field(index, *constraint[1:])
+            elif tag == ELEMENT:
+                self.solve_element(index, *constraint[1:])
+            elif tag == JOIN:
+                self.solve_join(*constraint[1:])
+            elif tag == NARROW:
+                self.solve_narrow(index, *constraint[1:])
+            else:
+                self.solve_operation(index, *constraint[1:])
+
+    def default_operation(self):
+        """
+        Makes the operands of the first unsolved operation the same type. Returns False if there
+        was none.
+        """
+        constraints = self.constraints
+        operations = self.operations
+
+        while self.defaulted_count < len(operations):
+            index = operations[self.defaulted_count]
+            self.defaulted_count += 1
+            constraint = constraints[index]
+
+            if constraint is not None:
+                _, result, op, lhs, rhs = constraint
+                self.unify(lhs, rhs)
+
+                if op != "/":
+                    self.unify(result, lhs)
+
+                self.enqueue(index)
+                return True
+
+        return False
+
+    def solve_operation(self, index, result, op, lhs, rhs):
+        shapes = self.shapes
+        lhs, rhs = self.find(lhs), self.find(rhs)
+        lhs_shape, rhs_shape = shapes[lhs], shapes[rhs]
+
+        if lhs_shape is None or rhs_shape is None:
+            return
+
+        self.constraints[index] = None
+        lhs_rank = NUMBER_RANKS.get(lhs_shape[1]) if lhs_shape[0] == PRIMITIVE else None
+        rhs_rank = NUMBER_RANKS.get(rhs_shape[1]) if rhs_shape[0] == PRIMITIVE else None
+
+        if lhs_rank is not None and rhs_rank is not None:
+            rank = max(lhs_rank, rhs_rank, 1 if op == "/" else 0)
+            self.unify(result, self.from_type(RANKED_TYPES[rank]))
+            return
+
+        # Sequences repeat by an int, on either side.
+        if op == "*" and (lhs_rank == 0 or rhs_rank == 0):
+            sequence = rhs if lhs_rank == 0 else lhs
+            shape = shapes[sequence]
+
+            if shape[0] == LIST or (shape[0] == PRIMITIVE and shape[1] in SEQUENCE_TYPES):
+                self.unify(result, sequence)
+                return
+
+        # Lists, and strings or byte strings of the same type, concatenate.
+        is_sequence = lhs_shape[0] == PRIMITIVE and lhs_shape[1] in SEQUENCE_TYPES
+
+        if op == "+" and (
+            lhs_shape[0] == rhs_shape[0] == LIST or (is_sequence and lhs_shape == rhs_shape)
+        ):
+            self.unify(lhs, rhs)
+            self.unify(result, lhs)
+            return
+
+        raise InferenceError(
+            f"Unsupported operand types for {op}: {self.resolve(lhs)} and {self.resolve(rhs)}"
+        )
+
+    def solve_field(self, index, record, name, field):
+        root = self.find(record)
+        shape = self.shapes[root]
+        # The field is in the record once this returns, so the constraint is done.
+        self.constraints[index] = None
+
+        if shape is None:
+            self.shapes[root] = (RECORD, {name: field}, True)
+            self.notify(root)
+        elif shape[0] != RECORD:
+            raise InferenceError(f"{self.resolve(root)} has no field '{name}'")
+        elif name in shape[1]:
+            self.unify(shape[1][name], field)
+        elif shape[2]:
+            self.shapes[root] = (RECORD, {**shape[1], name: field}, True)
+            self.notify(root)
+        else:
+            raise InferenceError(f"{self.resolve(root)} has no field '{name}'")
+
+    def solve_element(self, index, list_var, value):
+        root = self.find(list_var)
+        shape = self.shapes[root]
+
+        if shape is None:
+            self.unify(root, self.new_list())
+            root = self.find(root)
+            shape = self.shapes[root]
+        elif shape[0] != LIST:
+            raise InferenceError(f"Can't add elements to {self.resolve(root)}")
+
+        # The value now feeds the list's element join.
+        self.constraints[index] = None
+        self.add_join_members(shape[2], [value])
+
+    def add_join_members(self, join, members):
+        constraint = self.constraints[join]
+        constraint[2].extend(members)
+
+        for member in members:
+            self.watchers[self.find(member)].append(join)
+
+        self.enqueue(join)
+
+    def solve_join(self, result, members):
+        shapes = self.shapes
+        roots = []
+        primitives = {}
+        stack = list(reversed(members))
+        seen = {self.find(result)}
+
+        while stack:
+            root = self.find(stack.pop())
+            shape = shapes[root]
+
+            # Wait until every member has a shape.
+            if shape is None:
+                return
+
+            # Members that are unions contribute their own members.
+            if shape[0] == UNION:
+                if root not in seen:
+                    seen.add(root)
+                    stack.extend(reversed(shape[1]))
+                continue
+
+            # Members of the same primitive type are the same type.
+            if shape[0] == PRIMITIVE:
+                if shape[1] in primitives:
+                    continue
+                primitives[shape[1]] = root
+
+            if root not in roots:
+                roots.append(root)
+
+        if not roots:
+            return
+
+        if len(roots) == 1:
+            self.unify(result, roots[0])
+            return
+
+        result_root = self.find(result)
+        shape = shapes[result_root]
+
+        if shape is None:
+            shapes[result_root] = (UNION, tuple(roots))
+            self.notify(result_root)
+        elif shape[0] == UNION:
+            known = set(map(self.find, shape[1]))
+            new_members = [root for root in roots if root not in known]
+            if new_members:
+                shapes[result_root] = (UNION, shape[1] + tuple(new_members))
+                self.notify(result_root)
+        else:
+            raise InferenceError(
+                f"{self.resolve(result_root)} can't hold "
+                f"{' | '.join(str(self.resolve(root)) for root in roots)}"
+            )
+
+    def solve_narrow(self, index, result, source, type, negate):
+        root = self.find(source)
+        shape = self.shapes[root]
+
+        if shape is None:
+            return
+
+        if shape[0] == UNION:
+            members = self.get_union_members(root)
+        else:
+            # Only unions can still gain members.
+            self.constraints[index] = None
+            members = [root]
+
+        # Members that may pass the test may also fail it, so they are kept on both sides.
+        kept = [member for member in members if self.passes_test(member, type) != negate]
+
+        if not kept:
+            if not negate:
+                raise InferenceError(f"{self.resolve(root)} is never {type}")
+
+            # The test always passes, so the `else` branch never runs. Its uses keep the type
+            # they had.
+            kept = members
+
+        join = self.narrow_joins.get(index)
+
+        if join is None:
+            self.narrow_joins[index] = self.join(result, kept)
+            return
+
+        known = set(map(self.find, self.constraints[join][2]))
+        new_members = [member for member in kept if member not in known]
+
+        if new_members:
+            self.add_join_members(join, new_members)
+
+    def get_union_members(self, root):
+        """
+        Returns the roots of the members of union `root`, with nested unions flattened.
+        """
+        members = []
+        stack = list(reversed(self.shapes[root][1]))
+        seen = {root}
+
+        while stack:
+            member = self.find(stack.pop())
+
+            if member in seen:
+                continue
+
+            seen.add(member)
+            shape = self.shapes[member]
+
+            if shape is not None and shape[0] == UNION:
+                stack.extend(reversed(shape[1]))
+            else:
+                members.append(member)
+
+        return members
+
+    def passes_test(self, var, type):
+        """
+        Returns True if values of `var`, which has a shape, pass a test for `type`, False if
+        they fail it and `MAYBE` if that depends on parts of `var` that are still unknown.
+        """
+        shape = self.shapes[self.find(var)]
+
+        if shape is None:
+            return MAYBE
+
+        if isinstance(type, PrimitiveType):
+            return shape[0] == PRIMITIVE and shape[1] == type.name
+
+        if shape[0] != TYPE_TAGS.get(type.__class__):
+            return False
+
+        if not self.is_resolved(var):
+            return MAYBE
+
+        return self.subtype_checker.is_subtype(self.resolve(var), type)
+
+    def unify(self, a, b):
+        """
+        Merges the variables `a` and `b` and, recursively, the parts of their shapes.
+        """
+        parent = self.parent
+        rank = self.rank
+        shapes = self.shapes
+        watchers = self.watchers
+        stack = [(a, b)]
+
+        while stack:
+            a, b = stack.pop()
+            root_a, root_b = self.find(a), self.find(b)
+
+            if root_a == root_b:
+                continue
+
+            shape_a, shape_b = shapes[root_a], shapes[root_b]
+
+            if shape_a is not None and shape_b is not None:
+                shape = self.merge_shapes(root_a, shape_a, root_b, shape_b, stack)
+            else:
+                shape = shape_a if shape_b is None else shape_b
+
+            if rank[root_a] < rank[root_b]:
+                root_a, root_b = root_b, root_a
+            elif rank[root_a] == rank[root_b]:
+                rank[root_a] += 1
+
+            parent[root_b] = root_a
+            shapes[root_a] = shape
+            shapes[root_b] = None
+
+            # Keep the larger watcher list and move the smaller one into it.
+            watchers_a, watchers_b = watchers[root_a], watchers[root_b]
+            if len(watchers_a) < len(watchers_b):
+                watchers_a, watchers_b = watchers_b, watchers_a
+            watchers_a.extend(watchers_b)
+            watchers[root_a] = watchers_a
+            watchers[root_b] = None
+
+            self.notify(root_a)
+
+    def merge_shapes(self, root_a, shape_a, root_b, shape_b, stack):
+        tag = shape_a[0]
+
+        if tag != shape_b[0]:
+            raise InferenceError(
+                f"Type mismatch between {self.resolve(root_a)} and {self.resolve(root_b)}"
+            )
+
+        if tag == PRIMITIVE:
+            if shape_a[1] != shape_b[1]:
+                raise InferenceError(f"Type mismatch between {shape_a[1]} and {shape_b[1]}")
+            return shape_a
+
+        if tag == LIST:
+            stack.append((shape_a[1], shape_b[1]))
+            # Values added to either list are added to the merged one.
+            join_b = self.constraints[shape_b[2]]
+            self.constraints[shape_b[2]] = None
+            self.add_join_members(shape_a[2], join_b[2])
+            return shape_a
+
+        if tag == FUNCTION:
+            if len(shape_a[1]) != len(shape_b[1]):
+                raise InferenceError(
+                    f"Type mismatch between {self.resolve(root_a)} and {self.resolve(root_b)}"
+                )
+            stack.extend(zip(shape_a[1], shape_b[1]))
+            stack.append((shape_a[2], shape_b[2]))
+            return shape_a
+
+        if tag == RECORD:
+            fields_a, is_open_a = shape_a[1], shape_a[2]
+            fields_b, is_open_b = shape_b[1], shape_b[2]
+            fields = dict(fields_a)
+
+            for name, field in fields_b.items():
+                if name in fields:
+                    stack.append((fields[name], field))
+                elif is_open_a:
+                    fields[name] = field
+                else:
+                    raise InferenceError(f"{self.resolve(root_a)} has no field '{name}'")
+
+            if not is_open_b:
+                for name in fields_a:
+                    if name not in fields_b:
+                        raise InferenceError(f"{self.resolve(root_b)} has no field '{name}'")
+
+            return (RECORD, fields, is_open_a and is_open_b)
+
+        # Two unions merge into the union of their members.
+        return (UNION, shape_a[1] + shape_b[1])
+
+    # RESULTS
+
+    def resolve(self, var, visiting=None):
+        """
+        Returns the `Type` of `var`. Parts that are still unknown are TypeVariables.
+        """
+        root = self.find(var)
+        shape = self.shapes[root]
+
+        if shape is None:
+            return TypeVariable(root)
+
+        visiting = set() if visiting is None else visiting
+
+        if root in visiting:
+            raise InferenceError(f"Type T{root} contains itself")
+
+        visiting.add(root)
+        tag = shape[0]
+
+        if tag == PRIMITIVE:
+            result = PRIMITIVE_TYPES.get(shape[1]) or PrimitiveType(shape[1])
+        elif tag == LIST:
+            result = ListType(self.resolve(shape[1], visiting))
+        elif tag == RECORD:
+            result = RecordType(
+                [(name, self.resolve(field, visiting)) for name, field in shape[1].items()],
+                shape[2],
+            )
+        elif tag == FUNCTION:
+            result = FunctionType(
+                [self.resolve(param, visiting) for param in shape[1]],
+                self.resolve(shape[2], visiting),
+            )
+        else:
+            result = make_union(self.resolve(member, visiting) for member in shape[1])
+
+        visiting.remove(root)
+
+        return result
+
+    def is_resolved(self, var):
+        """
+        Returns True if `var` has no unknown parts, e.g. a list that nothing was added to.
+        """
+        stack = [self.resolve(var)]
+
+        while stack:
+            type = stack.pop()
+
+            if isinstance(type, TypeVariable):
+                return False
+            elif isinstance(type, ListType):
+                stack.append(type.element)
+            elif isinstance(type, RecordType):
+                stack.extend(field for _, field in type.fields)
+            elif isinstance(type, FunctionType):
+                stack.extend(type.params)
+                stack.append(type.result)
+            elif isinstance(type, UnionType):
+                stack.extend(type.members)
+
+        return True
+
+
+class TypeInference(Visitor):
+    """
+    Generates the type constraints of a module's expressions and solves them.
+    """
+
+    def __init__(self, tokens, scopes, engine=None):
+        self.tokens = tokens
+        self.scopes = scopes
+        self.engine = InferenceEngine() if engine is None else engine
+        # Type variables of nodes, keyed by node id, and of declarations, by declaration id.
+        self.types = {}
+        self.declaration_types = {}
+        self.declarations = {
+            node.index: declaration
+            for declaration, node in enumerate(scopes.declaration_nodes)
+        }
+        # (declaration, type) tested by condition nodes, keyed by node id.
+        self.type_tests = {}
+        # Narrowed type variables of identifiers, keyed by token index.
+        self.narrowed_types = {}
+
+    def __repr__(self):
+        return f"{type(self).__name__}(engine={self.engine})"
+
+    @staticmethod
+    def infer(root, tokens, scopes=None):
+        """
+        Infers the types of the module at `root`.
+        """
+        scopes = ScopeTree.from_ast(root, tokens) if scopes is None else scopes
+        inference = TypeInference(tokens, scopes)
+        inference.walk(root)
+        inference.engine.solve()
+
+        return inference
+
+    def get_type(self, node):
+        return self.engine.resolve(self.types[id(node)])
+
+    def get_declaration_type(self, declaration):
+        return self.engine.resolve(self.get_declaration_var(declaration))
+
+    def get_declaration_var(self, declaration):
+        var = self.declaration_types.get(declaration)
+
+        if var is None:
+            var = self.declaration_types[declaration] = self.engine.fresh()
+
+        return var
+
+    def add_references(self, references):
+        """
+        Resolves the identifiers at the token indices of `references` to their declarations,
+        for names the scopes left unresolved.
+        """
+        self.declarations.update(references)
+
+    def get_use_declaration(self, node):
+        declaration = self.declarations.get(node.index)
+
+        if declaration is None:
+            declaration = self.scopes.uses.get(node.index, UNRESOLVED)
+
+        return declaration
+
+    def is_monomorphic(self, node):
+        """
+        Returns True if `node` has a fully known type without unions in it, so its value needs
+        no tag checks.
+        """
+        var = self.types[id(node)]
+
+        if not self.engine.is_resolved(var):
+            return False
+
+        stack = [self.engine.resolve(var)]
+
+        while stack:
+            type = stack.pop()
+
+            if isinstance(type, UnionType):
+                return False
+            elif isinstance(type, ListType):
+                stack.append(type.element)
+            elif isinstance(type, RecordType):
+                stack.extend(field for _, field in type.fields)
+            elif isinstance(type, FunctionType):
+                stack.extend(type.params)
+                stack.append(type.result)
+
+        return True
+
+    def add_type_test(self, condition, variable, type):
+        """
+        Registers `condition` as a test that passes when Identifier `variable` holds a `type`
+        value, as in `type(variable) == type` or `cast{type}(variable)`. Must be called before
+        `walk`.
+        """
+        declaration = self.get_use_declaration(variable)
+
+        if declaration != UNRESOLVED:
+            self.type_tests[id(condition)] = (declaration, type)
+
+    def get_type_tests(self, condition, negate=False):
+        """
+        Returns the (declaration, type, failed) type tests known to have passed, or failed, once
+        `condition` is true, or false if `negate`.
+        """
+        test = self.type_tests.get(id(condition))
+
+        if test is not None:
+            return [(*test, negate)]
+
+        if isinstance(condition, UnaryExpr) and self.tokens[condition.op.op].data == "not":
+            return self.get_type_tests(condition.expr, not negate)
+
+        if isinstance(condition, BinaryExpr):
+            op = self.tokens[condition.op.op].data
+
+            # Both sides of a true `and` or a false `or` have the same truth value.
+            if (op == "and" and not negate) or (op == "or" and negate):
+                return (
+                    self.get_type_tests(condition.lhs, negate)
+                    + self.get_type_tests(condition.rhs, negate)
+                )
+
+        return []
+
+    def narrow(self, branch, tests):
+        """
+        Gives the uses of tested declarations in `branch` their narrowed type.
+        """
+        for declaration, type, failed in tests:
+            uses = self.get_branch_uses(branch, declaration)
+
+            if not uses:
+                continue
+
+            source = self.narrowed_types.get(uses[0].index)
+            if source is None:
+                source = self.get_declaration_var(declaration)
+
+            result = self.engine.fresh()
+            self.engine.narrow(result, source, type, failed)
+
+            for use in uses:
+                self.narrowed_types[use.index] = result
+
+    def get_branch_uses(self, branch, declaration):
+        """
+        Returns the Identifiers using `declaration` in `branch`, or no uses if the branch assigns
+        it. Nested functions are left out, as they can run after the declaration changed.
+        """
+        uses = []
+        stack = [branch]
+
+        while stack:
+            value = stack.pop()
+
+            if isinstance(value, Identifier):
+                if self.declarations.get(value.index) == declaration:
+                    return []
+
+                if self.scopes.uses.get(value.index) == declaration:
+                    uses.append(value)
+            elif isinstance(value, list):
+                stack.extend(reversed(value))
+            elif value is not None and not isinstance(value, FuncExpr):
+                stack.extend(getattr(value, field) for field in reversed(value.fields))
+
+        return uses
+
+    def set_type(self, node, type):
+        var = self.engine.fresh()
+        self.engine.bind(var, type)
+        self.types[id(node)] = var
+
+    def visit_identifier(self, node):
+        narrowed = self.narrowed_types.get(node.index)
+
+        if narrowed is not None:
+            self.types[id(node)] = narrowed
+            return
+
+        declaration = self.get_use_declaration(node)
+
+        if declaration == UNRESOLVED:
+            self.types[id(node)] = self.engine.fresh()
+        else:
+            self.types[id(node)] = self.get_declaration_var(declaration)
+
+    def visit_integer(self, node):
+        self.set_type(node, INT)
+
+    def visit_float(self, node):
+        self.set_type(node, FLOAT)
+
+    def visit_imag_integer(self, node):
+        self.set_type(node, COMPLEX)
+
+    def visit_imag_float(self, node):
+        self.set_type(node, COMPLEX)
+
+    def visit_string(self, node):
+        self.set_type(node, STR)
+
+    def visit_byte_string(self, node):
+        self.set_type(node, BYTES)
+
+    def visit_prefixed_string(self, node):
+        self.set_type(node, STR)
+
+    def leave_unary_expr(self, node):
+        op = self.tokens[node.op.op].data
+
+        if op == "not":
+            self.set_type(node, BOOL)
+        elif op == "√":
+            self.set_type(node, FLOAT)
+        else:
+            self.types[id(node)] = self.types[id(node.expr)]
+
+    def visit_binary_expr(self, node):
+        op = self.tokens[node.op.op].data
+
+        # The right side of `and` only runs if the left side is true, and of `or` if it's false.
+        if op in BOOLEAN_OPERATORS:
+            self.narrow(node.rhs, self.get_type_tests(node.lhs, op == "or"))
+
+    def leave_binary_expr(self, node):
+        op = self.tokens[node.op.op].data
+        lhs = self.types[id(node.lhs)]
+        rhs = self.types[id(node.rhs)]
+
+        if op in COMPARISON_OPERATORS:
+            self.set_type(node, BOOL)
+        elif op in BOOLEAN_OPERATORS:
+            result = self.types[id(node)] = self.engine.fresh()
+            self.engine.join(result, [lhs, rhs])
+        else:
+            result = self.types[id(node)] = self.engine.fresh()
+            self.engine.operate(result, op, lhs, rhs)
+
+    def visit_if_expr(self, node):
+        self.narrow(node.if_expr, self.get_type_tests(node.condition))
+        self.narrow(node.else_expr, self.get_type_tests(node.condition, True))
+
+    def leave_if_expr(self, node):
+        result = self.types[id(node)] = self.engine.fresh()
+        self.engine.join(result, [self.types[id(node.if_expr)], self.types[id(node.else_expr)]])
+
+    def leave_func_param(self, node):
+        if node.default_value_expr is not None:
+            self.engine.equal(
+                self.types[id(node.name)], self.types[id(node.default_value_expr)]
+            )
+
+    def leave_func_expr(self, node):
+        params = []
+
+        if node.params is not None:
+            for param in [
+                *(node.params.params or ()),
+                node.params.tuple_rest_param,
+                *(node.params.named_tuple_params or ()),
+                node.params.named_tuple_rest_param,
+            ]:
+                if isinstance(param, FuncParam):
+                    params.append(self.types[id(param.name)])
+
+        result = self.types[id(node.body[-1])] if node.body else self.engine.fresh()
+        var = self.types[id(node)] = self.engine.fresh()
+        self.engine.shapes[var] = (FUNCTION, tuple(params), result)
+
+        if node.name is not None:
+            self.engine.equal(self.types[id(node.name)], var)
@@ -1,3 +1,189 @@
 """
 Type and function instantiations
+
+A function is instantiated once per distinct structure of its arguments, as NOTES.md describes
+for duck-typed functions:
+
+    foo: (Object [ str ])
+    foo: (Object [ *, str ])
+
+An instantiation [doesn't clone the AST](https://github.com/crystal-lang/crystal/issues/4864).
+It references the function's nodes and keeps the types it infers for them in a side table, keyed
+by node id. Instantiations are cached on the function and the argument types, so validating an
+existing instantiation again is a dict lookup.
 """
+
+from .inference import InferenceError, TypeInference
+from .scope import ScopeTree
+from .types import RecordType
+from ..parser.ast import FuncParam
+
+
+class Instantiation:
+    """
+    The types of a function's nodes for one list of argument types.
+    """
+
+    def __init__(self, id, function, argument_types, result_type, node_types):
+        self.id = id
+        self.function = function
+        self.argument_types = argument_types
+        self.result_type = result_type
+        self.node_types = node_types
+
+    def __repr__(self):
+        return (
+            f"{type(self).__name__}(id={self.id}, argument_types={self.argument_types}"
+            f", result_type={self.result_type})"
+        )
+
+    def get_type(self, node):
+        return self.node_types[id(node)]
+
+
+def get_params(function):
+    """
+    Returns the FuncParams of `function` in order.
+    """
+    params = function.params
+
+    if params is None:
+        return []
+
+    return [
+        param
+        for param in [
+            *(params.params or ()),
+            params.tuple_rest_param,
+            *(params.named_tuple_params or ()),
+            params.named_tuple_rest_param,
+        ]
+        if isinstance(param, FuncParam)
+    ]
+
+
+def bind_arguments(function, argument_types):
+    """
+    Returns the (FuncParam, type) pairs binding positional `argument_types` to the params of
+    `function`. Params left out must have a default value, which gives them their type. Extra
+    arguments go to the `*` rest param as a tuple, an object with fields "0", "1", ...
+    """
+    params = function.params
+    positional_params = []
+    rest_param = named_rest_param = None
+    named_params = ()
+
+    if params is not None:
+        positional_params = [
+            param for param in params.params or () if isinstance(param, FuncParam)
+        ]
+        rest_param = params.tuple_rest_param
+        named_params = params.named_tuple_params or ()
+        named_rest_param = params.named_tuple_rest_param
+
+    has_rest = isinstance(rest_param, FuncParam)
+    required_count = sum(param.default_value_expr is None for param in positional_params)
+    max_count = None if has_rest else len(positional_params)
+    count = len(argument_types)
+
+    if count < required_count or (max_count is not None and count > max_count):
+        if max_count is None:
+            expected = f"at least {required_count}"
+        elif max_count != required_count:
+            expected = f"{required_count} to {max_count}"
+        else:
+            expected = str(max_count)
+
+        raise InferenceError(f"Function expects {expected} arguments, got {count}")
+
+    for param in named_params:
+        if isinstance(param, FuncParam) and param.default_value_expr is None:
+            raise InferenceError("Keyword-only params need a default value to be instantiated")
+
+    bindings = list(zip(positional_params, argument_types))
+
+    if has_rest:
+        extra_types = argument_types[len(positional_params):]
+        bindings.append(
+            (rest_param, RecordType([(str(i), type) for i, type in enumerate(extra_types)]))
+        )
+
+    if isinstance(named_rest_param, FuncParam):
+        bindings.append((named_rest_param, RecordType([])))
+
+    return bindings
+
+
+class InstantiationTable:
+    """
+    Instantiations of the functions of a module.
+
+    Functions are given canonical integer ids the first time they are seen, and instantiations
+    are keyed by (function id, argument types).
+    """
+
+    def __init__(self, tokens, scopes):
+        self.tokens = tokens
+        self.scopes = scopes
+        self.function_ids = {}
+        self.functions = []
+        self.instantiations = {}
+
+    def __repr__(self):
+        return f"{type(self).__name__}(length={len(self.instantiations)})"
+
+    @staticmethod
+    def from_ast(root, tokens):
+        return InstantiationTable(tokens, ScopeTree.from_ast(root, tokens))
+
+    def get_function_id(self, function):
+        function_id = self.function_ids.get(id(function))
+
+        if function_id is None:
+            function_id = self.function_ids[id(function)] = len(self.functions)
+            # Keep the function alive so its id can't be reused.
+            self.functions.append(function)
+
+        return function_id
+
+    def lookup(self, function, argument_types):
+        """
+        Returns the existing instantiation of `function` for `argument_types`, or None.
+        """
+        key = (self.get_function_id(function), tuple(argument_types))
+        return self.instantiations.get(key)
+
+    def instantiate(self, function, argument_types):
+        """
+        Returns the instantiation of `function` for `argument_types`, inferring it on first use.
+        """
+        argument_types = tuple(argument_types)
+        key = (self.get_function_id(function), argument_types)
+        instantiation = self.instantiations.get(key)
+
+        if instantiation is None:
+            instantiation = self.instantiations[key] = self.infer(
+                len(self.instantiations), function, argument_types
+            )
+
+        return instantiation
+
+    def infer(self, instantiation_id, function, argument_types):
+        bindings = bind_arguments(function, argument_types)
+        inference = TypeInference(self.tokens, self.scopes)
+        inference.walk(function)
+
+        engine = inference.engine
+        for param, argument_type in bindings:
+            engine.bind(inference.types[id(param.name)], argument_type)
+
+        engine.solve()
+
+        node_types = {
+            node_id: engine.resolve(var) for node_id, var in inference.types.items()
+        }
+        result_type = engine.resolve(inference.types[id(function)]).result
+
+        return Instantiation(
+            instantiation_id, function, argument_types, result_type, node_types
+        )
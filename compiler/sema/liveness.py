@@ -0,0 +1,418 @@
+"""
+Liveness and object end-of-lifetime (EOL)
+
+NOTES.md describes an EOL list per scope, where an object's EOL point is moved as references to
+it are found. This module computes those points with a backward dataflow analysis over the
+control-flow graph of each function:
+
+- A function's body is split into basic blocks. `IfExpr` branches and joins, and each `for` of a
+  comprehension is a loop with a header that binds its targets.
+- The variables of a function are its own declarations, numbered densely, and live sets are
+  Python ints used as bitsets, so joining and diffing them are single int operations.
+- The worklist starts in postorder, i.e. reverse postorder of the reversed graph, so most blocks
+  are visited after their successors and the fixpoint is reached in few passes.
+
+An object dies at the last use or definition after which its variable isn't live, or on an edge
+to a branch that doesn't use it. A use in a nested function counts as a use where the function
+is created, since the closure holds onto the object from there.
+
+NOTE:
+    A death at a use means the object can be freed once the value read there has been consumed.
+"""
+
+from collections import deque
+from .scope import ScopeTree, UNRESOLVED, COMPREHENSION_SCOPE, get_identifiers
+from ..parser.ast import Identifier, IfExpr, FuncExpr, Comprehension
+from ..parser.visitor import Visitor
+
+
+def iter_bits(bits):
+    """
+    Yields the indices of the bits set in `bits`, lowest first.
+    """
+    while bits:
+        lowest = bits & -bits
+        yield lowest.bit_length() - 1
+        bits ^= lowest
+
+
+class BasicBlock:
+    """
+    A straight-line run of a function. `events` holds the (variable, node, is_definition) of
+    every definition and use in the block, in evaluation order.
+    """
+
+    def __init__(self, id):
+        self.id = id
+        self.events = []
+        self.successors = []
+        self.predecessors = []
+
+    def __repr__(self):
+        return (
+            f"{type(self).__name__}(id={self.id}, events={len(self.events)}"
+            f", successors={[block.id for block in self.successors]})"
+        )
+
+
+class ControlFlowGraph:
+    def __init__(self):
+        self.blocks = []
+        self.entry = self.add_block()
+
+    def __repr__(self):
+        return f"{type(self).__name__}(blocks={len(self.blocks)})"
+
+    def add_block(self, *predecessors):
+        block = BasicBlock(len(self.blocks))
+        self.blocks.append(block)
+
+        for predecessor in predecessors:
+            self.add_edge(predecessor, block)
+
+        return block
+
+    def add_edge(self, source, target):
+        source.successors.append(target)
+        target.predecessors.append(source)
+
+    def get_reverse_postorder(self):
+        """
+        Returns the blocks reachable from the entry in reverse postorder.
+        """
+        postorder = []
+        visited = {self.entry.id}
+        stack = [(self.entry, iter(self.entry.successors))]
+
+        while stack:
+            block, successors = stack[-1]
+            successor = next(successors, None)
+
+            if successor is None:
+                stack.pop()
+                postorder.append(block)
+            elif successor.id not in visited:
+                visited.add(successor.id)
+                stack.append((successor, iter(successor.successors)))
+
+        postorder.reverse()
+        return postorder
+
+
+class CFGBuilder:
+    """
+    Builds the control-flow graph of the function or module at `owner`, numbering the variables
+    it declares as it finds them.
+    """
+
+    def __init__(self, scopes, owner):
+        self.scopes = scopes
+        self.owner = owner
+        self.graph = ControlFlowGraph()
+        self.block = self.graph.entry
+        self.variables = []
+        self.variable_ids = {}
+
+    def get_variable(self, declaration):
+        """
+        Returns the variable id of `declaration` if `owner` declares it, else None.
+        """
+        variable = self.variable_ids.get(declaration)
+
+        if variable is None and get_owner(self.scopes, declaration) is self.owner:
+            variable = self.variable_ids[declaration] = len(self.variables)
+            self.variables.append(declaration)
+
+        return variable
+
+    def define(self, identifier):
+        declaration = self.scopes.declarations.get(identifier.index)
+        variable = None if declaration is None else self.get_variable(declaration)
+
+        if variable is not None:
+            self.block.events.append((variable, identifier, True))
+
+    def use(self, identifier, node=None):
+        declaration = self.scopes.uses.get(identifier.index, UNRESOLVED)
+
+        if declaration != UNRESOLVED:
+            variable = self.get_variable(declaration)
+
+            if variable is not None:
+                self.block.events.append((variable, identifier if node is None else node, False))
+
+    def build(self, root):
+        # Work items are nodes, and (method, *args) steps that run between them.
+        stack = [root]
+
+        while stack:
+            node = stack.pop()
+
+            if type(node) is tuple:
+                node[0](*node[1:])
+            elif isinstance(node, list):
+                stack.extend(reversed(node))
+            elif isinstance(node, Identifier):
+                self.use(node)
+            elif isinstance(node, IfExpr):
+                stack.extend(reversed(self.get_if_expr_steps(node)))
+            elif isinstance(node, Comprehension):
+                stack.extend(reversed(self.get_comprehension_steps(node)))
+            elif isinstance(node, FuncExpr):
+                self.build_func_expr(node)
+            elif node is not None:
+                stack.extend(getattr(node, field) for field in reversed(node.fields))
+
+    def build_function(self, function):
+        if function.params is not None:
+            for identifier in get_identifiers(function.params):
+                if identifier.index in self.scopes.declarations:
+                    self.define(identifier)
+
+        self.build(function.body)
+
+    def get_if_expr_steps(self, node):
+        # The block the condition branches from, and the end of the `if` branch.
+        state = [None, None]
+
+        return [
+            node.condition,
+            (self.enter_if_branch, state),
+            node.if_expr,
+            (self.enter_else_branch, state),
+            node.else_expr,
+            (self.leave_if_expr, state),
+        ]
+
+    def enter_if_branch(self, state):
+        state[0] = self.block
+        self.block = self.graph.add_block(state[0])
+
+    def enter_else_branch(self, state):
+        state[1] = self.block
+        self.block = self.graph.add_block(state[0])
+
+    def leave_if_expr(self, state):
+        self.block = self.graph.add_block(state[1], self.block)
+
+    def get_comprehension_steps(self, node):
+        """
+        Returns the steps of a comprehension's loops, nested in the order of its `for`s.
+        """
+        steps = []
+        leave_steps = []
+
+        for comprehension_for in node.comprehension_fors:
+            # The loop header and the end of the filter.
+            state = [None, None]
+            steps.extend(
+                [
+                    comprehension_for.in_expr,
+                    (self.enter_loop, comprehension_for, state),
+                    comprehension_for.where_exprs,
+                    (self.enter_loop_body, state),
+                ]
+            )
+            leave_steps.append((self.leave_loop, comprehension_for, state))
+
+        steps.append(node.expr)
+        steps.extend(reversed(leave_steps))
+
+        return steps
+
+    def enter_loop(self, comprehension_for, state):
+        header = state[0] = self.graph.add_block(self.block)
+        self.block = header
+
+        for identifier in get_identifiers(comprehension_for.for_lhs):
+            self.define(identifier)
+
+    def enter_loop_body(self, state):
+        state[1] = self.block
+        self.block = self.graph.add_block(state[1])
+
+    def leave_loop(self, comprehension_for, state):
+        header, filter_end = state
+        self.graph.add_edge(self.block, header)
+
+        if comprehension_for.where_exprs:
+            self.graph.add_edge(filter_end, header)
+
+        self.block = self.graph.add_block(header)
+
+    def build_func_expr(self, node):
+        own_declaration = None
+
+        if node.name is not None:
+            own_declaration = self.scopes.declarations.get(node.name.index)
+
+        # Default values and captured variables are read when the function is created.
+        for identifier in get_identifiers([node.params, node.body]):
+            if self.scopes.uses.get(identifier.index, UNRESOLVED) != own_declaration:
+                self.use(identifier, node)
+
+        if node.name is not None:
+            self.define(node.name)
+
+
+def get_owner(scopes, declaration):
+    """
+    Returns the FuncExpr or module root whose frame holds `declaration`.
+    """
+    scope = scopes.declaration_scopes[declaration]
+
+    while scope.kind == COMPREHENSION_SCOPE:
+        scope = scope.parent
+
+    return scope.node
+
+
+class Liveness:
+    """
+    The live variables of a function and the points where its objects die.
+
+    `deaths` maps the id of a node to the declarations whose objects die after it, and
+    `edge_deaths` maps (source block id, target block id) pairs to the declarations whose
+    objects die on that edge.
+    """
+
+    def __init__(self, graph, variables):
+        self.graph = graph
+        self.variables = variables
+        self.live_in = [0] * len(graph.blocks)
+        self.live_out = [0] * len(graph.blocks)
+        self.deaths = {}
+        self.edge_deaths = {}
+
+    def __repr__(self):
+        return (
+            f"{type(self).__name__}(blocks={len(self.graph.blocks)}"
+            f", variables={len(self.variables)})"
+        )
+
+    @staticmethod
+    def analyze(function, scopes):
+        """
+        Computes the liveness of `function`, a FuncExpr or a module root.
+        """
+        builder = CFGBuilder(scopes, function)
+
+        if isinstance(function, FuncExpr):
+            builder.build_function(function)
+        else:
+            builder.build(function.statements)
+
+        liveness = Liveness(builder.graph, builder.variables)
+        liveness.solve()
+        liveness.find_deaths()
+
+        return liveness
+
+    def get_declarations(self, bits):
+        return [self.variables[variable] for variable in iter_bits(bits)]
+
+    def get_live_in(self, block):
+        return self.get_declarations(self.live_in[block.id])
+
+    def get_live_out(self, block):
+        return self.get_declarations(self.live_out[block.id])
+
+    def get_deaths(self, node):
+        return self.deaths.get(id(node), [])
+
+    def solve(self):
+        blocks = self.graph.blocks
+        gens = [0] * len(blocks)
+        kills = [0] * len(blocks)
+
+        for block in blocks:
+            gen = kill = 0
+
+            for variable, _, is_definition in reversed(block.events):
+                bit = 1 << variable
+
+                if is_definition:
+                    gen &= ~bit
+                    kill |= bit
+                else:
+                    gen |= bit
+
+            gens[block.id] = gen
+            kills[block.id] = kill
+
+        live_in = self.live_in
+        live_out = self.live_out
+        order = self.graph.get_reverse_postorder()
+        order.reverse()
+        worklist = deque(block.id for block in order)
+        is_queued = [False] * len(blocks)
+
+        for block_id in worklist:
+            is_queued[block_id] = True
+
+        while worklist:
+            block_id = worklist.popleft()
+            is_queued[block_id] = False
+            block = blocks[block_id]
+
+            out = 0
+            for successor in block.successors:
+                out |= live_in[successor.id]
+
+            live_out[block_id] = out
+            new_in = gens[block_id] | (out & ~kills[block_id])
+
+            if new_in != live_in[block_id]:
+                live_in[block_id] = new_in
+
+                for predecessor in block.predecessors:
+                    if not is_queued[predecessor.id]:
+                        is_queued[predecessor.id] = True
+                        worklist.append(predecessor.id)
+
+    def find_deaths(self):
+        for block in self.graph.blocks:
+            live = self.live_out[block.id]
+
+            for successor in block.successors:
+                dead = live & ~self.live_in[successor.id]
+
+                if dead:
+                    self.edge_deaths[(block.id, successor.id)] = self.get_declarations(dead)
+
+            for variable, node, is_definition in reversed(block.events):
+                bit = 1 << variable
+
+                if not live & bit:
+                    self.deaths.setdefault(id(node), []).append(self.variables[variable])
+
+                if is_definition:
+                    live &= ~bit
+                else:
+                    live |= bit
+
+        # Events were scanned backwards, put the deaths at each node in evaluation order.
+        for declarations in self.deaths.values():
+            declarations.reverse()
+
+
+class FunctionCollector(Visitor):
+    def __init__(self):
+        self.functions = []
+
+    def visit_func_expr(self, node):
+        self.functions.append(node)
+
+
+def analyze_module(root, tokens, scopes=None):
+    """
+    Computes the liveness of the module at `root` and of each of its functions, keyed by node id.
+    """
+    scopes = ScopeTree.from_ast(root, tokens) if scopes is None else scopes
+    collector = FunctionCollector()
+    collector.walk(root)
+
+    return {
+        id(function): Liveness.analyze(function, scopes)
+        for function in [root, *collector.functions]
+    }
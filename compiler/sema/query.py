@@ -0,0 +1,322 @@
+"""
+Incremental queries
+
+Semantic analysis is organized as memoized queries, in the style of salsa and rust-analyzer. A
+query is a function of the database and some hashable arguments. Every query it asks for while
+running is recorded as one of its dependencies, and its result is kept with:
+- `verified_at`: the last revision the result was known to be up to date at.
+- `changed_at`: the last revision the result changed at.
+
+Inputs are set from outside and bump the revision when they change. Asking for a query whose
+result wasn't verified at the current revision first checks its dependencies, recursively: if
+none of them changed since it was verified, the old result is reused as is. Otherwise it is
+recomputed, and if the new result equals the old one, its `changed_at` is kept, so the queries
+depending on it are not recomputed either.
+
+Module statements are inputs fingerprinted with a content hash of their subtree, which covers
+token text but not token positions. Editing one function doesn't change the fingerprints of the
+others, even though their tokens moved, so their results are reused.
+"""
+
+import hashlib
+from .inference import TypeInference
+from .instantiation import bind_arguments
+from .resolution import linearize
+from .scope import ScopeTree, UNRESOLVED, get_identifiers
+from ..parser.ast import FuncExpr, Program
+
+
+class QueryError(Exception):
+    """ Represents the error raised when a query can't be answered """
+
+    def __init__(self, message):
+        super().__init__(message)
+        self.message = message
+
+    def __repr__(self):
+        return f'QueryError(message="{self.message}")'
+
+
+def get_content_hash(node, tokens):
+    """
+    Returns a digest of the tree at `node` that depends on its structure and token text, but not
+    on where its tokens are.
+    """
+    digest = hashlib.blake2b(digest_size=16)
+    update = digest.update
+    stack = [node]
+
+    while stack:
+        value = stack.pop()
+
+        if value is None:
+            update(b"\x00")
+        elif type(value) is list:
+            update(b"\x01%d," % len(value))
+            stack.extend(reversed(value))
+        else:
+            update(b"\x02%d," % value.kind)
+
+            if value.token_field is not None:
+                index = getattr(value, value.token_field)
+                data = "" if index is None else tokens[index].data
+                update(b"%d:%s" % (len(data), data.encode("utf-8", "surrogatepass")))
+
+            if value.payload_field is not None:
+                update(b"%r," % (getattr(value, value.payload_field),))
+
+            stack.extend(getattr(value, field) for field in reversed(value.fields))
+
+    return digest.digest()
+
+
+class Memo:
+    __slots__ = ("value", "fingerprint", "dependencies", "verified_at", "changed_at")
+
+    def __init__(self, value, fingerprint, dependencies, revision):
+        self.value = value
+        self.fingerprint = fingerprint
+        self.dependencies = dependencies
+        self.verified_at = revision
+        self.changed_at = revision
+
+
+class QueryDatabase:
+    """
+    Inputs and memoized queries.
+
+    Queries are defined with `define` and asked for with `get(name, *args)`. `executions` counts
+    how many times each query actually ran.
+    """
+
+    def __init__(self):
+        self.revision = 0
+        self.queries = {}
+        self.inputs = {}
+        self.memos = {}
+        # Dependencies of the queries being computed, innermost last.
+        self.active = []
+        self.computing = set()
+        self.executions = {}
+
+    def __repr__(self):
+        return (
+            f"{type(self).__name__}(revision={self.revision}, inputs={len(self.inputs)}"
+            f", memos={len(self.memos)})"
+        )
+
+    def define(self, name, function):
+        self.queries[name] = function
+
+    def set_input(self, name, args, value, fingerprint=None):
+        """
+        Sets input `name` for `args`. It only counts as changed if `fingerprint`, the value
+        itself by default, differs from the previous one.
+        """
+        key = (name, args)
+        fingerprint = value if fingerprint is None else fingerprint
+        memo = self.inputs.get(key)
+
+        if memo is not None and memo.fingerprint == fingerprint:
+            memo.value = value
+            return
+
+        self.revision += 1
+        self.inputs[key] = Memo(value, fingerprint, (), self.revision)
+
+    def get(self, name, *args):
+        key = (name, args)
+
+        if self.active:
+            self.active[-1][key] = True
+
+        memo = self.inputs.get(key)
+
+        if memo is None:
+            if name not in self.queries:
+                raise QueryError(f"Input '{name}' is not set for {args}")
+
+            memo = self.fetch(key)
+
+        return memo.value
+
+    def fetch(self, key):
+        """
+        Returns the up to date memo of query `key`, recomputing it if needed.
+        """
+        memo = self.memos.get(key)
+
+        if memo is not None and (memo.verified_at == self.revision or self.verify(memo)):
+            return memo
+
+        return self.execute(key, memo)
+
+    def verify(self, memo):
+        """
+        Marks `memo` as verified and returns True if none of its dependencies changed since it
+        was last verified.
+        """
+        for key in memo.dependencies:
+            if self.has_changed_after(key, memo.verified_at):
+                return False
+
+        memo.verified_at = self.revision
+        return True
+
+    def has_changed_after(self, key, revision):
+        memo = self.inputs.get(key)
+
+        if memo is None:
+            if key[0] not in self.queries:
+                return True
+
+            memo = self.fetch(key)
+
+        return memo.changed_at > revision
+
+    def execute(self, key, old_memo):
+        if key in self.computing:
+            raise QueryError(f"Query '{key[0]}' depends on itself for {key[1]}")
+
+        name, args = key
+        self.computing.add(key)
+        self.active.append({})
+
+        try:
+            value = self.queries[name](self, *args)
+        finally:
+            dependencies = tuple(self.active.pop())
+            self.computing.discard(key)
+
+        self.executions[name] = self.executions.get(name, 0) + 1
+        memo = Memo(value, None, dependencies, self.revision)
+
+        # Backdating: an unchanged result doesn't invalidate its dependents.
+        if old_memo is not None and old_memo.value == value:
+            memo.changed_at = old_memo.changed_at
+
+        self.memos[key] = memo
+        return memo
+
+
+def get_statement_names(db, module):
+    """
+    Returns the (name, statement index) of each named function at the top level of `module`.
+    """
+    names = []
+
+    for index in range(db.get("statement_count", module)):
+        node, tokens = db.get("statement", module, index)
+
+        if isinstance(node, FuncExpr) and node.name is not None:
+            names.append((tokens[node.name.index].data, index))
+
+    return tuple(names)
+
+
+def get_scope_of(db, module, name, before=None):
+    """
+    Returns the index of the statement declaring the top-level function `name` that is visible
+    before statement `before`, or None.
+    """
+    result = None
+
+    for declared_name, index in db.get("statement_names", module):
+        if before is not None and index >= before:
+            break
+
+        if declared_name == name:
+            result = index
+
+    return result
+
+
+def infer_statement(db, module, index, argument_types=None):
+    """
+    Returns the type of the function at statement `index`, with its parameters bound to
+    `argument_types` if given. Top-level functions it references are typed by their own queries.
+    """
+    node, tokens = db.get("statement", module, index)
+
+    if not isinstance(node, FuncExpr):
+        raise QueryError(f"Statement {index} of '{module}' is not a function")
+
+    scopes = ScopeTree.from_ast(Program([node]), tokens)
+    inference = TypeInference(tokens, scopes)
+    inference.walk(node)
+    engine = inference.engine
+
+    # Names left unresolved in the statement refer to earlier top-level functions.
+    for identifier in get_identifiers(node):
+        if scopes.uses.get(identifier.index) != UNRESOLVED:
+            continue
+
+        target = db.get("scope_of", module, tokens[identifier.index].data, index)
+
+        if target is not None:
+            engine.bind(inference.types[id(identifier)], db.get("type_of", module, target))
+
+    if argument_types is not None:
+        for param, argument_type in bind_arguments(node, argument_types):
+            engine.bind(inference.types[id(param.name)], argument_type)
+
+    engine.solve()
+    function_type = engine.resolve(inference.types[id(node)])
+
+    return function_type if argument_types is None else function_type.result
+
+
+def get_mro(db, name):
+    """
+    Returns the C3 linearization of class `name`, from the `class_bases` input of each class.
+    """
+    bases = db.get("class_bases", name)
+    return linearize(name, bases, [db.get("mro", base) for base in bases])
+
+
+class SemanticDatabase(QueryDatabase):
+    """
+    The semantic queries of a program:
+    - `statement_names(module)` and `scope_of(module, name, before)`: where top-level functions
+      are declared.
+    - `type_of(module, index)`: the type of the function at a top-level statement.
+    - `instantiate(module, index, argument_types)`: its result type for argument types.
+    - `mro(class)`: the linearization of a class.
+
+    Its inputs are set with `set_module` and `set_class`.
+    """
+
+    def __init__(self):
+        super().__init__()
+        self.define("statement_names", get_statement_names)
+        self.define("scope_of", get_scope_of)
+        self.define("type_of", infer_statement)
+        self.define("instantiate", infer_statement)
+        self.define("mro", get_mro)
+
+    def set_module(self, module, tokens, root):
+        """
+        Sets the statements of `module`, a Program parsed from `tokens`.
+        """
+        statements = root.statements
+        self.set_input("statement_count", (module,), len(statements))
+
+        for index, statement in enumerate(statements):
+            self.set_input(
+                "statement",
+                (module, index),
+                (statement, tokens),
+                get_content_hash(statement, tokens),
+            )
+
+    def set_class(self, name, bases):
+        self.set_input("class_bases", (name,), tuple(bases))
+
+    def type_of(self, module, index):
+        return self.get("type_of", module, index)
+
+    def instantiate(self, module, index, argument_types):
+        return self.get("instantiate", module, index, tuple(argument_types))
+
+    def mro(self, name):
+        return self.get("mro", name)
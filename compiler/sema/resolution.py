@@ -1,3 +1,219 @@
 """
-MRO, ...
+Method resolution order and member lookup
+
+Method resolution orders are computed with C3 linearization. Each class's linearization is
+computed once and cached, and the linearizations of its bases are reused as the sequences to
+merge, so nothing is recomputed up the hierarchy. A class with a single base simply prepends
+itself to its base's linearization.
+
+Each class also gets a member table that maps every member name visible on the class to the
+class defining it and its value, so looking up a member is one dict probe. When a class's
+linearization continues with its first base's, its table starts as a copy of that base's table.
+
+NOTE:
+    Hierarchies are walked with an explicit stack, so deep hierarchies don't hit the recursion
+    limit.
 """
+
+
+class MROError(Exception):
+    """ Represents the error raised when a class hierarchy can't be linearized """
+
+    def __init__(self, message):
+        super().__init__(message)
+        self.message = message
+
+    def __repr__(self):
+        return f'MROError(message="{self.message}")'
+
+
+def c3_merge(sequences):
+    """
+    Merges linearizations and base lists following C3. Returns the merged list or None if the
+    sequences can't be merged consistently.
+
+    Instead of scanning every tail for each candidate, it counts how many tails each class is in.
+    """
+    sequences = [sequence for sequence in sequences if sequence]
+    positions = [0] * len(sequences)
+    tail_counts = {}
+
+    for sequence in sequences:
+        for item in sequence[1:]:
+            tail_counts[item] = tail_counts.get(item, 0) + 1
+
+    result = []
+    remaining = len(sequences)
+
+    while remaining:
+        candidate = None
+
+        for sequence, position in zip(sequences, positions):
+            if position < len(sequence) and not tail_counts.get(sequence[position]):
+                candidate = sequence[position]
+                break
+
+        if candidate is None:
+            return None
+
+        result.append(candidate)
+
+        for index, sequence in enumerate(sequences):
+            position = positions[index]
+
+            if position < len(sequence) and sequence[position] == candidate:
+                position += 1
+                positions[index] = position
+
+                if position < len(sequence):
+                    tail_counts[sequence[position]] -= 1
+                else:
+                    remaining -= 1
+
+    return result
+
+
+def linearize(name, bases, base_mros):
+    """
+    Returns the linearization of class `name` as a tuple starting with the class itself, given
+    its `bases` and their linearizations in the same order.
+    """
+    if not bases:
+        return (name,)
+
+    if len(bases) == 1:
+        return (name,) + tuple(base_mros[0])
+
+    merged = c3_merge([list(mro) for mro in base_mros] + [list(bases)])
+
+    if merged is None:
+        raise MROError(
+            f"Cannot create a consistent method resolution order for class "
+            f"'{name}' with bases {', '.join(bases)}"
+        )
+
+    return (name, *merged)
+
+
+class MROResolver:
+    """
+    Classes of a program, with their linearizations and member tables computed on demand.
+
+    Classes are added by name with the names of their bases and a dict of their own members.
+    """
+
+    def __init__(self):
+        self.bases = {}
+        self.members = {}
+        self.mros = {}
+        self.member_tables = {}
+
+    def __repr__(self):
+        return f"{type(self).__name__}(classes={len(self.bases)})"
+
+    def add_class(self, name, bases=(), members=None):
+        if name in self.bases:
+            raise MROError(f"Class '{name}' is already defined")
+
+        self.bases[name] = tuple(bases)
+        self.members[name] = {} if members is None else dict(members)
+
+    def get_bases(self, name):
+        bases = self.bases.get(name)
+
+        if bases is None:
+            raise MROError(f"Class '{name}' is not defined")
+
+        return bases
+
+    def get_mro(self, name):
+        """
+        Returns the linearization of class `name` as a tuple starting with the class itself.
+        """
+        mros = self.mros
+        mro = mros.get(name)
+
+        if mro is not None:
+            return mro
+
+        # Linearize bases before the classes deriving from them.
+        visiting = set()
+        stack = [(name, False)]
+
+        while stack:
+            current, is_ready = stack.pop()
+
+            if current in mros:
+                continue
+
+            bases = self.get_bases(current)
+
+            if not is_ready:
+                if current in visiting:
+                    raise MROError(f"Class '{current}' inherits from itself")
+
+                visiting.add(current)
+                stack.append((current, True))
+                stack.extend((base, False) for base in reversed(bases) if base not in mros)
+                continue
+
+            visiting.discard(current)
+            mros[current] = linearize(current, bases, [mros[base] for base in bases])
+
+        return mros[name]
+
+    def extends_first_base(self, name):
+        """
+        Returns True if the linearization of class `name` continues with its first base's.
+        """
+        bases = self.get_bases(name)
+
+        if not bases:
+            return False
+
+        if len(bases) == 1:
+            return True
+
+        mro = self.get_mro(name)
+        base_mro = self.get_mro(bases[0])
+        return len(mro) == len(base_mro) + 1 and mro[1:] == base_mro
+
+    def get_member_table(self, name):
+        """
+        Returns a dict mapping each member name visible on class `name` to the pair of the class
+        defining it and its value.
+        """
+        table = self.member_tables.get(name)
+
+        if table is not None:
+            return table
+
+        # Build the tables of the first bases along the way, so each one starts from a copy.
+        chain = []
+        current = name
+
+        while current is not None and current not in self.member_tables:
+            chain.append(current)
+            current = self.get_bases(current)[0] if self.extends_first_base(current) else None
+
+        for current in reversed(chain):
+            if self.extends_first_base(current):
+                table = dict(self.member_tables[self.bases[current][0]])
+            else:
+                table = {}
+                for owner in reversed(self.get_mro(current)[1:]):
+                    for member, value in self.members[owner].items():
+                        table[member] = (owner, value)
+
+            for member, value in self.members[current].items():
+                table[member] = (current, value)
+
+            self.member_tables[current] = table
+
+        return self.member_tables[name]
+
+    def lookup(self, name, member):
+        """
+        Returns the (defining class, value) of `member` on class `name`, or None.
+        """
+        return self.get_member_table(name).get(member)
@@ -1,3 +1,378 @@
 """
 Declaration and usage scopes
+
+Names are interned into integer symbol ids by a `SymbolTable`, and declarations are numbered in
+the order they are found.
+
+Each scope maps the symbols visible in it to their declarations with a `PersistentMap`. A nested
+scope starts out with the map of its parent, so entering it costs nothing, and a declaration
+only copies the path to one leaf of the map. Shadowing a name is just another declaration, and
+looking a name up is a single map lookup, however deep the scope is.
+
+While the tree is built, every identifier that isn't a declaration is resolved, which gives the
+use→def index of the module.
+
+NOTE:
+    - A name is resolved against the declarations that precede it.
+    - Parameter default values are resolved in the scope enclosing the function.
+    - The names a comprehension binds are declared before any of its parts is resolved.
+
+TODO: Declarations from assignments, once the parser produces them.
 """
+
+from ..parser.ast import Identifier
+from ..parser.visitor import Visitor
+
+MODULE_SCOPE = 0
+FUNCTION_SCOPE = 1
+COMPREHENSION_SCOPE = 2
+
+UNRESOLVED = -1
+
+
+def popcount(value):
+    return bin(value).count("1")
+
+
+class _MapNode:
+    """
+    A node of a `PersistentMap` trie. `entries` holds a subnode or a (key, value) leaf for each
+    bit set in `bitmap`.
+    """
+
+    __slots__ = ("bitmap", "entries")
+
+    def __init__(self, bitmap, entries):
+        self.bitmap = bitmap
+        self.entries = entries
+
+
+def _make_node(shift, leaf0, leaf1):
+    """
+    Returns a node holding two leaves whose keys share their bits below `shift`.
+    """
+    bit0 = 1 << ((leaf0[0] >> shift) & 31)
+    bit1 = 1 << ((leaf1[0] >> shift) & 31)
+
+    if bit0 == bit1:
+        return _MapNode(bit0, (_make_node(shift + 5, leaf0, leaf1),))
+
+    entries = (leaf0, leaf1) if bit0 < bit1 else (leaf1, leaf0)
+    return _MapNode(bit0 | bit1, entries)
+
+
+class PersistentMap:
+    """
+    An immutable map from non-negative integers to values.
+
+    It is a hash array mapped trie keyed by the integers themselves, 5 bits per level. `set`
+    returns a new map sharing all the nodes of the old one except those on the path to the key.
+    """
+
+    __slots__ = ("root", "length")
+
+    def __init__(self, root=None, length=0):
+        self.root = root
+        self.length = length
+
+    def __repr__(self):
+        return f"{type(self).__name__}({dict(self.items())})"
+
+    def __len__(self):
+        return self.length
+
+    def __contains__(self, key):
+        return self.get(key, _missing) is not _missing
+
+    def get(self, key, default=None):
+        node = self.root
+        shift = 0
+
+        while node is not None:
+            bit = 1 << ((key >> shift) & 31)
+            bitmap = node.bitmap
+
+            if not bitmap & bit:
+                return default
+
+            entry = node.entries[popcount(bitmap & (bit - 1))]
+
+            if type(entry) is tuple:
+                return entry[1] if entry[0] == key else default
+
+            node = entry
+            shift += 5
+
+        return default
+
+    def set(self, key, value):
+        """
+        Returns a map with `key` bound to `value`.
+        """
+        leaf = (key, value)
+
+        if self.root is None:
+            return PersistentMap(_MapNode(1 << (key & 31), (leaf,)), 1)
+
+        # Walk down to the key, then copy the nodes on the path bottom-up.
+        path = []
+        node = self.root
+        shift = 0
+        added = True
+
+        while True:
+            bit = 1 << ((key >> shift) & 31)
+            position = popcount(node.bitmap & (bit - 1))
+            path.append((node, bit, position))
+
+            if not node.bitmap & bit:
+                entry = leaf
+                break
+
+            entry = node.entries[position]
+
+            if type(entry) is tuple:
+                if entry[0] == key:
+                    added = False
+                    entry = leaf
+                else:
+                    entry = _make_node(shift + 5, entry, leaf)
+                break
+
+            node = entry
+            shift += 5
+
+        for node, bit, position in reversed(path):
+            entries = node.entries
+
+            if node.bitmap & bit:
+                entries = entries[:position] + (entry,) + entries[position + 1 :]
+            else:
+                entries = entries[:position] + (entry,) + entries[position:]
+
+            entry = _MapNode(node.bitmap | bit, entries)
+
+        return PersistentMap(entry, self.length + added)
+
+    def items(self):
+        stack = [self.root] if self.root is not None else []
+
+        while stack:
+            for entry in reversed(stack.pop().entries):
+                if type(entry) is tuple:
+                    yield entry
+                else:
+                    stack.append(entry)
+
+
+_missing = object()
+
+EMPTY_MAP = PersistentMap()
+
+
+class SymbolTable:
+    """
+    Interns names into consecutive integer ids.
+    """
+
+    def __init__(self):
+        self.ids = {}
+        self.names = []
+
+    def __repr__(self):
+        return f"{type(self).__name__}(length={len(self.names)})"
+
+    def intern(self, name):
+        symbol = self.ids.get(name)
+
+        if symbol is None:
+            symbol = self.ids[name] = len(self.names)
+            self.names.append(name)
+
+        return symbol
+
+    def get_name(self, symbol):
+        return self.names[symbol]
+
+
+class Scope:
+    """
+    A module, function or comprehension scope.
+
+    `bindings` maps the symbols visible in the scope, including those of enclosing scopes, to
+    declaration ids. `declarations` lists the declarations made in the scope itself.
+    """
+
+    def __init__(self, id, kind, parent, node, bindings):
+        self.id = id
+        self.kind = kind
+        self.parent = parent
+        self.node = node
+        self.bindings = bindings
+        self.declarations = []
+
+    def __repr__(self):
+        return (
+            f"{type(self).__name__}(id={self.id}, kind={self.kind}"
+            f", declarations={self.declarations})"
+        )
+
+    def lookup(self, symbol):
+        """
+        Returns the declaration id `symbol` refers to in this scope or UNRESOLVED.
+        """
+        return self.bindings.get(symbol, UNRESOLVED)
+
+
+class ScopeTree:
+    """
+    The scopes and declarations of a module.
+
+    Declarations are stored as parallel lists indexed by declaration id: the symbol declared,
+    the scope declaring it and the declaring Identifier node. `uses` maps the token index of
+    every other Identifier to the declaration it refers to, or UNRESOLVED, and `declarations`
+    maps the token index of each declaring Identifier to its declaration.
+    """
+
+    def __init__(self, tokens, symbols=None):
+        self.tokens = tokens
+        self.symbols = SymbolTable() if symbols is None else symbols
+        self.scopes = []
+        self.declaration_symbols = []
+        self.declaration_scopes = []
+        self.declaration_nodes = []
+        self.declarations = {}
+        self.uses = {}
+
+    def __repr__(self):
+        return (
+            f"{type(self).__name__}(scopes={len(self.scopes)}"
+            f", declarations={len(self.declaration_nodes)})"
+        )
+
+    @staticmethod
+    def from_ast(root, tokens, symbols=None):
+        """
+        Builds the scope tree of the module at `root`.
+        """
+        tree = ScopeTree(tokens, symbols)
+        builder = ScopeBuilder(tree, tree.add_scope(MODULE_SCOPE, None, root))
+        builder.walk(root)
+
+        return tree
+
+    def add_scope(self, kind, parent, node):
+        bindings = EMPTY_MAP if parent is None else parent.bindings
+        scope = Scope(len(self.scopes), kind, parent, node, bindings)
+        self.scopes.append(scope)
+
+        return scope
+
+    def declare(self, scope, identifier):
+        """
+        Declares `identifier` in `scope`, shadowing any visible declaration of the same name.
+        Returns the declaration id.
+        """
+        symbol = self.symbols.intern(self.tokens[identifier.index].data)
+        declaration = len(self.declaration_nodes)
+
+        self.declaration_symbols.append(symbol)
+        self.declaration_scopes.append(scope)
+        self.declaration_nodes.append(identifier)
+        self.declarations[identifier.index] = declaration
+        scope.declarations.append(declaration)
+        scope.bindings = scope.bindings.set(symbol, declaration)
+
+        return declaration
+
+    def resolve(self, scope, identifier):
+        """
+        Records and returns the declaration id `identifier` refers to in `scope`.
+        """
+        symbol = self.symbols.intern(self.tokens[identifier.index].data)
+        declaration = scope.bindings.get(symbol, UNRESOLVED)
+        self.uses[identifier.index] = declaration
+
+        return declaration
+
+    def get_declaration(self, identifier):
+        """
+        Returns the declaration id of an Identifier use, or UNRESOLVED.
+        """
+        return self.uses.get(identifier.index, UNRESOLVED)
+
+    def get_name(self, declaration):
+        return self.symbols.get_name(self.declaration_symbols[declaration])
+
+
+def get_identifiers(root):
+    """
+    Returns the Identifier nodes of a target such as a comprehension's `for_lhs`.
+    """
+    result = []
+    stack = [root]
+
+    while stack:
+        value = stack.pop()
+
+        if isinstance(value, Identifier):
+            result.append(value)
+        elif isinstance(value, list):
+            stack.extend(reversed(value))
+        elif value is not None:
+            stack.extend(getattr(value, field) for field in reversed(value.fields))
+
+    return result
+
+
+class ScopeBuilder(Visitor):
+    """
+    Fills a ScopeTree by walking a module, declaring and resolving names as it goes.
+    """
+
+    def __init__(self, tree, scope):
+        self.tree = tree
+        self.scope = scope
+        # Function scopes whose parameters are being declared, innermost last.
+        self.pending = []
+        # Token indices of the Identifiers that are declarations rather than uses.
+        self.declared = set()
+
+    def declare(self, scope, identifier):
+        self.declared.add(identifier.index)
+        return self.tree.declare(scope, identifier)
+
+    def visit_identifier(self, node):
+        if node.index not in self.declared:
+            self.tree.resolve(self.scope, node)
+
+    def visit_func_expr(self, node):
+        if node.name is not None:
+            self.declare(self.scope, node.name)
+
+        scope = self.tree.add_scope(FUNCTION_SCOPE, self.scope, node)
+
+        if node.params is None:
+            self.scope = scope
+        else:
+            self.pending.append(scope)
+
+    def visit_func_param(self, node):
+        self.declare(self.pending[-1], node.name)
+
+    def leave_func_params(self, node):
+        if self.pending and self.pending[-1].node.params is node:
+            self.scope = self.pending.pop()
+
+    def leave_func_expr(self, node):
+        self.scope = self.scope.parent
+
+    def visit_comprehension(self, node):
+        self.scope = self.tree.add_scope(COMPREHENSION_SCOPE, self.scope, node)
+
+        for comprehension_for in node.comprehension_fors:
+            for identifier in get_identifiers(comprehension_for.for_lhs):
+                self.declare(self.scope, identifier)
+
+    def leave_comprehension(self, node):
+        self.scope = self.scope.parent
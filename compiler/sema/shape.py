@@ -0,0 +1,243 @@
+"""
+Object shapes
+
+NOTES.md defines the fields of an object as every field attached to it through its entire
+lifetime, so `john.age = 45` after `john = Person("John")` is part of `john`'s shape from the
+start. This module collects, over the whole program, the fields assigned to the objects of each
+allocation site, and fixes their layout so objects are allocated at their final size and never
+grow at runtime.
+
+Sites and the values they flow to share InferenceEngine variables, and fields are `has_field`
+constraints on them, so the open record a site resolves to lists every field assigned through
+any variable it reaches. Sites whose objects meet in one variable get the same layout, as code
+reading a field through that variable must find it at one offset.
+
+A layout starts with the object's type tag. Fields accessed the most, as many as fit in the first
+cache line, come first, then the others. Each group is ordered by decreasing alignment, which
+leaves no padding between fields of the same group.
+"""
+
+from .inference import InferenceEngine
+from .types import PrimitiveType, RecordType, UnionType, TypeVariable, INT, FLOAT, COMPLEX, BOOL
+
+POINTER_SIZE = 8
+# The type tag at the start of every object.
+HEADER_SIZE = 8
+CACHE_LINE_SIZE = 64
+
+# (size, alignment) of values stored inline. Other values are stored as references.
+INLINE_SIZES = {INT: (8, 8), FLOAT: (8, 8), COMPLEX: (16, 8), BOOL: (1, 1)}
+# Values of unions and of unknown types carry a tag next to them.
+TAGGED_SIZE = (16, 8)
+
+
+def get_size(type):
+    """
+    Returns the (size, alignment) of a field of type `type`.
+    """
+    if isinstance(type, PrimitiveType):
+        return INLINE_SIZES.get(type, (POINTER_SIZE, POINTER_SIZE))
+
+    if isinstance(type, (UnionType, TypeVariable)):
+        return TAGGED_SIZE
+
+    return (POINTER_SIZE, POINTER_SIZE)
+
+
+def align(offset, alignment):
+    return (offset + alignment - 1) // alignment * alignment
+
+
+class Field:
+    def __init__(self, name, type, offset, size, alignment):
+        self.name = name
+        self.type = type
+        self.offset = offset
+        self.size = size
+        self.alignment = alignment
+
+    def __repr__(self):
+        return (
+            f"{type(self).__name__}(name={self.name!r}, type={self.type}"
+            f", offset={self.offset}, size={self.size})"
+        )
+
+
+class ObjectLayout:
+    """
+    The fields of an object in memory order. `names` lists them in the order they were first
+    assigned, which is the order `vars` shows them in.
+    """
+
+    def __init__(self, fields, names, size, alignment):
+        self.fields = fields
+        self.names = names
+        self.size = size
+        self.alignment = alignment
+        self.offsets = {field.name: field.offset for field in fields}
+
+    def __repr__(self):
+        return (
+            f"{type(self).__name__}(fields={[field.name for field in self.fields]}"
+            f", size={self.size})"
+        )
+
+    def get_offset(self, name):
+        return self.offsets.get(name)
+
+
+def compute_layout(fields, hotness=None, order=None):
+    """
+    Returns the ObjectLayout of `fields`, a list of (name, type), given the number of accesses
+    to each field by name in `hotness` and their first-assignment rank by name in `order`.
+    """
+    hotness = {} if hotness is None else hotness
+    order = {} if order is None else order
+    fields = [(name, type, *get_size(type)) for name, type in fields]
+    hot = set()
+    used = HEADER_SIZE
+
+    for name, _, size, _ in sorted(fields, key=lambda field: -hotness.get(field[0], 0)):
+        if hotness.get(name, 0) == 0 or used + size > CACHE_LINE_SIZE:
+            break
+
+        hot.add(name)
+        used += size
+
+    fields.sort(
+        key=lambda field: (
+            field[0] not in hot,
+            -field[3],
+            -hotness.get(field[0], 0),
+            order.get(field[0], len(order)),
+            field[0],
+        )
+    )
+
+    layout_fields = []
+    offset = HEADER_SIZE
+    alignment = HEADER_SIZE
+
+    for name, type, size, field_alignment in fields:
+        offset = align(offset, field_alignment)
+        layout_fields.append(Field(name, type, offset, size, field_alignment))
+        offset += size
+        alignment = max(alignment, field_alignment)
+
+    names = sorted(
+        (field[0] for field in fields), key=lambda name: (order.get(name, len(order)), name)
+    )
+
+    return ObjectLayout(layout_fields, names, align(offset, alignment), alignment)
+
+
+class ShapeAnalysis:
+    """
+    Collects the fields assigned to the objects of each allocation site.
+
+    Sites are added with `add_site`, flows of objects between variables with `flow`, field
+    assignments with `add_field` and field reads and writes with `add_access`. `get_layouts`
+    then returns the layout of every site.
+    """
+
+    def __init__(self, engine=None):
+        self.engine = InferenceEngine() if engine is None else engine
+        # Type variables of allocation sites, keyed by site.
+        self.sites = {}
+        # Access counts, keyed by (variable, field name).
+        self.accesses = {}
+        # Position of the first assignment of each field name, by variable.
+        self.field_orders = {}
+        self.assignment_count = 0
+        self.layouts = None
+
+    def __repr__(self):
+        return f"{type(self).__name__}(sites={len(self.sites)})"
+
+    def add_site(self, site, fields=()):
+        """
+        Adds allocation site `site`, whose objects are constructed with `fields`, a list of
+        (name, type), and returns its variable.
+        """
+        var = self.sites[site] = self.engine.fresh()
+
+        for name, type in fields:
+            self.add_field(var, name, self.engine.from_type(type))
+
+        return var
+
+    def flow(self, target, value):
+        """
+        Objects of variable `value` flow to variable `target`, as in `target = value`.
+        """
+        self.engine.equal(target, value)
+
+    def add_field(self, var, name, value):
+        """
+        Field `name` of the objects of `var` is assigned a value of variable `value`.
+        """
+        order = self.field_orders.setdefault(var, {})
+
+        if name not in order:
+            order[name] = self.assignment_count
+            self.assignment_count += 1
+
+        self.engine.has_field(var, name, value)
+        self.add_access(var, name)
+
+    def add_access(self, var, name, count=1):
+        """
+        Field `name` of the objects of `var` is accessed `count` times, e.g. the estimated trip
+        count of the loop it's accessed in.
+        """
+        key = (var, name)
+        self.accesses[key] = self.accesses.get(key, 0) + count
+
+    def get_layouts(self):
+        """
+        Returns a dict mapping each site to the ObjectLayout of its objects.
+        """
+        engine = self.engine
+        engine.solve()
+
+        hotness = {}
+        for (var, name), count in self.accesses.items():
+            root_hotness = hotness.setdefault(engine.find(var), {})
+            root_hotness[name] = root_hotness.get(name, 0) + count
+
+        # Objects meeting in one variable share a layout, so their fields are ordered by their
+        # first assignment through any of its variables.
+        positions = {}
+        for var, order in self.field_orders.items():
+            root_positions = positions.setdefault(engine.find(var), {})
+
+            for name, position in order.items():
+                root_positions[name] = min(position, root_positions.get(name, position))
+
+        root_layouts = {}
+        layouts = {}
+
+        for site, var in self.sites.items():
+            root = engine.find(var)
+            layout = root_layouts.get(root)
+
+            if layout is None:
+                type = engine.resolve(root)
+                fields = type.fields if isinstance(type, RecordType) else ()
+                root_positions = positions.get(root, {})
+                order = {
+                    name: rank
+                    for rank, name in enumerate(sorted(root_positions, key=root_positions.get))
+                }
+                layout = root_layouts[root] = compute_layout(fields, hotness.get(root), order)
+
+            layouts[site] = layout
+
+        self.layouts = layouts
+        return layouts
+
+    def get_layout(self, site):
+        if self.layouts is None:
+            self.get_layouts()
+
+        return self.layouts[site]
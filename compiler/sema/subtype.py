@@ -0,0 +1,141 @@
+"""
+Subtyping and structural conformance
+
+Viper compares types by structure, as NOTES.md describes:
+- A record conforms to an open record if it has all of its fields, e.g. `Person [ age: int,
+  name: str ]` passes where `Object [ name: str, * ]` is expected. A closed record needs exactly
+  the same fields.
+- Record fields and list elements are covariant.
+- Functions are contravariant in their parameters and covariant in their result.
+- A union is a subtype of a type if all its members are, and a type is a subtype of a union if
+  it is a subtype of one of its members.
+
+Types are interned, so results are cached per (subtype, supertype) pair, and negative results
+are cached too.
+
+Named types can refer to themselves. A check that reaches a pair it is already checking assumes
+it holds, which is the usual coinductive reading of recursive types. Results that relied on such
+an assumption are only cached once the outermost check succeeds.
+"""
+
+from .types import (
+    ListType,
+    RecordType,
+    FunctionType,
+    UnionType,
+    NamedType,
+)
+
+
+class SubtypeChecker:
+    """
+    Answers subtype questions, resolving named types with `definitions`, a dict mapping names to
+    types.
+    """
+
+    def __init__(self, definitions=None):
+        self.definitions = {} if definitions is None else definitions
+        self.cache = {}
+        # Pairs being checked, and positive results that depend on them.
+        self.assumptions = set()
+        self.pending = []
+
+    def __repr__(self):
+        return f"{type(self).__name__}(cache={len(self.cache)})"
+
+    def is_subtype(self, subtype, supertype):
+        """
+        Returns True if a value of `subtype` can be used where `supertype` is expected.
+        """
+        if subtype is supertype:
+            return True
+
+        key = (subtype, supertype)
+        result = self.cache.get(key)
+
+        if result is not None:
+            return result
+
+        if key in self.assumptions:
+            return True
+
+        is_outermost = not self.assumptions
+        start = len(self.pending)
+        self.assumptions.add(key)
+
+        try:
+            result = self.check(subtype, supertype)
+        finally:
+            self.assumptions.discard(key)
+
+        if not result:
+            # Negative results hold whatever was assumed, but the positive results found while
+            # checking this pair may have assumed it holds.
+            self.cache[key] = False
+            del self.pending[start:]
+        elif is_outermost:
+            self.cache[key] = True
+            for pending_key in self.pending:
+                self.cache[pending_key] = True
+            self.pending.clear()
+        else:
+            self.pending.append(key)
+
+        return result
+
+    def check(self, subtype, supertype):
+        if isinstance(subtype, NamedType):
+            subtype = self.definitions.get(subtype.name)
+            return subtype is not None and self.is_subtype(subtype, supertype)
+
+        if isinstance(supertype, NamedType):
+            supertype = self.definitions.get(supertype.name)
+            return supertype is not None and self.is_subtype(subtype, supertype)
+
+        if isinstance(subtype, UnionType):
+            return all(self.is_subtype(member, supertype) for member in subtype.members)
+
+        if isinstance(supertype, UnionType):
+            return any(self.is_subtype(subtype, member) for member in supertype.members)
+
+        if type(subtype) is not type(supertype):
+            return False
+
+        if isinstance(subtype, ListType):
+            return self.is_subtype(subtype.element, supertype.element)
+
+        if isinstance(subtype, FunctionType):
+            return (
+                len(subtype.params) == len(supertype.params)
+                and all(
+                    self.is_subtype(expected, param)
+                    for param, expected in zip(subtype.params, supertype.params)
+                )
+                and self.is_subtype(subtype.result, supertype.result)
+            )
+
+        if isinstance(subtype, RecordType):
+            return self.conforms(subtype, supertype)
+
+        # Primitives and type variables are interned, so different instances are different types.
+        return False
+
+    def conforms(self, record, expected):
+        """
+        Returns True if `record` has the fields `expected` asks for.
+        """
+        if record.is_open and not expected.is_open:
+            return False
+
+        if not expected.is_open and len(record.fields) != len(expected.fields):
+            return False
+
+        fields = dict(record.fields)
+
+        for name, expected_type in expected.fields:
+            field_type = fields.get(name)
+
+            if field_type is None or not self.is_subtype(field_type, expected_type):
+                return False
+
+        return True
@@ -2,4 +2,256 @@
 Type and function templates
 
 Templates are abstractions at the compiler level.
+
+Templates are expanded on demand. Defining one only records it, and its definition can even be
+a function that loads it, so the templates of an imported library are never analyzed unless a
+reachable call site or type reference asks for them.
+
+Requesting a template with some arguments returns its instance right away and queues the
+instance for expansion. Instances are keyed by the template's name and its arguments, which are
+interned types, so each distinct instantiation is expanded once. Expanding a type template
+substitutes its arguments for its parameters, and every `GenericType` met on the way is itself
+requested, which is how instantiation spreads from the roots to what they use.
+
+An instance of a type template is referred to by a `NamedType` named after it, e.g.
+`IdentityFunc{int}`, and `definitions` maps those names to the expanded types. This lets a
+template refer to itself, and `definitions` can be given to a `SubtypeChecker` as is.
+
+```py
+typealias IdentityFunc{T} = (T) -> T
+```
 """
+
+from collections import deque
+from .types import (
+    ListType,
+    RecordType,
+    UnionType,
+    FunctionType,
+    NamedType,
+    GenericType,
+    make_union,
+)
+
+TYPE_TEMPLATE = 0
+FUNCTION_TEMPLATE = 1
+
+
+class TemplateError(Exception):
+    """ Represents the error raised when a template can't be instantiated """
+
+    def __init__(self, message):
+        super().__init__(message)
+        self.message = message
+
+    def __repr__(self):
+        return f'TemplateError(message="{self.message}")'
+
+
+class Template:
+    """
+    A generic type or function.
+
+    `definition` is a type for type templates, where parameters appear as NamedTypes, and a
+    FuncExpr for function templates, which are instantiated with `table`, an InstantiationTable
+    of their module. It can also be a function returning the definition.
+    """
+
+    def __init__(self, kind, name, params, definition, table=None):
+        self.kind = kind
+        self.name = name
+        self.params = tuple(params)
+        self.definition = definition
+        self.table = table
+
+    def __repr__(self):
+        return f"{type(self).__name__}(name={self.name}, params={self.params})"
+
+    def get_definition(self):
+        if callable(self.definition):
+            self.definition = self.definition()
+
+        return self.definition
+
+
+class TemplateInstance:
+    """
+    A template applied to arguments. `result` is the NamedType standing for an instance of a type
+    template, and the Instantiation of an instance of a function template once it is expanded.
+    """
+
+    def __init__(self, template, arguments, result=None):
+        self.template = template
+        self.arguments = arguments
+        self.result = result
+        self.is_expanded = False
+
+    def __repr__(self):
+        return (
+            f"{type(self).__name__}(name={self.template.name}, arguments={self.arguments}"
+            f", is_expanded={self.is_expanded})"
+        )
+
+
+class TemplateRegistry:
+    """
+    The templates of a program and the instances requested so far.
+
+    `max_instances` bounds the number of instances, since a template that requests itself with
+    ever larger arguments would never stop expanding.
+    """
+
+    def __init__(self, max_instances=100_000):
+        self.max_instances = max_instances
+        self.templates = {}
+        self.instances = {}
+        self.definitions = {}
+        self.worklist = deque()
+
+    def __repr__(self):
+        return (
+            f"{type(self).__name__}(templates={len(self.templates)}"
+            f", instances={len(self.instances)})"
+        )
+
+    def define(self, template):
+        if template.name in self.templates:
+            raise TemplateError(f"Template '{template.name}' is already defined")
+
+        self.templates[template.name] = template
+
+    def define_type(self, name, params, definition):
+        self.define(Template(TYPE_TEMPLATE, name, params, definition))
+
+    def define_function(self, name, function, table):
+        """
+        Defines a generic function. Its instances are keyed by argument types.
+        """
+        self.define(Template(FUNCTION_TEMPLATE, name, (), function, table))
+
+    def request(self, name, arguments):
+        """
+        Returns the instance of template `name` for `arguments`, queueing it for expansion if
+        it is new.
+        """
+        arguments = tuple(arguments)
+        key = (name, arguments)
+        instance = self.instances.get(key)
+
+        if instance is not None:
+            return instance
+
+        template = self.templates.get(name)
+
+        if template is None:
+            raise TemplateError(f"Template '{name}' is not defined")
+
+        if template.kind == TYPE_TEMPLATE and len(arguments) != len(template.params):
+            raise TemplateError(
+                f"Template '{name}' expects {len(template.params)} arguments"
+                f", got {len(arguments)}"
+            )
+
+        if len(self.instances) >= self.max_instances:
+            raise TemplateError(f"Too many template instances while instantiating '{name}'")
+
+        instance = self.instances[key] = TemplateInstance(template, arguments)
+
+        if template.kind == TYPE_TEMPLATE:
+            instance.result = NamedType(str(GenericType(name, arguments)))
+
+        self.worklist.append(instance)
+
+        return instance
+
+    def request_type(self, type):
+        """
+        Returns the NamedType standing for the expansion of GenericType `type`.
+        """
+        return self.request(type.name, type.arguments).result
+
+    def expand(self):
+        """
+        Expands the queued instances and those they request in turn.
+
+        If an expansion fails, the instances expanded or queued since the last successful
+        expansion are dropped, so requesting them again expands them again.
+        """
+        expanded = []
+
+        try:
+            while self.worklist:
+                instance = self.worklist.popleft()
+                template = instance.template
+
+                if template.kind == TYPE_TEMPLATE:
+                    mapping = dict(zip(template.params, instance.arguments))
+                    self.definitions[instance.result.name] = self.substitute(
+                        template.get_definition(), mapping
+                    )
+                else:
+                    instance.result = template.table.instantiate(
+                        template.get_definition(), instance.arguments
+                    )
+
+                instance.is_expanded = True
+                expanded.append(instance)
+        except Exception:
+            self.discard(expanded)
+            raise
+
+    def discard(self, expanded):
+        """
+        Drops the instances in `expanded` and those not expanded yet.
+        """
+        for instance in expanded:
+            instance.is_expanded = False
+
+            if instance.template.kind == TYPE_TEMPLATE:
+                self.definitions.pop(instance.result.name, None)
+
+        self.instances = {
+            key: instance for key, instance in self.instances.items() if instance.is_expanded
+        }
+        self.worklist.clear()
+
+    def instantiate(self, name, arguments):
+        """
+        Requests an instance and expands everything it needs.
+        """
+        instance = self.request(name, arguments)
+        self.expand()
+
+        return instance
+
+    def substitute(self, type, mapping):
+        """
+        Returns `type` with the NamedTypes in `mapping` replaced, requesting the instances of
+        the GenericTypes it contains.
+        """
+        if isinstance(type, NamedType):
+            return mapping.get(type.name, type)
+
+        if isinstance(type, GenericType):
+            arguments = [self.substitute(argument, mapping) for argument in type.arguments]
+            return self.request(type.name, arguments).result
+
+        if isinstance(type, ListType):
+            return ListType(self.substitute(type.element, mapping))
+
+        if isinstance(type, RecordType):
+            return RecordType(
+                [(name, self.substitute(field, mapping)) for name, field in type.fields],
+                type.is_open,
+            )
+
+        if isinstance(type, UnionType):
+            return make_union(self.substitute(member, mapping) for member in type.members)
+
+        if isinstance(type, FunctionType):
+            return FunctionType(
+                [self.substitute(param, mapping) for param in type.params],
+                self.substitute(type.result, mapping),
+            )
+
+        return type
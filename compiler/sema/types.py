@@ -0,0 +1,252 @@
+"""
+Viper's structural types
+
+Types are printed the way NOTES.md writes them: `int`, `list{int}`, `int | str`, `(int) -> int`
+and `Object [ name: str, age: int ]`.
+
+Types are hash-consed: constructing a type returns the one instance of it held by the
+`TypeInterner`. Record fields are sorted by name and union members by type id first, so
+structurally equal types always get the same key. Equality is identity and hashes are computed
+once, which makes types cheap keys for caches of instantiations, subtype checks and layouts.
+"""
+
+
+class TypeInterner:
+    """
+    Holds the single instance of every type created so far.
+    """
+
+    def __init__(self):
+        self.table = {}
+
+    def __repr__(self):
+        return f"{type(self).__name__}(length={len(self.table)})"
+
+    def __len__(self):
+        return len(self.table)
+
+    def intern(self, cls, key, attributes):
+        """
+        Returns the type of class `cls` with canonical `key`, creating it from `attributes` if
+        it doesn't exist yet.
+        """
+        table_key = (cls, key)
+        type = self.table.get(table_key)
+
+        if type is None:
+            type = object.__new__(cls)
+            object.__setattr__(type, "hash_value", hash(table_key))
+            object.__setattr__(type, "type_id", len(self.table))
+            for name, value in attributes.items():
+                object.__setattr__(type, name, value)
+            self.table[table_key] = type
+
+        return type
+
+
+interner = TypeInterner()
+
+
+class Type:
+    """
+    NOTE:
+        Types are immutable and unique, so they compare by identity. Two record types with the
+        same fields are the same type, whatever class they were made from.
+    """
+
+    __slots__ = ("hash_value", "type_id")
+
+    def __repr__(self):
+        return str(self)
+
+    def __hash__(self):
+        return self.hash_value
+
+    def __setattr__(self, name, value):
+        raise AttributeError(f"{type(self).__name__} is immutable")
+
+    def __delattr__(self, name):
+        raise AttributeError(f"{type(self).__name__} is immutable")
+
+    def __reduce__(self):
+        # Unpickled types are interned again.
+        return type(self), self.get_args()
+
+    def get_args(self):
+        raise NotImplementedError
+
+
+class PrimitiveType(Type):
+    __slots__ = ("name",)
+
+    def __new__(cls, name):
+        return interner.intern(cls, name, {"name": name})
+
+    def __str__(self):
+        return self.name
+
+    def get_args(self):
+        return (self.name,)
+
+
+class ListType(Type):
+    __slots__ = ("element",)
+
+    def __new__(cls, element):
+        return interner.intern(cls, element, {"element": element})
+
+    def __str__(self):
+        return f"list{{{self.element}}}"
+
+    def get_args(self):
+        return (self.element,)
+
+
+class RecordType(Type):
+    """
+    An object type with named fields. An open record may have more fields than it lists.
+    """
+
+    __slots__ = ("fields", "is_open")
+
+    def __new__(cls, fields, is_open=False):
+        fields = tuple(sorted(fields, key=lambda field: field[0]))
+        is_open = bool(is_open)
+        return interner.intern(
+            cls, (fields, is_open), {"fields": fields, "is_open": is_open}
+        )
+
+    def __str__(self):
+        fields = [f"{name}: {type}" for name, type in self.fields]
+
+        if self.is_open:
+            fields.append("*")
+
+        return f"Object [ {', '.join(fields)} ]"
+
+    def get_args(self):
+        return self.fields, self.is_open
+
+    def get_field(self, name):
+        for field_name, field_type in self.fields:
+            if field_name == name:
+                return field_type
+
+        return None
+
+
+class UnionType(Type):
+    """
+    NOTE: Use `make_union` to build unions. It flattens nested unions and collapses a union of
+    one member into the member itself.
+    """
+
+    __slots__ = ("members",)
+
+    def __new__(cls, members):
+        members = tuple(sorted(set(members), key=lambda member: member.type_id))
+        return interner.intern(cls, members, {"members": members})
+
+    def __str__(self):
+        return " | ".join(sorted(map(str, self.members)))
+
+    def get_args(self):
+        return (self.members,)
+
+
+class FunctionType(Type):
+    __slots__ = ("params", "result")
+
+    def __new__(cls, params, result):
+        params = tuple(params)
+        return interner.intern(
+            cls, (params, result), {"params": params, "result": result}
+        )
+
+    def __str__(self):
+        return f"({', '.join(map(str, self.params))}) -> {self.result}"
+
+    def get_args(self):
+        return self.params, self.result
+
+
+class NamedType(Type):
+    """
+    A reference to a type defined elsewhere by name, such as a class. It lets types refer to
+    themselves, e.g. `Person [ name: str, friend: Person ]`.
+    """
+
+    __slots__ = ("name",)
+
+    def __new__(cls, name):
+        return interner.intern(cls, name, {"name": name})
+
+    def __str__(self):
+        return self.name
+
+    def get_args(self):
+        return (self.name,)
+
+
+class GenericType(Type):
+    """
+    An application of a type template, e.g. `IdentityFunc{int}`. It stands for the type the
+    template expands to with these arguments.
+    """
+
+    __slots__ = ("name", "arguments")
+
+    def __new__(cls, name, arguments):
+        arguments = tuple(arguments)
+        return interner.intern(
+            cls, (name, arguments), {"name": name, "arguments": arguments}
+        )
+
+    def __str__(self):
+        return f"{self.name}{{{', '.join(map(str, self.arguments))}}}"
+
+    def get_args(self):
+        return self.name, self.arguments
+
+
+class TypeVariable(Type):
+    """
+    A type inference couldn't determine yet.
+    """
+
+    __slots__ = ("id",)
+
+    def __new__(cls, id):
+        return interner.intern(cls, id, {"id": id})
+
+    def __str__(self):
+        return f"T{self.id}"
+
+    def get_args(self):
+        return (self.id,)
+
+
+INT = PrimitiveType("int")
+FLOAT = PrimitiveType("float")
+COMPLEX = PrimitiveType("complex")
+STR = PrimitiveType("str")
+BYTES = PrimitiveType("bytes")
+BOOL = PrimitiveType("bool")
+
+
+def make_union(members):
+    """
+    Returns the union of `members`, flattening nested unions. A single member is returned as is.
+    """
+    flattened = set()
+
+    for member in members:
+        if isinstance(member, UnionType):
+            flattened.update(member.members)
+        else:
+            flattened.add(member)
+
+    if len(flattened) == 1:
+        return next(iter(flattened))
+
+    return UnionType(flattened)
@@ -0,0 +1,59 @@
+from compiler.parser.arena import ASTArena, NONE_KIND, LIST_KIND
+from compiler.parser.parser import Parser
+from compiler.parser.ast import (
+    Identifier,
+    Integer,
+    Operator,
+    UnaryExpr,
+    BinaryExpr,
+    FuncExpr,
+    FuncParams,
+    FuncParam,
+    ComprehensionFor,
+)
+
+
+def test_arena_flattens_ast_in_preorder_successfully():
+    ast = BinaryExpr(Integer(0), Operator(1), UnaryExpr(Integer(3), Operator(2)))
+    arena = ASTArena.from_ast(ast)
+
+    assert list(arena.kinds) == [14, 5, 12, 13, 5, 12]
+    assert list(arena.first_child) == [1, -1, -1, 4, -1, -1]
+    assert list(arena.next_sibling) == [-1, 2, 3, -1, 5, -1]
+    assert list(arena.tokens) == [-1, 0, 1, -1, 3, 2]
+    assert list(arena.payloads) == [-1, -1, -1, -1, -1, -1]
+
+
+def test_arena_stores_lists_nones_and_payloads_successfully():
+    ast = ComprehensionFor(Identifier(1), Integer(3), [Integer(5), Integer(7)], True)
+    arena = ASTArena.from_ast(ast)
+    func = ASTArena.from_ast(FuncExpr(None, None, []))
+
+    assert list(arena.kinds) == [21, 4, 5, LIST_KIND, 5, 5]
+    assert arena.payloads[0] == 1
+    assert list(func.kinds) == [18, NONE_KIND, NONE_KIND, LIST_KIND]
+
+
+def test_arena_views_present_ast_interfaces_successfully():
+    ast = Parser.from_code("1 + 2 * 3").parse_program()
+    arena = ASTArena.from_ast(ast)
+    statement = arena.view().statements[0]
+
+    assert type(statement).__name__ == "BinaryExprView"
+    assert statement.lhs.index == 0
+    assert statement.op.op == 1
+    assert statement.op.second_token is None
+    assert statement.rhs.lhs.index == 2
+    assert statement.rhs.to_ast() == BinaryExpr(Integer(2), Operator(3), Integer(4))
+
+
+def test_arena_materializes_same_ast_successfully():
+    ast0 = Parser.from_code("1 + 2 * 3\n-4 // 5").parse_program()
+    ast1 = FuncExpr(
+        None,
+        FuncParams([FuncParam(Identifier(1), None, None, Integer(3))], None, [], None),
+        [BinaryExpr(Identifier(5), Operator(6, 7), Integer(8))],
+    )
+
+    assert ASTArena.from_ast(ast0).to_ast() == ast0
+    assert ASTArena.from_ast(ast1).to_ast() == ast1
@@ -0,0 +1,146 @@
+from compiler.lexer.lexer import Lexer
+from compiler.sema.bounds import (
+    BoundsAnalysis,
+    ZERO,
+    CHECKED,
+    IN_BOUNDS,
+    NEGATIVE_IN_BOUNDS,
+    HOISTED,
+    get_length,
+)
+from compiler.parser.literals import LiteralTable
+from compiler.sema.scope import ScopeTree
+from compiler.parser.ast import (
+    BinaryOpKind,
+    Identifier,
+    Integer,
+    Operator,
+    BinaryExpr,
+    FuncParam,
+    FuncParams,
+    FuncExpr,
+    Program,
+)
+
+XS = 0
+INDEX = 1
+N = 2
+J = 3
+
+
+def test_bounds_analysis_proves_range_loop_indices_successfully():
+    analysis = BoundsAnalysis()
+    loop = analysis.enter_loop(INDEX, (ZERO, 0), (get_length(XS), 0))
+
+    assert analysis.check_index("xs[i]", XS, (INDEX, 0)) == IN_BOUNDS
+    assert analysis.check_index("xs[-1]", XS, (ZERO, -1)) == NEGATIVE_IN_BOUNDS
+    assert analysis.check_index("xs[i + 1]", XS, (INDEX, 1)) == HOISTED
+    assert analysis.check_index("xs[n]", XS, (N, 0)) == CHECKED
+
+    [check] = analysis.hoisted_checks[loop.id]
+    assert (check.sequence, check.low, check.high) == (XS, (ZERO, 1), (get_length(XS), 0))
+    # xs may be empty, in which case the loop doesn't run.
+    assert check.needs_guard
+
+    analysis.pop()
+
+    node = Identifier(0)
+    assert analysis.check_index(node, XS, (INDEX, 0)) == CHECKED
+    assert analysis.check_index("xs[-1]", XS, (ZERO, -1)) == CHECKED
+    assert analysis.verdicts[id(node)] == CHECKED
+
+
+def test_bounds_analysis_uses_guard_conditions_successfully():
+    tokens = Lexer("lambda xs, i, n: 0 <= i and i < n").lex()
+    condition = BinaryExpr(
+        BinaryExpr(Integer(7), Operator(8), Identifier(9)),
+        Operator(10),
+        BinaryExpr(Identifier(11), Operator(12), Identifier(13)),
+    )
+    params = FuncParams(
+        [FuncParam(Identifier(index), None, None, None) for index in (1, 3, 5)], None, [], None
+    )
+    program = Program([FuncExpr(None, params, [condition])])
+    analysis = BoundsAnalysis(
+        ScopeTree.from_ast(program, tokens), LiteralTable.from_ast(program, tokens)
+    )
+    # n = len(xs)
+    analysis.assume((N, 0), BinaryOpKind.EQUAL, (get_length(XS), 0))
+
+    analysis.push()
+    analysis.assume_condition(condition)
+    assert analysis.check_index(condition.lhs, XS, (INDEX, 0)) == IN_BOUNDS
+    assert analysis.check_index(condition.rhs, XS, (INDEX, -1)) == CHECKED
+    analysis.pop()
+
+    analysis.push()
+    analysis.assume_condition(condition, negate=True)
+    assert analysis.check_index(condition, XS, (INDEX, 0)) == CHECKED
+    analysis.pop()
+
+    analysis.push()
+    analysis.assume_condition(condition.rhs, negate=True)
+    assert analysis.proves((N, 0), (INDEX, 0))
+    assert analysis.proves((get_length(XS), 0), (INDEX, 0))
+    analysis.pop()
+
+
+def test_bounds_analysis_handles_contradictory_facts_successfully():
+    analysis = BoundsAnalysis()
+    analysis.assume((INDEX, 0), BinaryOpKind.LESSER_THAN, (ZERO, 0))
+    analysis.assume((INDEX, 0), BinaryOpKind.GREATER_THAN, (ZERO, 5))
+
+    assert analysis.check_index("xs[i]", XS, (INDEX, 0)) == IN_BOUNDS
+
+
+def test_bounds_analysis_guards_hoisted_checks_of_empty_loops_successfully():
+    analysis = BoundsAnalysis()
+    loop = analysis.enter_loop(INDEX, (ZERO, 0), (N, 0))
+
+    assert analysis.check_index("xs[i]", XS, (INDEX, 0)) == HOISTED
+    assert analysis.hoisted_checks[loop.id][0].needs_guard
+
+    analysis.pop()
+    # 1 <= n
+    analysis.assume((ZERO, 1), BinaryOpKind.EQUAL_LESSER_THAN, (N, 0))
+    loop = analysis.enter_loop(INDEX, (ZERO, 0), (N, 0))
+
+    assert analysis.check_index("xs[i]", XS, (INDEX, 0)) == HOISTED
+    assert not analysis.hoisted_checks[loop.id][0].needs_guard
+
+
+def test_bounds_analysis_keeps_conditional_accesses_checked_successfully():
+    analysis = BoundsAnalysis()
+    loop = analysis.enter_loop(INDEX, (ZERO, 0), (N, 0))
+
+    # if ...: xs[i]
+    analysis.push()
+    assert analysis.check_index("xs[i]", XS, (INDEX, 0)) == CHECKED
+    analysis.pop()
+
+    # for j in range(n): xs[i]
+    analysis.enter_loop(J, (ZERO, 0), (N, 0))
+    assert analysis.check_index("xs[i]", XS, (INDEX, 0)) == CHECKED
+    analysis.pop()
+
+    assert loop.id not in analysis.hoisted_checks
+
+
+def test_bounds_analysis_versions_loops_with_hoisted_checks_successfully():
+    analysis = BoundsAnalysis()
+    # for i in range(n): xs[i + 1]; if ...: break
+    loop = analysis.enter_loop(INDEX, (ZERO, 0), (N, 0))
+
+    assert analysis.check_index("xs[i + 1]", XS, (INDEX, 1)) == HOISTED
+    assert analysis.check_index("xs[i]", XS, (INDEX, 0)) == HOISTED
+    analysis.pop()
+
+    length = (get_length(XS), 0)
+    # Failing these runs the checked loop instead, which may break before reaching xs[n].
+    assert analysis.get_fast_version_condition(loop) == [
+        ((ZERO, 0), BinaryOpKind.EQUAL_LESSER_THAN, (ZERO, 1)),
+        ((N, 0), BinaryOpKind.LESSER_THAN, length),
+        ((ZERO, 0), BinaryOpKind.EQUAL_LESSER_THAN, (ZERO, 0)),
+        ((N, -1), BinaryOpKind.LESSER_THAN, length),
+    ]
+    assert analysis.get_fast_version_condition(analysis.enter_loop(J, (ZERO, 0), (N, 0))) == []
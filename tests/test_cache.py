@@ -0,0 +1,66 @@
+import os
+from compiler.parser import cache as cache_module
+from compiler.parser.cache import ParseCache, get_compiler_hash
+from compiler.parser.parser import Parser
+
+
+def test_parse_cache_reuses_stored_program_successfully(tmp_path):
+    cache = ParseCache(str(tmp_path))
+    code = "1 + 2\n3 * 4"
+
+    parser0 = Parser.from_code(code, cache=cache)
+    result0 = parser0.parse_program()
+    parser1 = Parser.from_code(code, cache=cache)
+
+    assert parser1.cache == {-1: {"parse_program": (result0, len(parser0.tokens) - 1)}}
+    assert parser1.tokens == parser0.tokens
+    assert parser1.parse_program() == result0
+
+
+def test_parse_cache_ignores_corrupted_entries_successfully(tmp_path):
+    cache = ParseCache(str(tmp_path))
+    code = "1 + 2"
+
+    Parser.from_code(code, cache=cache).parse_program()
+    path = cache.get_path(cache.get_key(code))
+
+    with open(path, "r+b") as file:
+        file.seek(-1, os.SEEK_END)
+        file.write(b"\x00")
+
+    assert cache.load(code) is None
+    assert cache.load("3 + 4") is None
+
+
+def test_parse_cache_evicts_least_recently_used_entries_successfully(tmp_path):
+    cache = ParseCache(str(tmp_path), max_entries=2)
+
+    for index, code in enumerate(["1", "2"]):
+        Parser.from_code(code, cache=cache).parse_program()
+        os.utime(cache.get_path(cache.get_key(code)), (index, index))
+
+    cache.load("1")
+    Parser.from_code("3", cache=cache).parse_program()
+
+    assert cache.load("1") is not None
+    assert cache.load("2") is None
+    assert cache.load("3") is not None
+
+
+def test_parse_cache_ignores_entries_of_other_compiler_sources_successfully(tmp_path, monkeypatch):
+    cache = ParseCache(str(tmp_path))
+    code = "1 + 2"
+    parser = Parser.from_code(code)
+    cache.store(code, parser.tokens, parser.parse_program())
+
+    assert cache.load(code) is not None
+
+    # As if parser.py had changed.
+    monkeypatch.setattr(cache_module, "_compiler_hash", bytes(32))
+
+    assert cache.load(code) is None
+
+    monkeypatch.setattr(cache_module, "_compiler_hash", None)
+
+    assert get_compiler_hash() != bytes(32)
+    assert cache.load(code) is not None
@@ -0,0 +1,151 @@
+from concurrent.futures import ThreadPoolExecutor
+from threading import Event
+from compiler.lexer.lexer import Lexer
+from compiler.sema import callgraph
+from compiler.sema.callgraph import CallGraph, find_components, get_nodes
+from compiler.sema.types import INT, FunctionType
+from compiler.parser.ast import (
+    Identifier,
+    Integer,
+    Operator,
+    BinaryExpr,
+    IfExpr,
+    FuncParam,
+    FuncParams,
+    FuncExpr,
+    Program,
+)
+
+
+def make_function(name, param, body):
+    params = FuncParams([FuncParam(Identifier(param), None, None, None)], None, [], None)
+    return FuncExpr(Identifier(name), params, [body])
+
+
+def make_module():
+    tokens = Lexer(
+        "f x , x + 1 , g y , f , h z , z if k else z , k w , w if h else w , m v , v"
+    ).lex()
+    program = Program(
+        [
+            make_function(0, 1, BinaryExpr(Identifier(3), Operator(4), Integer(5))),
+            make_function(7, 8, Identifier(10)),
+            make_function(12, 13, IfExpr(Identifier(15), Identifier(17), Identifier(19))),
+            make_function(21, 22, IfExpr(Identifier(24), Identifier(26), Identifier(28))),
+            make_function(30, 31, Identifier(33)),
+        ]
+    )
+
+    return tokens, program
+
+
+def test_find_components_orders_dependencies_first_successfully():
+    edges = [[1], [2], [0, 3], [], [4, 3]]
+
+    assert find_components(edges) == [[3], [0, 1, 2], [4]]
+    assert find_components([[0]]) == [[0]]
+
+    chain = [[index + 1] for index in range(100_000)] + [[]]
+    components = find_components(chain)
+    assert len(components) == 100_001
+    assert components[0] == [100_000]
+
+
+def test_call_graph_infers_components_in_dependency_order_successfully():
+    tokens, program = make_module()
+    graph = CallGraph.from_ast(program, tokens)
+
+    # h calls k before k is declared, and k calls h.
+    assert graph.edges == [[], [0], [3], [2], []]
+    assert graph.components == [[0], [1], [2, 3], [4]]
+
+    types = graph.infer()
+    int_function = FunctionType([INT], INT)
+
+    assert types[0] is int_function
+    assert types[1].result is int_function
+    assert graph.get_node_type(graph.functions[2].body[0].condition) is types[3]
+    assert graph.get_node_type(graph.functions[3].body[0].condition) is types[2]
+
+
+def test_call_graph_infers_components_in_process_pool_successfully():
+    tokens, sequential_program = make_module()
+    sequential_graph = CallGraph.from_ast(sequential_program, tokens)
+    sequential = sequential_graph.infer()
+    tokens, parallel_program = make_module()
+    parallel_graph = CallGraph.from_ast(parallel_program, tokens)
+    parallel = parallel_graph.infer(workers=2)
+
+    assert parallel[0] is sequential[0]
+    assert parallel[1] is sequential[1]
+    assert [str(type) for type in parallel] == [str(type) for type in sequential]
+
+    def get_state(graph, program):
+        return (
+            [str(graph.get_node_type(node)) for node in get_nodes(program)],
+            {declaration: str(type) for declaration, type in graph.declaration_types.items()},
+            sorted(
+                (instantiation.id, str(instantiation.result_type))
+                for (_, params), instantiation in graph.table.instantiations.items()
+                for function in [instantiation.function]
+                if graph.table.lookup(function, params) is instantiation
+            ),
+        )
+
+    sequential_state = get_state(sequential_graph, sequential_program)
+
+    assert get_state(parallel_graph, parallel_program) == sequential_state
+    assert sequential_state[0].count("int") == 4
+    assert len(sequential_state[1]) == 10
+    assert len(sequential_state[2]) == 5
+
+    function = sequential_program.statements[0]
+    instantiation = sequential_graph.table.lookup(function, [INT])
+    assert instantiation.get_type(function.body[0]) is INT
+
+
+def test_call_graph_keeps_type_variables_shared_across_functions_successfully():
+    tokens = Lexer("f x , x , g y , f").lex()
+    program = Program([make_function(0, 1, Identifier(3)), make_function(5, 6, Identifier(8))])
+    types = CallGraph.from_ast(program, tokens).infer()
+
+    # f x = x ; g y = f
+    assert types[0].params[0] is types[0].result
+    assert types[1].result.params[0] is types[1].result.result
+    assert types[1].params[0] is not types[1].result.params[0]
+
+
+def test_call_graph_submits_components_to_idle_workers_only_successfully(monkeypatch):
+    submissions = []
+    last_submitted = Event()
+
+    def infer_slowly(function, tasks):
+        # a stays busy until every other component is submitted.
+        last_submitted.wait(5)
+        return function(tasks)
+
+    class Executor(ThreadPoolExecutor):
+        def submit(self, function, tasks):
+            components = [component for component, *_ in tasks]
+            submissions.append(components)
+
+            if [5] in components:
+                last_submitted.set()
+
+            if [0] in components:
+                return super().submit(infer_slowly, function, tasks)
+
+            return super().submit(function, tasks)
+
+    monkeypatch.setattr(callgraph, "ProcessPoolExecutor", Executor)
+    # a x = x ; b x = x ; c0 y = b ; ... ; c3 y = b
+    code = " , ".join(["a x , x", "b x , x"] + [f"c{index} y , b" for index in range(4)])
+    program = Program(
+        [make_function(index * 5, index * 5 + 1, Identifier(index * 5 + 3)) for index in range(6)]
+    )
+    types = CallGraph.from_ast(program, Lexer(code).lex()).infer(workers=2)
+
+    assert all(type.result.params[0] is type.result.result for type in types[2:])
+    # The cs are ready while a keeps one worker busy, so the free worker takes them a share of
+    # the pool at a time instead of all at once.
+    assert submissions == [[[0]], [[1]], [[2], [3]], [[4]], [[5]]]
@@ -0,0 +1,73 @@
+from compiler.lexer.lexer import Lexer
+from compiler.sema.closure import ClosureAnalysis, MOVED, COPIED, SHARED
+from compiler.sema.types import INT
+from compiler.parser.ast import (
+    Identifier,
+    Operator,
+    BinaryExpr,
+    FuncParam,
+    FuncParams,
+    FuncExpr,
+    Program,
+)
+
+
+class IntInference:
+    def get_declaration_type(self, declaration):
+        return INT
+
+
+def make_params(*indices):
+    return FuncParams(
+        [FuncParam(Identifier(index), None, None, None) for index in indices], None, [], None
+    )
+
+
+def make_siblings():
+    tokens = Lexer("lambda a, b: [lambda: a + b, lambda: b]").lex()
+    first = FuncExpr(None, None, [BinaryExpr(Identifier(8), Operator(9), Identifier(10))])
+    second = FuncExpr(None, None, [Identifier(14)])
+    outer = FuncExpr(None, make_params(1, 3), [first, second])
+
+    return tokens, Program([outer]), outer, first, second
+
+
+def test_closure_analysis_moves_and_shares_captures_successfully():
+    tokens, root, outer, first, second = make_siblings()
+    analysis = ClosureAnalysis.analyze(root, tokens)
+
+    assert analysis.get_captures(outer) == {}
+    assert not analysis.needs_environment(outer)
+    assert analysis.get_captures(first) == {0: MOVED, 1: SHARED}
+    assert analysis.get_captures(second) == {1: SHARED}
+    assert analysis.get_environment(first) == [1]
+
+
+def test_closure_analysis_copies_primitive_captures_successfully():
+    tokens, root, outer, first, second = make_siblings()
+    analysis = ClosureAnalysis.analyze(root, tokens, inference=IntInference())
+
+    assert analysis.get_captures(first) == {0: MOVED, 1: COPIED}
+    assert analysis.get_captures(second) == {1: COPIED}
+    assert not analysis.needs_environment(first)
+    assert not analysis.needs_environment(second)
+
+
+def test_closure_analysis_handles_nested_and_capture_free_closures_successfully():
+    tokens = Lexer("lambda a: lambda: lambda: a").lex()
+    inner = FuncExpr(None, None, [Identifier(7)])
+    middle = FuncExpr(None, None, [inner])
+    outer = FuncExpr(None, make_params(1), [middle])
+    analysis = ClosureAnalysis.analyze(Program([outer]), tokens)
+
+    assert analysis.get_captures(middle) == {0: MOVED}
+    assert analysis.get_captures(inner) == {0: SHARED}
+
+    tokens = Lexer("lambda x: x * x").lex()
+    square = FuncExpr(
+        None, make_params(1), [BinaryExpr(Identifier(3), Operator(4), Identifier(5))]
+    )
+    analysis = ClosureAnalysis.analyze(Program([square]), tokens)
+
+    assert analysis.get_captures(square) == {}
+    assert not analysis.needs_environment(square)
@@ -0,0 +1,126 @@
+from compiler.lexer.lexer import Lexer
+from compiler.parser.parser import Parser
+from compiler.parser.ast import (
+    BinaryOpKind,
+    BinaryExpr,
+    UnaryExpr,
+    Constant,
+    Integer,
+    Float,
+    ImagInteger,
+    ImagFloat,
+    String,
+    ByteString,
+    PrefixedString,
+    Program,
+)
+from compiler.sema.conversion import LiteralTable, ConstantFolder, ConstantPool
+
+
+def test_literal_table_decodes_numeric_literals_successfully():
+    tokens = Lexer("1_000 0xff_ff 0b1010 0o17 1_0.5e-1 3im 2.5im 9223372036854775808").lex()
+    program = Program(
+        [
+            Integer(0),
+            Integer(1),
+            Integer(2),
+            Integer(3),
+            Float(4),
+            ImagInteger(5),
+            ImagFloat(6),
+            Integer(7),
+        ]
+    )
+    table = LiteralTable.from_ast(program, tokens)
+
+    assert [table.get(node) for node in program.statements] == [
+        1000,
+        0xFFFF,
+        0b1010,
+        0o17,
+        1.05,
+        3j,
+        2.5j,
+        2 ** 63,
+    ]
+    assert list(table.integers) == [1000, 0xFFFF, 0b1010, 0o17, 0]
+    assert table.big_integers == {4: 2 ** 63}
+
+
+def test_literal_table_decodes_string_escapes_successfully():
+    tokens = Lexer(r"""'a\tβ\x41é' b'\x00\\' r'raw\n'""").lex()
+    program = Program([String(0), ByteString(1), PrefixedString(2)])
+    table = LiteralTable.from_ast(program, tokens)
+
+    assert table.get(program.statements[0]) == "a\tβAé"
+    assert table.get(program.statements[1]) == b"\x00\\"
+    assert table.get(program.statements[2]) == r"raw\n"
+
+
+def test_literal_table_decodes_each_token_once_successfully():
+    tokens = Lexer("7 'x'").lex()
+    program = Program([Integer(0), Integer(0), String(1), String(1)])
+    table = LiteralTable.from_ast(program, tokens)
+
+    assert len(table.integers) == 1
+    assert len(table.strings) == 1
+    assert table.get(program.statements[1]) == 7
+
+
+def fold_code(code):
+    parser = Parser.from_code(code)
+    folder = ConstantFolder.fold(Program([parser.parse_expr()]), parser.tokens)
+
+    return folder, folder.root.statements[0]
+
+
+def test_binary_op_kind_maps_operators_successfully():
+    assert BinaryOpKind.from_string("-") == BinaryOpKind.MINUS
+    assert BinaryOpKind.from_string("<=") == BinaryOpKind.EQUAL_LESSER_THAN
+    assert BinaryOpKind.from_string(">=") == BinaryOpKind.EQUAL_GREATER_THAN
+    assert BinaryOpKind.from_string("is", "not") == BinaryOpKind.IS_NOT
+    assert BinaryOpKind.from_string("is") == BinaryOpKind.IS
+    assert BinaryOpKind.from_string("not", "in") == BinaryOpKind.NOT_IN
+    assert BinaryOpKind.from_string("and") == BinaryOpKind.AND
+
+
+def test_constant_folder_folds_constant_expressions_successfully():
+    folder, result = fold_code("(2 ^ 10 - √16) * 3² // 7 if 1 < 2 else 0")
+
+    assert isinstance(result, Constant)
+    assert folder.pool.get(result.slot) == 1311.0
+
+    folder, result = fold_code("2 ^ 62 + (1 << 3) % 5 - (7 || 2) & ~0")
+    assert folder.pool.get(result.slot) == 2 ** 62 + 3 - 5
+
+    folder, result = fold_code("0 and 1 // 0 or 3 is not 4")
+    assert isinstance(result, BinaryExpr)
+    assert isinstance(result.lhs, Integer)
+
+    folder, result = fold_code("(1 == 1) + (2 >= 3) + (2 <= 3) + (2 != 2) + (not 0)")
+    assert folder.pool.get(result.slot) == 3
+    assert folder.pool.values[:2] == [True, False]
+
+
+def test_constant_folder_leaves_failing_and_overflowing_expressions_successfully():
+    folder, result = fold_code("1 + 1 // 0")
+    assert isinstance(result, BinaryExpr)
+    assert isinstance(result.rhs, BinaryExpr)
+    assert folder.pool.values == []
+
+    folder, result = fold_code("3 ^ 1000 + 2 ^ 63 + (1 << 64)")
+    assert isinstance(result.lhs, BinaryExpr)
+    assert isinstance(result.lhs.lhs, BinaryExpr)
+    assert folder.pool.values == []
+
+    folder, result = fold_code("√(0 - 4) * 2²")
+    assert isinstance(result.lhs, UnaryExpr)
+    assert isinstance(result.rhs, Constant)
+    assert folder.pool.values == [0 - 4, 4]
+
+
+def test_constant_pool_keys_values_by_type_successfully():
+    pool = ConstantPool()
+
+    assert [pool.add(value) for value in [1, 1.0, True, 0.0, -0.0, 1, "1"]] == [0, 1, 2, 3, 4, 0, 5]
+    assert len(pool) == 6
@@ -0,0 +1,43 @@
+from compiler.parser.hashcons import HashConsTable, is_consed
+from compiler.parser.parser import Parser
+from compiler.parser.ast import Integer, Operator, BinaryExpr, IfExpr
+from pytest import raises
+
+
+def test_hash_cons_table_shares_identical_subtrees_successfully():
+    parser = Parser.from_code("1 + 2 * 3\n4\n1 + 2 * 3")
+    table = HashConsTable(parser.tokens)
+    program = table.cons(parser.parse_program())
+    statement0, statement1, statement2 = program.statements
+
+    assert statement0 is statement2
+    assert statement0 != statement1
+    assert statement0.rhs.lhs.index == 2
+    assert hash(statement0) == statement0.hash_value
+    assert {statement0: "folded"}[statement2] == "folded"
+
+
+def test_hash_cons_table_keeps_input_tree_intact_successfully():
+    parser = Parser.from_code("1 + 1")
+    ast = IfExpr(parser.parse_program().statements[0], Integer(0), Integer(2))
+    table = HashConsTable(parser.tokens)
+    result = table.cons(ast)
+
+    assert not is_consed(ast.if_expr)
+    assert not is_consed(result)
+    assert result.if_expr.lhs is result.if_expr.rhs
+    assert result.condition is result.if_expr.lhs
+    assert repr(result.if_expr.op) == repr(Operator(1))
+
+
+def test_hash_consed_nodes_are_immutable_successfully():
+    parser = Parser.from_code("1 + 2")
+    table = HashConsTable(parser.tokens)
+    node = table.binary_expr(
+        table.literal(Integer, 0), table.operator(1), table.literal(Integer, 2)
+    )
+
+    assert type(node).__name__ == BinaryExpr.__name__
+
+    with raises(AttributeError):
+        node.lhs = None
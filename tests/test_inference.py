@@ -0,0 +1,266 @@
+from compiler.lexer.lexer import Lexer
+from compiler.sema.inference import InferenceEngine, InferenceError, TypeInference
+from compiler.sema.scope import ScopeTree
+from compiler.sema.types import (
+    INT,
+    FLOAT,
+    STR,
+    BOOL,
+    ListType,
+    RecordType,
+    TypeVariable,
+    make_union,
+)
+from compiler.parser.parser import Parser
+from compiler.parser.ast import (
+    Identifier,
+    Integer,
+    Float,
+    UnaryExpr,
+    String,
+    Operator,
+    BinaryExpr,
+    IfExpr,
+    FuncParam,
+    FuncParams,
+    FuncExpr,
+    Program,
+)
+from pytest import raises
+
+
+def test_engine_infers_records_from_field_use_successfully():
+    engine = InferenceEngine()
+    john, name, age = engine.fresh(), engine.fresh(), engine.fresh()
+
+    engine.has_field(john, "name", name)
+    engine.has_field(john, "age", age)
+    engine.bind(name, STR)
+    engine.bind(age, INT)
+    engine.solve()
+
+    assert str(engine.resolve(john)) == "Object [ age: int, name: str, * ]"
+
+    engine.bind(john, RecordType([("name", STR)]))
+
+    with raises(InferenceError):
+        engine.solve()
+
+
+def test_engine_defers_empty_list_element_type_until_use_successfully():
+    engine = InferenceEngine()
+    animals = engine.new_list()
+    other = engine.fresh()
+    cat, dog = engine.fresh(), engine.fresh()
+
+    engine.solve()
+
+    assert isinstance(engine.resolve(animals).element, TypeVariable)
+    assert not engine.is_resolved(animals)
+
+    engine.equal(animals, other)
+    engine.add_element(other, cat)
+    engine.add_element(animals, dog)
+    meow = engine.fresh()
+    engine.has_field(cat, "meow", meow)
+    engine.bind(dog, INT)
+    engine.solve()
+
+    assert engine.is_resolved(animals) is False
+    assert str(engine.resolve(animals)) == (
+        f"list{{Object [ meow: T{engine.find(meow)}, * ] | int}}"
+    )
+
+
+def test_engine_merges_chains_of_variables_successfully():
+    engine = InferenceEngine()
+    variables = [engine.fresh() for _ in range(10000)]
+
+    for a, b in zip(variables, variables[1:]):
+        engine.equal(a, b)
+
+    engine.bind(variables[5000], INT)
+    engine.solve()
+
+    assert engine.resolve(variables[0]) == INT
+    assert len({engine.find(var) for var in variables}) == 1
+
+
+def test_type_inference_infers_expressions_and_lambdas_successfully():
+    tokens = Lexer("lambda x, y=1: x + y if 2 else 'a'").lex()
+    params = FuncParams(
+        [
+            FuncParam(Identifier(1), None, None, None),
+            FuncParam(Identifier(3), None, None, Integer(5)),
+        ],
+        None,
+        [],
+        None,
+    )
+    body = IfExpr(
+        BinaryExpr(Identifier(7), Operator(8), Identifier(9)), Integer(11), String(13)
+    )
+    func = FuncExpr(None, params, [body])
+    inference = TypeInference.infer(Program([func]), tokens)
+
+    assert str(inference.get_type(func)) == "(int, int) -> int | str"
+    assert inference.get_declaration_type(0) == INT
+
+
+def test_type_inference_reports_mismatches_successfully():
+    parser = Parser.from_code("1 + 2 * 3")
+    program = parser.parse_program()
+    program.statements[0].rhs.rhs = String(4)
+
+    with raises(InferenceError):
+        TypeInference.infer(program, parser.tokens)
+
+
+def test_engine_narrows_unions_successfully():
+    engine = InferenceEngine()
+    value, narrowed, rest = engine.fresh(), engine.fresh(), engine.fresh()
+
+    engine.narrow(narrowed, value, INT)
+    engine.narrow(rest, value, INT, negate=True)
+    engine.bind(value, make_union([INT, STR, ListType(BOOL)]))
+    engine.solve()
+
+    assert engine.resolve(narrowed) == INT
+    assert engine.resolve(rest) == make_union([STR, ListType(BOOL)])
+
+    engine.narrow(engine.fresh(), narrowed, STR)
+
+    with raises(InferenceError):
+        engine.solve()
+
+
+def test_engine_narrows_structural_and_nested_unions_successfully():
+    cat = RecordType([("meow", INT)], is_open=True)
+    dog = RecordType([("bark", STR)])
+    engine = InferenceEngine()
+    value, cats, rest = engine.fresh(), engine.fresh(), engine.fresh()
+    engine.narrow(cats, value, cat)
+    engine.narrow(rest, value, cat, negate=True)
+    engine.bind(value, make_union([RecordType([("meow", INT)]), dog]))
+    engine.solve()
+
+    assert engine.resolve(cats) == RecordType([("meow", INT)])
+    assert engine.resolve(rest) == dog
+
+    engine = InferenceEngine()
+    value, ints, rest = engine.fresh(), engine.fresh(), engine.fresh()
+    engine.narrow(ints, value, ListType(INT))
+    engine.narrow(rest, value, ListType(INT), negate=True)
+    engine.bind(value, make_union([ListType(INT), ListType(STR)]))
+    engine.solve()
+
+    assert engine.resolve(ints) == ListType(INT)
+    assert engine.resolve(rest) == ListType(STR)
+
+    # The test always passes, so the other side keeps the tested type.
+    rest = engine.fresh()
+    engine.narrow(rest, ints, ListType(INT), negate=True)
+    engine.solve()
+
+    assert engine.resolve(rest) == ListType(INT)
+
+    # (int | str) | float
+    engine = InferenceEngine()
+    value, ints, rest = engine.fresh(), engine.fresh(), engine.fresh()
+    engine.join(value, [engine.from_type(make_union([INT, STR])), engine.from_type(FLOAT)])
+    engine.narrow(ints, value, INT)
+    engine.narrow(rest, value, INT, negate=True)
+    engine.solve()
+
+    assert engine.resolve(value) == make_union([INT, STR, FLOAT])
+    assert engine.resolve(ints) == INT
+    assert engine.resolve(rest) == make_union([STR, FLOAT])
+
+
+def test_type_inference_narrows_type_tested_branches_successfully():
+    # `cond` stands for `type(x) == int`.
+    tokens = Lexer("lambda x, cond: x + 1 if not not cond else x").lex()
+    x = Identifier(1)
+    params = FuncParams(
+        [FuncParam(x, None, None, None), FuncParam(Identifier(3), None, None, None)],
+        None,
+        [],
+        None,
+    )
+    condition = Identifier(11)
+    lhs = BinaryExpr(Identifier(5), Operator(6), Integer(7))
+    rhs = Identifier(13)
+    body = IfExpr(lhs, UnaryExpr(UnaryExpr(condition, Operator(10)), Operator(9)), rhs)
+    func = FuncExpr(None, params, [body])
+    program = Program([func])
+
+    # Without the test, `x + 1` needs `int | str` to be an int.
+    inference = TypeInference(tokens, ScopeTree.from_ast(program, tokens))
+    inference.engine.bind(inference.get_declaration_var(0), make_union([INT, STR]))
+    inference.walk(program)
+
+    with raises(InferenceError):
+        inference.engine.solve()
+
+    inference = TypeInference(tokens, ScopeTree.from_ast(program, tokens))
+    inference.add_type_test(condition, x, INT)
+    inference.engine.bind(inference.get_declaration_var(0), make_union([INT, STR]))
+    inference.walk(program)
+    inference.engine.solve()
+
+    assert inference.get_type(lhs.lhs) == INT
+    assert inference.get_type(rhs) == STR
+    assert inference.is_monomorphic(lhs) and inference.is_monomorphic(rhs)
+    assert not inference.is_monomorphic(body)
+    assert inference.get_declaration_type(0) == make_union([INT, STR])
+
+
+def test_type_inference_infers_rest_param_lambdas_successfully():
+    for code in ("lambda *x: 1", "lambda **x: 1"):
+        parser = Parser.from_code(code)
+        program = parser.parse_program()
+        inference = TypeInference.infer(program, parser.tokens)
+
+        assert str(inference.get_type(program.statements[0])) == "(T0) -> int"
+        assert not inference.is_monomorphic(program.statements[0])
+
+
+def test_type_inference_promotes_mixed_arithmetic_successfully():
+    parser = Parser.from_code("(1 / 2) + 3")
+    program = parser.parse_program()
+
+    assert TypeInference.infer(program, parser.tokens).get_type(program.statements[0]) == FLOAT
+
+    # 'a' * 3 + 1.5
+    tokens = Lexer("'a' * 3 + 1.5").lex()
+    repetition = BinaryExpr(String(0), Operator(1), Integer(2))
+    program = Program([BinaryExpr(repetition, Operator(3), Float(4))])
+    inference = TypeInference(tokens, ScopeTree.from_ast(program, tokens))
+    inference.walk(program)
+
+    with raises(InferenceError):
+        inference.engine.solve()
+
+    assert inference.get_type(repetition) == STR
+
+    # Unknown operands default to the type of the other side.
+    tokens = Lexer("lambda x: 3 * x + 1.5").lex()
+    body = BinaryExpr(BinaryExpr(Integer(3), Operator(4), Identifier(5)), Operator(6), Float(7))
+    params = FuncParams([FuncParam(Identifier(1), None, None, None)], None, [], None)
+    program = Program([FuncExpr(None, params, [body])])
+    inference = TypeInference.infer(program, tokens)
+
+    assert str(inference.get_type(program.statements[0])) == "(int) -> float"
+
+
+def test_engine_retires_field_constraints_successfully():
+    engine = InferenceEngine()
+    record = engine.fresh()
+
+    for index in range(1000):
+        engine.has_field(record, f"field{index}", engine.fresh())
+
+    engine.solve()
+
+    assert len(engine.resolve(record).fields) == 1000
+    assert engine.constraints == [None] * 1000
@@ -0,0 +1,114 @@
+from compiler.lexer.lexer import Lexer
+from compiler.sema.inference import InferenceError
+from compiler.sema.instantiation import InstantiationTable, get_params
+from compiler.sema.types import INT, FLOAT, STR, RecordType
+from compiler.parser.parser import Parser
+from compiler.parser.ast import (
+    Identifier,
+    Integer,
+    Operator,
+    BinaryExpr,
+    FuncParam,
+    FuncParams,
+    FuncExpr,
+    Program,
+)
+from pytest import raises
+
+
+def make_module():
+    tokens = Lexer("lambda x, y: x + y").lex()
+    params = FuncParams(
+        [FuncParam(Identifier(1), None, None, None), FuncParam(Identifier(3), None, None, None)],
+        None,
+        [],
+        None,
+    )
+    body = BinaryExpr(Identifier(5), Operator(6), Identifier(7))
+    function = FuncExpr(None, params, [body])
+
+    return tokens, Program([function]), function, body
+
+
+def test_instantiation_table_caches_instantiations_by_argument_types_successfully():
+    tokens, program, function, body = make_module()
+    table = InstantiationTable.from_ast(program, tokens)
+
+    result0 = table.instantiate(function, [INT, INT])
+    result1 = table.instantiate(function, (INT, INT))
+    result2 = table.instantiate(function, [FLOAT, FLOAT])
+
+    assert result0 is result1
+    assert result0 is not result2
+    assert table.lookup(function, [INT, INT]) is result0
+    assert table.lookup(function, [INT, FLOAT]) is None
+    assert len(table.instantiations) == 2
+
+
+def test_instantiations_share_the_ast_and_keep_types_aside_successfully():
+    tokens, program, function, body = make_module()
+    table = InstantiationTable.from_ast(program, tokens)
+
+    result0 = table.instantiate(function, [INT, INT])
+    result1 = table.instantiate(function, [FLOAT, FLOAT])
+
+    assert result0.function is result1.function is function
+    assert result0.get_type(body) == INT
+    assert result1.get_type(body) == FLOAT
+    assert result1.result_type == FLOAT
+    assert "type" not in vars(body)
+
+
+def test_instantiation_table_rejects_invalid_arguments_successfully():
+    tokens, program, function, body = make_module()
+    table = InstantiationTable.from_ast(program, tokens)
+    record = RecordType([("name", INT)])
+
+    with raises(InferenceError):
+        table.instantiate(function, [INT])
+
+    with raises(InferenceError):
+        table.instantiate(function, [INT, record])
+
+
+def test_instantiation_table_binds_default_and_rest_params_successfully():
+    tokens = Lexer("lambda x, y=1: x + y").lex()
+    params = FuncParams(
+        [
+            FuncParam(Identifier(1), None, None, None),
+            FuncParam(Identifier(3), None, None, Integer(5)),
+        ],
+        None,
+        [],
+        None,
+    )
+    function = FuncExpr(None, params, [BinaryExpr(Identifier(7), Operator(8), Identifier(9))])
+    table = InstantiationTable.from_ast(Program([function]), tokens)
+
+    assert table.instantiate(function, [INT]).result_type == INT
+    assert table.instantiate(function, [INT, INT]).result_type == INT
+
+    with raises(InferenceError):
+        table.instantiate(function, [])
+
+    with raises(InferenceError):
+        table.instantiate(function, [INT, INT, INT])
+
+    for code in ("lambda *x: 1", "lambda **x: 1"):
+        parser = Parser.from_code(code)
+        program = parser.parse_program()
+        function = program.statements[0]
+        table = InstantiationTable.from_ast(program, parser.tokens)
+        [param] = get_params(function)
+
+        if code == "lambda *x: 1":
+            instantiation = table.instantiate(function, [INT, STR])
+            assert instantiation.get_type(param.name) == RecordType([("0", INT), ("1", STR)])
+        else:
+            instantiation = table.instantiate(function, [])
+            assert instantiation.get_type(param.name) == RecordType([])
+
+            with raises(InferenceError):
+                table.instantiate(function, [INT])
+
+        assert instantiation.result_type == INT
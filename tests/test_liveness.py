@@ -0,0 +1,102 @@
+from compiler.lexer.lexer import Lexer
+from compiler.sema.liveness import Liveness, analyze_module, iter_bits
+from compiler.sema.scope import ScopeTree
+from compiler.parser.parser import Parser
+from compiler.parser.ast import (
+    Identifier,
+    Integer,
+    Operator,
+    BinaryExpr,
+    IfExpr,
+    FuncParam,
+    FuncParams,
+    FuncExpr,
+    ComprehensionFor,
+    Comprehension,
+    Program,
+)
+
+
+def make_params(*indices):
+    return FuncParams(
+        [FuncParam(Identifier(index), None, None, None) for index in indices], None, [], None
+    )
+
+
+def test_iter_bits_yields_set_bits_successfully():
+    assert list(iter_bits(0)) == []
+    assert list(iter_bits(0b101001)) == [0, 3, 5]
+    assert list(iter_bits(1 << 200)) == [200]
+
+
+def test_liveness_frees_objects_on_branches_successfully():
+    tokens = Lexer("lambda a, b, c: a if b else c + b").lex()
+    a, b, c = Identifier(7), Identifier(11), Identifier(13)
+    body = IfExpr(a, Identifier(9), BinaryExpr(b, Operator(12), c))
+    function = FuncExpr(None, make_params(1, 3, 5), [body])
+    scopes = ScopeTree.from_ast(Program([function]), tokens)
+    liveness = Liveness.analyze(function, scopes)
+    entry = liveness.graph.entry
+
+    assert len(liveness.graph.blocks) == 4
+    assert liveness.get_live_in(entry) == []
+    assert liveness.get_live_out(entry) == [0, 1, 2]
+    assert liveness.edge_deaths == {(0, 1): [1, 2], (0, 2): [0]}
+    assert liveness.get_deaths(a) == [0]
+    assert liveness.get_deaths(b) == [2]
+    assert liveness.get_deaths(c) == [1]
+    assert liveness.get_deaths(body.condition) == []
+
+
+def test_liveness_frees_loop_variables_successfully():
+    tokens = Lexer("lambda xs, k: [x + k for x in xs where x] + 1").lex()
+    element = Identifier(6)
+    in_expr = Identifier(12)
+    comprehension = Comprehension(
+        None,
+        BinaryExpr(element, Operator(7), Identifier(8)),
+        [ComprehensionFor(Identifier(10), in_expr, [Identifier(14)])],
+        None,
+    )
+    body = BinaryExpr(comprehension, Operator(16), Integer(17))
+    function = FuncExpr(None, make_params(1, 3), [body])
+    scopes = ScopeTree.from_ast(Program([function]), tokens)
+    liveness = Liveness.analyze(function, scopes)
+    header = liveness.graph.blocks[1]
+
+    assert liveness.get_live_in(header) == [1]
+    assert liveness.get_live_out(header) == [1, 2]
+    assert liveness.get_deaths(in_expr) == [0]
+    assert liveness.get_deaths(element) == [2]
+    assert liveness.edge_deaths == {(1, 1): [2], (1, 3): [1, 2]}
+
+
+def test_analyze_module_counts_captures_at_closure_creation_successfully():
+    tokens = Lexer("lambda a, b: lambda: a + b").lex()
+    inner = FuncExpr(None, None, [BinaryExpr(Identifier(7), Operator(8), Identifier(9))])
+    outer = FuncExpr(None, make_params(1, 3), [inner])
+    root = Program([outer])
+    results = analyze_module(root, tokens)
+
+    assert set(results) == {id(root), id(outer), id(inner)}
+    assert results[id(outer)].get_deaths(inner) == [0, 1]
+    assert results[id(inner)].variables == []
+    assert results[id(root)].variables == []
+
+
+def test_analyze_module_handles_deep_expressions_successfully():
+    parser = Parser.from_code("-" * 3000 + "1")
+    program = parser.parse_program()
+
+    assert len(analyze_module(program, parser.tokens)) == 1
+
+    # lambda x: 1 if x else 1 if x else ... x
+    tokens = Lexer("lambda x: 1 if x else x").lex()
+    body = Identifier(6)
+    for _ in range(3000):
+        body = IfExpr(Integer(3), Identifier(5), body)
+
+    function = FuncExpr(None, make_params(1), [body])
+    liveness = Liveness.analyze(function, ScopeTree.from_ast(Program([function]), tokens))
+
+    assert len(liveness.graph.blocks) == 1 + 3 * 3000
@@ -1,4 +1,5 @@
-from compiler.parser.parser import Parser
+from compiler.lexer.lexer import LexerError, TokenKind
+from compiler.parser.parser import Parser, ParserError
 from compiler.parser.ast import (
     Newline,
     Indent,
@@ -13,7 +14,9 @@ from compiler.parser.ast import (
     PrefixedString,
     UnaryExpr,
     BinaryExpr,
+    Operator,
 )
+from pytest import raises
 
 
 def test_parser_memoizes_called_parser_functions_successfully():
@@ -177,3 +180,209 @@ def test_parse_mul_expr_():
     result3 = Parser.from_code("-5/-4*+3").parse_mul_expr()
 
     # print('\n', result0, '\n', result1, '\n', result2)
+
+
+def test_parser_splits_top_level_statements_successfully():
+    parser0 = Parser.from_code("1 + 2\n\n3\n(4 +\n 5)")
+    parser1 = Parser.from_code("1\nlambda:\n    2\n    3\n4")
+
+    assert parser0.split_statements() == [(0, 3), (5, 6), (7, 12)]
+    assert parser1.split_statements() == [(0, 1), (2, 9), (9, 10)]
+
+
+def test_parse_program_parses_statements_in_parallel_successfully():
+    code = "\n".join(f"{i} + {i} * 2" for i in range(50))
+    result0 = Parser.from_code(code).parse_program()
+    result1 = Parser.from_code(code).parse_program(workers=4)
+
+    assert len(result0.statements) == 50
+    assert result0.statements[1] == BinaryExpr(
+        Integer(6), Operator(7), BinaryExpr(Integer(8), Operator(9), Integer(10))
+    )
+    assert result0 == result1
+
+
+def test_parse_program_reports_same_error_in_parallel_successfully():
+    code = "1 + 2\n3 4\n5\n6 7"
+
+    with raises(ParserError) as error0:
+        Parser.from_code(code).parse_program()
+
+    with raises(ParserError) as error1:
+        Parser.from_code(code).parse_program(workers=2)
+
+    assert (error0.value.row, error0.value.column) == (1, 2)
+    assert (error1.value.row, error1.value.column) == (1, 2)
+
+
+def test_parser_reports_farthest_failure_with_expected_tokens_successfully():
+    def parse_error(code):
+        with raises(ParserError) as error:
+            Parser.from_code(code).parse_program()
+        return error.value
+
+    error0 = parse_error("1 + 2\n(3 4)")
+    error1 = parse_error("lambda 3")
+    error2 = parse_error("1 +")
+
+    assert error0.message == "Unexpected token '4', expected an operator or ')'"
+    assert (error0.row, error0.column) == (1, 3)
+    assert error1.message == (
+        "Unexpected token '3', expected '(', IDENTIFIER, '*', '**' or ':'"
+    )
+    assert error2.message == "Unexpected end of code, expected an expression"
+
+
+def test_iter_statements_yields_same_statements_as_parse_program_successfully():
+    code = "1 + 2\n\n3\n(4 +\n 5)\n6 ^ 7"
+    program = Parser.from_code(code).parse_program()
+    result0 = list(Parser.from_code(code).iter_statements())
+    result1 = list(Parser.from_code(code, lazy=True).iter_statements())
+
+    assert len(result0) == 4
+    assert repr(result0) == repr(program.statements)
+    assert repr(result1) == repr(program.statements)
+
+
+def test_iter_statements_lexes_lazily_successfully():
+    statements = Parser.from_code("1 + 2\n3 $ 4\n", lazy=True).iter_statements()
+
+    assert repr(next(statements)) == repr(BinaryExpr(Integer(0), Operator(1), Integer(2)))
+
+    with raises(LexerError):
+        next(statements)
+
+
+def test_iter_statements_reports_errors_in_order_successfully():
+    statements = Parser.from_code("1 + 2\n3 4\n", lazy=True).iter_statements()
+
+    next(statements)
+
+    with raises(ParserError) as error:
+        next(statements)
+
+    assert (error.value.row, error.value.column) == (1, 2)
+
+
+def reference_operator_expr(tokens, level, cursor):
+    """
+    Recursive implementation of the operator expression rules in `parser.grammar`, used to check
+    the explicit stack parser against. Returns the result and the new cursor.
+    """
+    def data(index):
+        return tokens[index].data if index < len(tokens) else None
+
+    binary_levels = {
+        1: ["or"],
+        2: ["and"],
+        4: [("not", "in"), ("is", "not"), "<", ">", "==", ">=", "<=", "!=", "in", "is"],
+        5: ["|"],
+        6: ["||"],
+        7: ["&"],
+        8: ["<<", ">>"],
+        9: ["+", "-"],
+        10: ["*", "@", "/", "%", "//"],
+    }
+
+    if level == 3:
+        if data(cursor + 1) == "not":
+            operand, end = reference_operator_expr(tokens, 3, cursor + 1)
+            if operand is None:
+                return None, cursor
+            return UnaryExpr(operand, Operator(cursor + 1)), end
+        return reference_operator_expr(tokens, 4, cursor)
+
+    if level == 11:
+        if data(cursor + 1) in ("+", "-", "~"):
+            operand, end = reference_operator_expr(tokens, 11, cursor + 1)
+            if operand is None:
+                return None, cursor
+            return UnaryExpr(operand, Operator(cursor + 1)), end
+        return reference_operator_expr(tokens, 12, cursor)
+
+    if level == 12:
+        root = cursor + 1 if data(cursor + 1) == "√" else None
+        start = cursor
+        cursor = root if root is not None else cursor
+
+        if cursor + 1 < len(tokens) and tokens[cursor + 1].kind == TokenKind.DEC_INTEGER:
+            result, cursor = Integer(cursor + 1), cursor + 1
+        elif data(cursor + 1) == "(":
+            result, end = reference_operator_expr(tokens, 1, cursor + 1)
+            if result is None or data(end + 1) != ")":
+                return None, start
+            cursor = end + 1
+        else:
+            return None, start
+
+        if data(cursor + 1) == "^":
+            rhs, end = reference_operator_expr(tokens, 11, cursor + 1)
+            if rhs is not None:
+                result, cursor = BinaryExpr(result, Operator(cursor + 1), rhs), end
+        elif data(cursor + 1) == "²":
+            result, cursor = UnaryExpr(result, Operator(cursor + 1)), cursor + 1
+
+        if root is not None:
+            result = UnaryExpr(result, Operator(root))
+
+        return result, cursor
+
+    lhs, cursor = reference_operator_expr(tokens, level + 1, cursor)
+    if lhs is None:
+        return None, cursor
+
+    while True:
+        op = None
+        for operator in binary_levels[level]:
+            if type(operator) == tuple:
+                if (data(cursor + 1), data(cursor + 2)) == operator:
+                    op, width = Operator(cursor + 1, cursor + 2), 2
+                    break
+            elif data(cursor + 1) == operator:
+                op, width = Operator(cursor + 1), 1
+                break
+
+        if op is None:
+            return lhs, cursor
+
+        rhs, end = reference_operator_expr(tokens, level + 1, cursor + width)
+        if rhs is None:
+            return lhs, cursor
+
+        lhs, cursor = BinaryExpr(lhs, op, rhs), end
+
+
+def test_parse_or_test_matches_recursive_rules_successfully():
+    import random
+
+    words = [
+        "1", "2", "(", ")", "+", "-", "~", "√", "²", "^", "*", "//", "<<", "&", "||", "|",
+        "<", "==", "in", "not", "is", "and", "or",
+    ]
+    generator = random.Random(0)
+
+    for _ in range(3000):
+        code = " ".join(generator.choice(words) for _ in range(generator.randint(1, 12)))
+        parser = Parser.from_code(code)
+        result = parser.parse_or_test()
+        expected, cursor = reference_operator_expr(parser.tokens, 1, -1)
+
+        assert (repr(result), parser.cursor) == (repr(expected), cursor), code
+
+
+def test_parse_or_test_parses_deeply_nested_expressions_successfully():
+    depth = 20_000
+    result0 = Parser.from_code("(" * depth + "1" + ")" * depth).parse_or_test()
+    result1 = Parser.from_code("-" * depth + "1").parse_or_test()
+    result2 = Parser.from_code("2^" * depth + "1").parse_or_test()
+
+    assert result0 == Integer(depth)
+
+    for _ in range(depth):
+        assert type(result1) == UnaryExpr
+        result1 = result1.expr
+        assert type(result2) == BinaryExpr
+        result2 = result2.rhs
+
+    assert result1 == Integer(depth)
+    assert result2 == Integer(2 * depth)
@@ -0,0 +1,136 @@
+from compiler.lexer.lexer import Lexer
+from compiler.sema.resolution import MROError
+from compiler.sema.query import QueryDatabase, QueryError, SemanticDatabase, get_content_hash
+from compiler.sema.types import INT, FunctionType
+from compiler.parser.ast import (
+    Identifier,
+    Integer,
+    Operator,
+    BinaryExpr,
+    FuncParam,
+    FuncParams,
+    FuncExpr,
+    Program,
+)
+from pytest import raises
+
+
+def make_function(name, param, body):
+    params = FuncParams([FuncParam(Identifier(param), None, None, None)], None, [], None)
+    return FuncExpr(Identifier(name), params, [body])
+
+
+def make_module(code, offset=0):
+    """
+    Parses `f x , x + <int> , g y , f`, where `offset` is the number of tokens around <int>.
+    """
+    tokens = Lexer(code).lex()
+    program = Program(
+        [
+            make_function(0, 1, BinaryExpr(Identifier(3), Operator(4), Integer(5 + offset))),
+            make_function(7 + 2 * offset, 8 + 2 * offset, Identifier(10 + 2 * offset)),
+        ]
+    )
+
+    return tokens, program
+
+
+def test_query_database_reuses_unchanged_results_successfully():
+    db = QueryDatabase()
+    db.define("double", lambda db, name: db.get("number", name) * 2)
+    db.define("is_positive", lambda db, name: db.get("double", name) > 0)
+    db.define("sign", lambda db, name: "+" if db.get("is_positive", name) else "-")
+    db.set_input("number", ("a",), 1)
+
+    assert db.get("sign", "a") == "+"
+    db.set_input("number", ("a",), 1)
+    assert db.revision == 1
+
+    # is_positive runs again but its result doesn't change, so sign is reused.
+    db.set_input("number", ("a",), 2)
+    assert db.get("sign", "a") == "+"
+    assert db.executions == {"sign": 1, "is_positive": 2, "double": 2}
+
+    with raises(QueryError):
+        db.get("number", "b")
+
+    db.define("loop", lambda db: db.get("loop"))
+    with raises(QueryError):
+        db.get("loop")
+
+
+def test_semantic_database_recomputes_edited_functions_only_successfully():
+    db = SemanticDatabase()
+    tokens, program = make_module("f x , x + 1 , g y , f")
+    db.set_module("main", tokens, program)
+    int_function = FunctionType([INT], INT)
+
+    assert db.type_of("main", 0) is int_function
+    assert db.type_of("main", 1).result is int_function
+    assert db.instantiate("main", 0, [INT]) is INT
+    assert db.executions["type_of"] == 2
+
+    # f's body changes but not its type, so g is reused.
+    tokens, program = make_module("f x , x + 2 , g y , f")
+    db.set_module("main", tokens, program)
+
+    assert db.type_of("main", 1).result is int_function
+    assert db.executions["type_of"] == 3
+    assert db.executions["statement_names"] == 2
+    assert db.executions["scope_of"] == 1
+
+    # Tokens move but no subtree changes, so nothing is recomputed.
+    revision = db.revision
+    tokens, program = make_module("f x , x + ( 2 ) , g y , f", offset=1)
+    db.set_module("main", tokens, program)
+
+    assert db.revision == revision
+    assert db.type_of("main", 1).result is int_function
+    assert db.executions["type_of"] == 3
+
+    # Hashes follow token text, whatever the token positions.
+    hashes = [
+        get_content_hash(program.statements[0], tokens)
+        for tokens, program in [
+            make_module("f x , x + 1 , g y , f"),
+            make_module("f x , x + 2.5 , g y , f"),
+            make_module("f x , x + ( 1 ) , g y , f", offset=1),
+        ]
+    ]
+
+    assert hashes[0] != hashes[1]
+    assert hashes[0] == hashes[2]
+
+
+def test_semantic_database_keeps_type_variables_shared_successfully():
+    db = SemanticDatabase()
+    tokens = Lexer("f x , x , g y , f").lex()
+    program = Program([make_function(0, 1, Identifier(3)), make_function(5, 6, Identifier(8))])
+    db.set_module("main", tokens, program)
+    result = db.type_of("main", 1).result
+
+    # f x = x ; g y = f
+    assert result.params[0] is result.result
+
+
+def test_semantic_database_tracks_class_hierarchies_successfully():
+    db = SemanticDatabase()
+    db.set_class("Object", [])
+    db.set_class("A", ["Object"])
+    db.set_class("B", ["Object"])
+    db.set_class("C", ["A"])
+    db.set_class("D", ["B"])
+
+    assert db.mro("C") == ("C", "A", "Object")
+    assert db.mro("D") == ("D", "B", "Object")
+
+    db.set_class("B", ["A"])
+
+    assert db.mro("C") == ("C", "A", "Object")
+    assert db.mro("D") == ("D", "B", "A", "Object")
+    assert db.executions["mro"] == 7
+
+    db.set_class("E", ["A", "B"])
+
+    with raises(MROError):
+        db.mro("E")
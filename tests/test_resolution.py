@@ -0,0 +1,74 @@
+from pytest import raises
+from compiler.sema.resolution import MROResolver, MROError, c3_merge
+
+
+def test_resolver_linearizes_diamond_hierarchy_successfully():
+    resolver = MROResolver()
+    resolver.add_class("O")
+    resolver.add_class("A", ["O"])
+    resolver.add_class("B", ["O"])
+    resolver.add_class("C", ["O"])
+    resolver.add_class("D", ["O"])
+    resolver.add_class("E", ["O"])
+    resolver.add_class("K1", ["A", "B", "C"])
+    resolver.add_class("K2", ["D", "B", "E"])
+    resolver.add_class("K3", ["D", "A"])
+    resolver.add_class("Z", ["K1", "K2", "K3"])
+
+    assert resolver.get_mro("Z") == (
+        "Z", "K1", "K2", "K3", "D", "A", "B", "C", "E", "O"
+    )
+    assert resolver.get_mro("K1") == ("K1", "A", "B", "C", "O")
+    assert resolver.get_mro("Z") is resolver.get_mro("Z")
+
+
+def test_resolver_reports_inconsistent_hierarchies_successfully():
+    resolver = MROResolver()
+    resolver.add_class("X")
+    resolver.add_class("Y")
+    resolver.add_class("A", ["X", "Y"])
+    resolver.add_class("B", ["Y", "X"])
+    resolver.add_class("C", ["A", "B"])
+    resolver.add_class("Loop", ["Loop"])
+    resolver.add_class("Orphan", ["Missing"])
+
+    assert c3_merge([["A", "X", "Y"], ["B", "Y", "X"], ["A", "B"]]) is None
+
+    with raises(MROError):
+        resolver.get_mro("C")
+
+    with raises(MROError):
+        resolver.get_mro("Loop")
+
+    with raises(MROError):
+        resolver.get_mro("Orphan")
+
+    with raises(MROError):
+        resolver.add_class("X")
+
+
+def test_resolver_flattens_member_tables_successfully():
+    resolver = MROResolver()
+    resolver.add_class("Base", members={"name": 1, "greet": 2})
+    resolver.add_class("Left", ["Base"], {"greet": 3})
+    resolver.add_class("Right", ["Base"], {"name": 4, "size": 5})
+    resolver.add_class("Child", ["Left", "Right"], {"own": 6})
+
+    assert resolver.lookup("Child", "greet") == ("Left", 3)
+    assert resolver.lookup("Child", "name") == ("Right", 4)
+    assert resolver.lookup("Child", "size") == ("Right", 5)
+    assert resolver.lookup("Child", "own") == ("Child", 6)
+    assert resolver.lookup("Left", "name") == ("Base", 1)
+    assert resolver.lookup("Child", "missing") is None
+
+
+def test_resolver_handles_deep_hierarchies_successfully():
+    resolver = MROResolver()
+    resolver.add_class("C0", members={"root": 0})
+
+    for index in range(1, 5000):
+        resolver.add_class(f"C{index}", [f"C{index - 1}"], {f"m{index}": index})
+
+    assert len(resolver.get_mro("C4999")) == 5000
+    assert resolver.lookup("C4999", "root") == ("C0", 0)
+    assert resolver.lookup("C4999", "m4000") == ("C4000", 4000)
@@ -0,0 +1,86 @@
+from random import Random
+from compiler.lexer.lexer import Lexer
+from compiler.sema.scope import (
+    PersistentMap,
+    ScopeTree,
+    UNRESOLVED,
+    MODULE_SCOPE,
+    FUNCTION_SCOPE,
+    COMPREHENSION_SCOPE,
+)
+from compiler.parser.ast import (
+    Identifier,
+    Operator,
+    BinaryExpr,
+    FuncParam,
+    FuncParams,
+    FuncExpr,
+    ComprehensionFor,
+    Comprehension,
+    Program,
+)
+
+
+def test_persistent_map_matches_dict_and_keeps_old_versions_successfully():
+    random = Random(0)
+    versions = [(PersistentMap(), {})]
+
+    for _ in range(2000):
+        persistent, expected = versions[random.randrange(len(versions))]
+        key = random.choice([random.randrange(40), random.randrange(2 ** 40)])
+        expected = {**expected, key: random.random()}
+        versions.append((persistent.set(key, expected[key]), expected))
+
+    for persistent, expected in versions:
+        assert len(persistent) == len(expected)
+        assert dict(persistent.items()) == expected
+        assert all(persistent.get(key) == value for key, value in expected.items())
+        assert persistent.get(2 ** 41) is None
+
+
+def test_scope_tree_resolves_params_and_defaults_successfully():
+    tokens = Lexer("lambda x, y=x: x + z").lex()
+    params = FuncParams(
+        [
+            FuncParam(Identifier(1), None, None, None),
+            FuncParam(Identifier(3), None, None, Identifier(5)),
+        ],
+        None,
+        [],
+        None,
+    )
+    body = BinaryExpr(Identifier(7), Operator(8), Identifier(9))
+    tree = ScopeTree.from_ast(Program([FuncExpr(None, params, [body])]), tokens)
+
+    assert [scope.kind for scope in tree.scopes] == [MODULE_SCOPE, FUNCTION_SCOPE]
+    assert tree.scopes[1].declarations == [0, 1]
+    assert tree.uses == {5: UNRESOLVED, 7: 0, 9: UNRESOLVED}
+    assert tree.get_name(tree.get_declaration(body.lhs)) == "x"
+
+
+def test_scope_tree_shadows_names_in_nested_scopes_successfully():
+    tokens = Lexer("lambda x: lambda x: [x for y in x]").lex()
+    comprehension = Comprehension(
+        None,
+        Identifier(7),
+        [ComprehensionFor(Identifier(9), Identifier(11), [])],
+        None,
+    )
+    inner = FuncExpr(
+        None,
+        FuncParams([FuncParam(Identifier(4), None, None, None)], None, [], None),
+        [comprehension],
+    )
+    outer = FuncExpr(
+        None,
+        FuncParams([FuncParam(Identifier(1), None, None, None)], None, [], None),
+        [inner],
+    )
+    tree = ScopeTree.from_ast(Program([outer]), tokens)
+
+    assert [scope.kind for scope in tree.scopes][-1] == COMPREHENSION_SCOPE
+    assert tree.uses == {7: 1, 11: 1}
+    assert tree.scopes[1].lookup(tree.symbols.intern("x")) == 0
+    assert tree.scopes[2].lookup(tree.symbols.intern("x")) == 1
+    assert tree.scopes[3].lookup(tree.symbols.intern("y")) == 2
+    assert tree.scopes[2].lookup(tree.symbols.intern("y")) == UNRESOLVED
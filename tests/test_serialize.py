@@ -0,0 +1,76 @@
+from compiler.lexer.lexer import Lexer
+from compiler.parser.parser import Parser
+from compiler.parser.serialize import (
+    ASTReader,
+    LazySubtree,
+    SerializationError,
+    serialize,
+    read_varint,
+    write_varint,
+    zigzag,
+    unzigzag,
+)
+from compiler.parser.ast import FuncExpr, Program, String, Float
+from compiler.parser.literals import LiteralTable
+from pytest import raises
+
+
+def test_varints_round_trip_successfully():
+    values = [0, 1, 127, 128, 300, 2 ** 63, -1, -2 ** 70]
+    buffer = bytearray()
+
+    for value in values:
+        write_varint(buffer, zigzag(value))
+
+    offset = 0
+    result = []
+
+    for _ in values:
+        value, offset = read_varint(buffer, offset)
+        result.append(unzigzag(value))
+
+    assert result == values
+    assert len(buffer) == offset
+
+
+def test_serialize_round_trips_tokens_program_and_literals_successfully():
+    tokens = Lexer("1 + 0xff * 2\n(3 - 18446744073709551616) ^ 2\n'a\\tb' 1.5").lex()
+    program = Parser(tokens[:-3]).parse_program()
+    program.statements += [String(len(tokens) - 2), Float(len(tokens) - 1)]
+    literals = LiteralTable.from_ast(program, tokens)
+    reader = ASTReader(serialize(tokens, program, literals))
+
+    assert reader.get_tokens() == tokens
+    assert repr(reader.load()) == repr(program)
+    assert reader.get_literals().slots == literals.slots
+    assert reader.get_literals().get(program.statements[2]) == "a\tb"
+    assert reader.get_literals().get(program.statements[3]) == 1.5
+    assert reader.get_literals().big_integers == {4: 2 ** 64}
+
+
+def test_ast_reader_loads_subtrees_lazily_from_file_successfully(tmp_path):
+    parser = Parser.from_code("1\nlambda: 2 + 3\n4")
+    program = parser.parse_program()
+    path = tmp_path / "module.vipa"
+    path.write_bytes(serialize(parser.tokens, program))
+
+    with ASTReader.open(str(path)) as reader:
+        statements = reader.get_children(reader.get_children()[0])
+        result = reader.load(lazy_fields=("body",))
+
+        assert len(statements) == 3
+        assert reader.get_kind(statements[1]) == FuncExpr.kind
+        assert reader.get_kind() == Program.kind
+        assert isinstance(result.statements[1].body, LazySubtree)
+        assert repr(result.statements[1].body.load()) == repr(program.statements[1].body)
+        assert repr(reader.load(statements[2])) == repr(program.statements[2])
+
+
+def test_ast_reader_rejects_invalid_data_successfully():
+    data = serialize(Parser.from_code("1").tokens, Program([]))
+
+    with raises(SerializationError):
+        ASTReader(b"VIPC" + data[4:])
+
+    with raises(SerializationError):
+        ASTReader(data[:-1])
@@ -0,0 +1,69 @@
+from compiler.sema.shape import ShapeAnalysis, HEADER_SIZE, compute_layout
+from compiler.sema.types import INT, STR, BOOL, COMPLEX, make_union
+
+
+def test_shape_analysis_collects_fields_added_after_construction_successfully():
+    analysis = ShapeAnalysis()
+    engine = analysis.engine
+    # john = Person("John")
+    person = analysis.add_site("Person", [("name", STR)])
+    john = engine.fresh()
+    analysis.flow(john, person)
+    # john.age = 45
+    age = engine.fresh()
+    engine.bind(age, INT)
+    analysis.add_field(john, "age", age)
+    # other = Person("Jane") if ... else john
+    other_person = analysis.add_site("OtherPerson", [("name", STR)])
+    analysis.flow(other_person, john)
+    analysis.add_site("Point", [("x", make_union([INT, STR])), ("flag", BOOL)])
+
+    layouts = analysis.get_layouts()
+    layout = layouts["Person"]
+
+    assert layouts["OtherPerson"] is layout
+    assert layout.names == ["name", "age"]
+    assert layout.get_offset("name") == HEADER_SIZE
+    assert layout.get_offset("age") == HEADER_SIZE + 8
+    assert layout.size == 24
+
+    point = analysis.get_layout("Point")
+    assert [(field.name, field.offset) for field in point.fields] == [("x", 8), ("flag", 24)]
+    assert point.size == 32
+
+
+def test_compute_layout_orders_hot_and_aligned_fields_first_successfully():
+    fields = [
+        ("flag", BOOL),
+        ("count", INT),
+        ("z", COMPLEX),
+        ("w", COMPLEX),
+        ("v", COMPLEX),
+        ("u", COMPLEX),
+    ]
+    layout = compute_layout(fields, {"flag": 10, "count": 5}, {"z": 0, "w": 1})
+
+    assert [(field.name, field.offset) for field in layout.fields] == [
+        ("count", 8),
+        ("flag", 16),
+        ("z", 24),
+        ("w", 40),
+        ("u", 56),
+        ("v", 72),
+    ]
+    assert layout.names == ["z", "w", "count", "flag", "u", "v"]
+    assert layout.size == 88
+
+    layout = compute_layout(fields)
+
+    assert [field.name for field in layout.fields] == ["count", "u", "v", "w", "z", "flag"]
+    assert layout.size == 88
+
+
+def test_shape_analysis_orders_fields_by_site_successfully():
+    analysis = ShapeAnalysis()
+    analysis.add_site("Point", [("x", INT), ("y", INT)])
+    analysis.add_site("Size", [("y", INT), ("x", INT)])
+
+    assert analysis.get_layout("Point").names == ["x", "y"]
+    assert analysis.get_layout("Size").names == ["y", "x"]
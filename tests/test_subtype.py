@@ -0,0 +1,54 @@
+from compiler.sema.subtype import SubtypeChecker
+from compiler.sema.types import (
+    INT,
+    STR,
+    FLOAT,
+    ListType,
+    RecordType,
+    FunctionType,
+    NamedType,
+    make_union,
+)
+
+
+def test_subtype_checker_checks_structural_conformance_successfully():
+    checker = SubtypeChecker()
+    person = RecordType([("age", INT), ("name", STR)])
+    named = RecordType([("name", STR)], is_open=True)
+
+    assert checker.is_subtype(person, named)
+    assert not checker.is_subtype(named, person)
+    assert not checker.is_subtype(person, RecordType([("name", STR)]))
+    assert not checker.is_subtype(RecordType([("name", INT)]), named)
+    assert checker.is_subtype(ListType(person), ListType(named))
+    assert checker.cache[(person, RecordType([("name", STR)]))] is False
+
+
+def test_subtype_checker_checks_variance_and_unions_successfully():
+    checker = SubtypeChecker()
+    person = RecordType([("age", INT), ("name", STR)])
+    named = RecordType([("name", STR)], is_open=True)
+
+    assert checker.is_subtype(FunctionType([named], person), FunctionType([person], named))
+    assert not checker.is_subtype(FunctionType([person], named), FunctionType([named], named))
+    assert checker.is_subtype(INT, make_union([INT, STR]))
+    assert checker.is_subtype(make_union([INT, STR]), make_union([FLOAT, INT, STR]))
+    assert not checker.is_subtype(make_union([INT, STR]), INT)
+
+
+def test_subtype_checker_handles_recursive_types_successfully():
+    node = NamedType("Node")
+    child = NamedType("Child")
+    checker = SubtypeChecker(
+        {
+            "Node": RecordType([("next", node), ("value", INT)], is_open=True),
+            "Child": RecordType([("next", child), ("value", INT), ("name", STR)]),
+            "Bad": RecordType([("next", NamedType("Bad")), ("value", STR)]),
+        }
+    )
+
+    assert checker.is_subtype(child, node)
+    assert not checker.is_subtype(NamedType("Bad"), node)
+    assert not checker.is_subtype(node, child)
+    assert checker.cache[(child, node)] is True
+    assert not checker.pending and not checker.assumptions
@@ -0,0 +1,136 @@
+from compiler.lexer.lexer import Lexer
+from compiler.sema.instantiation import InstantiationTable
+from compiler.sema.subtype import SubtypeChecker
+from compiler.sema.template import TemplateRegistry, TemplateError
+from compiler.sema.types import (
+    INT,
+    STR,
+    ListType,
+    RecordType,
+    FunctionType,
+    NamedType,
+    GenericType,
+)
+from compiler.parser.ast import (
+    Identifier,
+    Operator,
+    BinaryExpr,
+    FuncParam,
+    FuncParams,
+    FuncExpr,
+    Program,
+)
+from pytest import raises
+
+T = NamedType("T")
+
+
+def test_template_registry_expands_reachable_instances_once_successfully():
+    registry = TemplateRegistry()
+    loads = []
+
+    def load_unused():
+        loads.append("Unused")
+        return ListType(T)
+
+    registry.define_type("IdentityFunc", ["T"], FunctionType([T], T))
+    registry.define_type("Pair", ["T"], RecordType([("first", T), ("second", T)]))
+    registry.define_type(
+        "Wrapper", ["T"], RecordType([("pair", GenericType("Pair", [T])), ("value", T)])
+    )
+    registry.define_type("Unused", ["T"], load_unused)
+
+    wrapper = registry.request_type(GenericType("Wrapper", [INT]))
+    assert wrapper == NamedType("Wrapper{int}")
+    assert registry.definitions == {}
+
+    registry.expand()
+
+    assert set(registry.definitions) == {"Wrapper{int}", "Pair{int}"}
+    assert registry.definitions["Pair{int}"] is RecordType([("first", INT), ("second", INT)])
+    assert registry.instantiate("Pair", [INT]) is registry.instances[("Pair", (INT,))]
+    assert len(registry.instances) == 2
+    assert loads == []
+
+    identity = registry.instantiate("IdentityFunc", [STR])
+    assert registry.definitions[identity.result.name] is FunctionType([STR], STR)
+
+
+def test_template_registry_handles_recursive_templates_successfully():
+    registry = TemplateRegistry()
+    registry.define_type(
+        "Node", ["T"], RecordType([("next", GenericType("Node", [T])), ("value", T)])
+    )
+    node = registry.instantiate("Node", [INT]).result
+    checker = SubtypeChecker(registry.definitions)
+
+    assert registry.definitions["Node{int}"] is RecordType([("next", node), ("value", INT)])
+    assert checker.is_subtype(node, RecordType([("value", INT)], is_open=True))
+
+    registry.define_type("Nest", ["T"], ListType(GenericType("Nest", [ListType(T)])))
+    registry.max_instances = 50
+
+    with raises(TemplateError):
+        registry.instantiate("Nest", [INT])
+
+    with raises(TemplateError):
+        registry.request("Node", [INT, STR])
+
+    with raises(TemplateError):
+        registry.request("Missing", [INT])
+
+
+def test_template_registry_instantiates_function_templates_successfully():
+    tokens = Lexer("lambda x, y: x + y").lex()
+    params = FuncParams(
+        [FuncParam(Identifier(1), None, None, None), FuncParam(Identifier(3), None, None, None)],
+        None,
+        [],
+        None,
+    )
+    function = FuncExpr(None, params, [BinaryExpr(Identifier(5), Operator(6), Identifier(7))])
+    program = Program([function])
+    table = InstantiationTable.from_ast(program, tokens)
+    registry = TemplateRegistry()
+    registry.define_function("add", function, table)
+
+    instance = registry.instantiate("add", [INT, INT])
+
+    assert instance.is_expanded
+    assert instance.result is table.lookup(function, [INT, INT])
+    assert instance.result.result_type is INT
+    assert registry.instantiate("add", (INT, INT)) is instance
+
+
+def test_template_registry_retries_failed_expansions_successfully():
+    registry = TemplateRegistry()
+    loads = []
+
+    def load_box():
+        loads.append("Box")
+        if len(loads) == 1:
+            raise TemplateError("Box is not available yet")
+        return RecordType([("value", T)])
+
+    registry.define_type("Box", ["T"], load_box)
+    registry.define_type("Pair", ["T"], RecordType([("first", GenericType("Box", [T]))]))
+    registry.define_type("Nest", ["T"], ListType(GenericType("Nest", [ListType(T)])))
+    registry.max_instances = 50
+
+    with raises(TemplateError):
+        registry.instantiate("Pair", [INT])
+
+    assert registry.instances == {}
+    assert registry.definitions == {}
+
+    pair = registry.instantiate("Pair", [INT])
+
+    assert pair.is_expanded
+    assert registry.definitions["Box{int}"] is RecordType([("value", INT)])
+    assert loads == ["Box", "Box"]
+
+    for _ in range(2):
+        with raises(TemplateError):
+            registry.instantiate("Nest", [INT])
+
+    assert set(registry.instances) == {("Pair", (INT,)), ("Box", (INT,))}
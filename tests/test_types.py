@@ -0,0 +1,48 @@
+import pickle
+from compiler.sema.types import (
+    INT,
+    STR,
+    FLOAT,
+    PrimitiveType,
+    ListType,
+    RecordType,
+    FunctionType,
+    UnionType,
+    make_union,
+    interner,
+)
+from pytest import raises
+
+
+def test_types_are_unique_per_structure_successfully():
+    record0 = RecordType([("name", STR), ("age", INT)])
+    length = len(interner)
+    record1 = RecordType([("age", INT), ("name", STR)])
+
+    assert PrimitiveType("int") is INT
+    assert record0 is record1
+    assert len(interner) == length
+    assert ListType(record0) is ListType(record1)
+    assert FunctionType([record0], INT) is FunctionType((record1,), INT)
+    assert RecordType([("name", STR)], is_open=True) is not RecordType([("name", STR)])
+    assert str(record0) == "Object [ age: int, name: str ]"
+
+
+def test_unions_are_canonical_successfully():
+    union0 = make_union([INT, make_union([STR, FLOAT])])
+    union1 = make_union([FLOAT, INT, STR, INT])
+
+    assert union0 is union1
+    assert UnionType([STR, INT]) is UnionType([INT, STR])
+    assert make_union([INT, INT]) is INT
+    assert str(union0) == "float | int | str"
+
+
+def test_types_are_immutable_and_survive_pickling_successfully():
+    record = RecordType([("name", ListType(STR))])
+
+    with raises(AttributeError):
+        record.fields = ()
+
+    assert pickle.loads(pickle.dumps(record)) is record
+    assert {record: 1}[RecordType([("name", ListType(STR))])] == 1
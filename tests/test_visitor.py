@@ -0,0 +1,118 @@
+from compiler.parser.parser import Parser
+from compiler.parser.hashcons import HashConsTable
+from compiler.parser.visitor import Visitor, Transformer, FusedVisitor, SKIP
+from compiler.parser.ast import (
+    Integer,
+    Operator,
+    UnaryExpr,
+    BinaryExpr,
+    Program,
+)
+
+
+class KindRecorder(Visitor):
+    def __init__(self):
+        self.events = []
+
+    def visit_binary_expr(self, node):
+        self.events.append("enter")
+
+    def leave_binary_expr(self, node):
+        self.events.append("leave")
+
+    def visit_integer(self, node):
+        self.events.append(node.index)
+
+
+class UnarySkipper(Visitor):
+    def __init__(self):
+        self.indices = []
+
+    def visit_unary_expr(self, node):
+        return SKIP
+
+    def visit_integer(self, node):
+        self.indices.append(node.index)
+
+
+def test_visitor_dispatches_on_kind_in_preorder_successfully():
+    visitor = KindRecorder()
+    visitor.walk(Parser.from_code("1 + 2 * 3\n4").parse_program())
+
+    assert visitor.events == ["enter", 0, "enter", 2, 4, "leave", "leave", 6]
+    assert Visitor.visit_table == []
+    assert KindRecorder.visit_table[Integer.kind] is KindRecorder.visit_integer
+
+
+def test_visitor_skips_subtrees_successfully():
+    visitor = UnarySkipper()
+    visitor.walk(BinaryExpr(Integer(0), Operator(1), UnaryExpr(Integer(3), Operator(2))))
+
+    assert visitor.indices == [0]
+
+
+def test_visitor_walks_deep_trees_and_hash_consed_nodes_successfully():
+    code = "-" * 5000 + "1"
+    program = Parser.from_code(code).parse_program()
+    consed = HashConsTable(Parser.from_code("1 + 1").tokens).cons(
+        BinaryExpr(Integer(0), Operator(1), Integer(2))
+    )
+    visitor0 = KindRecorder()
+    visitor1 = KindRecorder()
+
+    visitor0.walk(program)
+    visitor1.walk(consed)
+
+    assert visitor0.events == [5000]
+    assert visitor1.events == ["enter", 0, 0, "leave"]
+
+
+def test_transformer_replaces_nodes_bottom_up_successfully():
+    class IndexShifter(Transformer):
+        def transform_integer(self, node):
+            return Integer(node.index + 100)
+
+        def transform_unary_expr(self, node):
+            return node.expr
+
+    program = Parser.from_code("-1 + 2\n-3").parse_program()
+    result = IndexShifter().transform(program)
+
+    assert result is program
+    assert repr(result.statements) == repr(
+        [BinaryExpr(Integer(101), Operator(2), Integer(103)), Integer(106)]
+    )
+
+
+def test_transformer_copies_changed_hash_consed_nodes_successfully():
+    class IndexShifter(Transformer):
+        def transform_integer(self, node):
+            return Integer(node.index + 100)
+
+    table = HashConsTable(Parser.from_code("-1 + -1").tokens)
+    shared = table.cons(UnaryExpr(Integer(1), Operator(0)))
+    first = Program([shared])
+    second = Program([table.cons(UnaryExpr(Integer(4), Operator(3)))])
+
+    assert second.statements[0] is shared
+
+    IndexShifter().transform(first)
+
+    assert first.statements[0] is not shared
+    assert repr(first.statements[0]) == repr(UnaryExpr(Integer(101), Operator(0)))
+    assert second.statements[0] is shared
+    assert shared.expr is table.literal(Integer, 1)
+    assert shared.expr.index == 1
+
+
+def test_fused_visitor_runs_visitors_in_one_walk_successfully():
+    ast = BinaryExpr(Integer(0), Operator(1), UnaryExpr(Integer(3), Operator(2)))
+    visitor0 = KindRecorder()
+    visitor1 = UnarySkipper()
+    expected = KindRecorder()
+
+    FusedVisitor(visitor0, visitor1).walk(ast)
+    expected.walk(ast)
+
+    assert visitor0.events == expected.events
+    assert visitor1.indices == [0]